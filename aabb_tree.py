@@ -0,0 +1,253 @@
+# aabb_tree.py
+#
+# Dynamic AABB tree sprite group.
+#
+# AABBTreeGroup is a pygame.sprite.Group that also keeps its sprites in a
+# balanced bounding-volume tree, so "what in this group touches that rect"
+# walks O(log n) nodes instead of testing every sprite. spritecollide() here
+# is a drop-in for pygame.sprite.spritecollide that uses the tree when it's
+# given one (and falls back to the plain scan for ordinary groups).
+#
+# Each leaf stores a "fat" box: the sprite's rect grown by `margin` pixels.
+# A moving sprite only needs re-inserting once its rect leaves that box, so
+# refit() after a frame of movement touches just the few sprites that went
+# that far. Sprites that never move (solids) cost nothing to keep current.
+#
+# Adding and removing works through the normal Group machinery, so
+# Sprite.kill() takes a sprite out of the tree too.
+
+import pygame
+
+
+class _Node:
+    __slots__ = ("left", "top", "right", "bottom", "parent", "child1", "child2",
+                 "height", "sprite", "order")
+
+    def __init__(self):
+        self.parent = self.child1 = self.child2 = self.sprite = None
+        self.height = 0
+
+
+def _area(left, top, right, bottom):
+    # Perimeter works better than area as an insertion cost for flat boxes
+    return (right - left) + (bottom - top)
+
+
+class AABBTreeGroup(pygame.sprite.Group):
+    """Sprite group indexed by a dynamic AABB tree."""
+
+    def __init__(self, *sprites, margin=8):
+        self.margin = margin
+        self.root = None
+        self.leaves = {}  # sprite -> leaf node
+        self._order = 0
+        super().__init__(*sprites)
+
+    # Group hooks -----------------------------------------------------------
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if sprite not in self.leaves:
+            leaf = _Node()
+            leaf.sprite = sprite
+            leaf.order = self._order
+            self._order += 1
+            self._fatten(leaf, sprite.rect)
+            self.leaves[sprite] = leaf
+            self._insert(leaf)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        leaf = self.leaves.pop(sprite, None)
+        if leaf is not None:
+            self._remove(leaf)
+
+    # Queries ---------------------------------------------------------------
+
+    def query(self, rect):
+        """Sprites whose rect overlaps `rect`, in the order they were added."""
+        if self.root is None:
+            return []
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        colliderect = rect.colliderect
+        hits = []
+        stack = [self.root]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node = pop()
+            if (node.right <= left or node.left >= right
+                    or node.bottom <= top or node.top >= bottom):
+                continue
+            if node.sprite is not None:
+                if colliderect(node.sprite.rect):
+                    hits.append(node)
+            else:
+                push(node.child1)
+                push(node.child2)
+        if len(hits) > 1:
+            hits.sort(key=lambda node: node.order)
+        return [node.sprite for node in hits]
+
+    def refit(self):
+        """Re-insert every sprite that moved out of its fat box."""
+        for sprite, leaf in self.leaves.items():
+            self.moved(sprite, leaf)
+
+    def moved(self, sprite, leaf=None):
+        """Call after moving one sprite; cheap if it stayed inside its box."""
+        if leaf is None:
+            leaf = self.leaves[sprite]
+        rect = sprite.rect
+        if (rect.left >= leaf.left and rect.top >= leaf.top
+                and rect.right <= leaf.right and rect.bottom <= leaf.bottom):
+            return
+        self._remove(leaf)
+        self._fatten(leaf, rect)
+        self._insert(leaf)
+
+    # Tree maintenance ------------------------------------------------------
+
+    def _fatten(self, leaf, rect):
+        margin = self.margin
+        leaf.left = rect.left - margin
+        leaf.top = rect.top - margin
+        leaf.right = rect.right + margin
+        leaf.bottom = rect.bottom + margin
+
+    def _insert(self, leaf):
+        leaf.parent = None
+        if self.root is None:
+            self.root = leaf
+            return
+
+        # Walk down towards the sibling that grows the tree least
+        left, top, right, bottom = leaf.left, leaf.top, leaf.right, leaf.bottom
+        node = self.root
+        while node.sprite is None:
+            child1, child2 = node.child1, node.child2
+            area = _area(node.left, node.top, node.right, node.bottom)
+            combined = _area(min(node.left, left), min(node.top, top),
+                             max(node.right, right), max(node.bottom, bottom))
+            cost = 2 * combined
+            inherited = 2 * (combined - area)
+            cost1 = inherited + _area(min(child1.left, left), min(child1.top, top),
+                                      max(child1.right, right), max(child1.bottom, bottom))
+            if child1.sprite is None:
+                cost1 -= _area(child1.left, child1.top, child1.right, child1.bottom)
+            cost2 = inherited + _area(min(child2.left, left), min(child2.top, top),
+                                      max(child2.right, right), max(child2.bottom, bottom))
+            if child2.sprite is None:
+                cost2 -= _area(child2.left, child2.top, child2.right, child2.bottom)
+            if cost < cost1 and cost < cost2:
+                break
+            node = child1 if cost1 < cost2 else child2
+
+        # Replace the sibling with a new parent holding both
+        sibling = node
+        old_parent = sibling.parent
+        parent = _Node()
+        parent.parent = old_parent
+        parent.child1 = sibling
+        parent.child2 = leaf
+        sibling.parent = parent
+        leaf.parent = parent
+        if old_parent is None:
+            self.root = parent
+        elif old_parent.child1 is sibling:
+            old_parent.child1 = parent
+        else:
+            old_parent.child2 = parent
+        self._fix_upwards(parent)
+
+    def _remove(self, leaf):
+        if leaf is self.root:
+            self.root = None
+            return
+        parent = leaf.parent
+        grandparent = parent.parent
+        sibling = parent.child2 if parent.child1 is leaf else parent.child1
+        sibling.parent = grandparent
+        if grandparent is None:
+            self.root = sibling
+        else:
+            if grandparent.child1 is parent:
+                grandparent.child1 = sibling
+            else:
+                grandparent.child2 = sibling
+            self._fix_upwards(grandparent)
+        leaf.parent = None
+
+    def _fix_upwards(self, node):
+        while node is not None:
+            node = self._balance(node)
+            child1, child2 = node.child1, node.child2
+            node.height = 1 + max(child1.height, child2.height)
+            node.left = min(child1.left, child2.left)
+            node.top = min(child1.top, child2.top)
+            node.right = max(child1.right, child2.right)
+            node.bottom = max(child1.bottom, child2.bottom)
+            node = node.parent
+
+    def _balance(self, a):
+        # AVL-style rotation; returns the node now at a's position
+        if a.sprite is not None or a.height < 2:
+            return a
+        b, c = a.child1, a.child2
+        balance = c.height - b.height
+        if balance > 1:
+            return self._rotate(a, c, first=False)
+        if balance < -1:
+            return self._rotate(a, b, first=True)
+        return a
+
+    def _rotate(self, a, up, first):
+        # Promote `up` (a's taller child) to a's place
+        f, g = up.child1, up.child2
+        up.child1 = a
+        up.parent = a.parent
+        a.parent = up
+        if up.parent is None:
+            self.root = up
+        elif up.parent.child1 is a:
+            up.parent.child1 = up
+        else:
+            up.parent.child2 = up
+        # Keep the taller grandchild under `up`, hand the other one to a
+        if f.height > g.height:
+            keep, give = f, g
+        else:
+            keep, give = g, f
+        up.child2 = keep
+        if first:
+            a.child1 = give
+        else:
+            a.child2 = give
+        give.parent = a
+        for node in (a, up):
+            child1, child2 = node.child1, node.child2
+            node.height = 1 + max(child1.height, child2.height)
+            node.left = min(child1.left, child2.left)
+            node.top = min(child1.top, child2.top)
+            node.right = max(child1.right, child2.right)
+            node.bottom = max(child1.bottom, child2.bottom)
+        return up
+
+
+def spritecollide(sprite, group, dokill, collided=None):
+    """pygame.sprite.spritecollide, answered from the tree when possible.
+
+    With an AABBTreeGroup the candidates are the sprites whose rect overlaps
+    sprite.rect, so a custom `collided` must only accept pairs whose rects
+    overlap (collide_mask and collide_rect_ratio up to 1.0 do).
+    """
+    query = getattr(group, "query", None)
+    if query is None:
+        return pygame.sprite.spritecollide(sprite, group, dokill, collided)
+    hits = query(sprite.rect)
+    if collided is not None:
+        hits = [other for other in hits if collided(sprite, other)]
+    if dokill:
+        for other in hits:
+            other.kill()
+    return hits
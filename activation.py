@@ -0,0 +1,110 @@
+# activation.py
+#
+# Sleep/wake activation zones for enemies.
+#
+# Enemies start asleep and cost nothing per frame. Each frame the zones are
+# given the camera position: sleeping enemies that come within `wake_margin`
+# pixels of the view wake up and are updated from then on; awake enemies
+# that drift more than `sleep_margin` pixels outside the view go back to
+# sleep, and (if `despawn_margin` is set) enemies left that far behind the
+# camera are despawned for good. sleep_margin should be larger than
+# wake_margin so an enemy on the edge doesn't flip every frame.
+#
+# Sleeping enemies are kept sorted by x (they don't move while asleep), so
+# waking is a binary search plus the handful of enemies that actually wake,
+# no matter how many hundreds of enemies the level holds.
+#
+# Determinism guarantee:
+#   - A sleeping enemy is frozen exactly: position, velocity and any
+#     counters it keeps don't change until it wakes, and it resumes from
+#     that state.
+#   - Whether an enemy is awake on a given tick depends only on the camera
+#     position and the enemy's own rect, so the same inputs always wake,
+#     sleep and despawn the same enemies on the same ticks.
+#   - Awake enemies update in the order they woke; enemies waking on the
+#     same tick wake left to right, ties in the order they were added.
+# So a replay of the same input sequence reproduces the same game. What is
+# NOT preserved is equivalence with simulating every enemy every frame: an
+# enemy far away doesn't walk, fall or turn around while asleep, animation
+# that is derived from the global tick jumps ahead when it wakes, and a
+# despawned enemy does not come back when the camera returns.
+
+import bisect
+import itertools
+
+import pools
+
+
+class ActivationZones:
+    """Tracks which enemies are near enough to the camera to simulate."""
+
+    def __init__(self, wake_margin, sleep_margin, despawn_margin=None):
+        self.wake_margin = wake_margin
+        self.sleep_margin = sleep_margin
+        self.despawn_margin = despawn_margin
+        self.sleeping = []  # (rect.left, order, enemy), sorted
+        self.awake = {}  # insertion-ordered set of awake enemies
+        self.max_width = 0
+        self._order = itertools.count()
+
+    def add(self, enemy):
+        """Register an enemy; it starts asleep."""
+        enemy.awake = False
+        self.max_width = max(self.max_width, enemy.rect.width)
+        bisect.insort(self.sleeping, (enemy.rect.left, next(self._order), enemy))
+
+    def clear(self):
+        self.sleeping.clear()
+        self.awake.clear()
+
+    def __len__(self):
+        return len(self.sleeping) + len(self.awake)
+
+    def update(self, camera_x, view_width):
+        """Wake, sleep and despawn enemies for the current camera position."""
+        left = camera_x - self.wake_margin
+        right = camera_x + view_width + self.wake_margin
+        sleeping = self.sleeping
+        lo = bisect.bisect_left(sleeping, (left - self.max_width,))
+        hi = bisect.bisect_left(sleeping, (right,))
+        if lo < hi:
+            still_asleep = []
+            for entry in sleeping[lo:hi]:
+                enemy = entry[2]
+                if not enemy.alive():
+                    continue  # removed while asleep
+                if enemy.rect.right > left:
+                    enemy.awake = True
+                    self.awake[enemy] = None
+                else:
+                    still_asleep.append(entry)
+            sleeping[lo:hi] = still_asleep
+
+        despawn_left = None
+        if self.despawn_margin is not None:
+            despawn_left = camera_x - self.despawn_margin
+            # Sleepers that have fallen entirely behind the despawn line
+            cut = bisect.bisect_left(sleeping, (despawn_left - self.max_width,))
+            if cut:
+                for _, _, enemy in sleeping[:cut]:
+                    if enemy.alive():
+                        pools.release(enemy)
+                del sleeping[:cut]
+
+        sleep_left = camera_x - self.sleep_margin
+        sleep_right = camera_x + view_width + self.sleep_margin
+        for enemy in tuple(self.awake):
+            rect = enemy.rect
+            if not enemy.alive():
+                del self.awake[enemy]
+            elif despawn_left is not None and rect.right < despawn_left:
+                del self.awake[enemy]
+                pools.release(enemy)
+            elif rect.right < sleep_left or rect.left > sleep_right:
+                del self.awake[enemy]
+                self.add(enemy)
+
+    def update_awake(self, *args):
+        """Call update(*args) on every awake enemy."""
+        for enemy in tuple(self.awake):
+            enemy.update(*args)
@@ -0,0 +1,36 @@
+# active_set.py
+#
+# Active-entity scheduler.
+#
+# Most level objects (blocks, pipes, coins) sit still almost all the time,
+# yet calling Group.update() on them every frame costs a method call each
+# just to find out there's nothing to do. An entity instead adds itself to
+# an ActiveSet when it starts animating (e.g. when a block is hit) and
+# discards itself once it settles, so per-frame update cost follows what is
+# actually changing.
+
+class ActiveSet:
+    """Insertion-ordered set of entities that need update() this frame."""
+
+    def __init__(self):
+        self.entities = {}
+
+    def add(self, entity):
+        self.entities[entity] = None
+
+    def discard(self, entity):
+        self.entities.pop(entity, None)
+
+    def clear(self):
+        self.entities.clear()
+
+    def __contains__(self, entity):
+        return entity in self.entities
+
+    def __len__(self):
+        return len(self.entities)
+
+    def update(self, *args):
+        # Snapshot first: entities may discard themselves while updating
+        for entity in tuple(self.entities):
+            entity.update(*args)
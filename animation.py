@@ -0,0 +1,71 @@
+# animation.py
+#
+# Shared, data-driven animation clips.
+#
+# A clip is defined once as a list of frames plus how many ticks each frame
+# is shown for. Entities don't keep their own frame timers any more: they only
+# hold a clip id and the tick the clip started on, and the frame to show is
+# looked up from the global frame counter whenever it's actually needed.
+
+class Clip:
+    """A sequence of frames, each held for a number of ticks."""
+    __slots__ = ("frames", "timeline", "length", "loop")
+
+    def __init__(self, frames, durations, loop=True):
+        if len(frames) != len(durations):
+            raise ValueError("every frame needs a duration")
+        self.frames = tuple(frames)
+        # Expand to one entry per tick so a lookup is a single index
+        timeline = []
+        for frame, duration in zip(self.frames, durations):
+            timeline.extend([frame] * max(1, int(duration)))
+        self.timeline = tuple(timeline)
+        self.length = len(timeline)
+        self.loop = loop
+
+    def frame_at(self, elapsed):
+        """Return the frame shown `elapsed` ticks after the clip started."""
+        if self.loop:
+            return self.timeline[elapsed % self.length]
+        if elapsed >= self.length:
+            return self.timeline[-1]
+        return self.timeline[elapsed]
+
+
+class ClipLibrary:
+    """Registry of clips, addressed by small integer ids."""
+
+    def __init__(self):
+        self.clips = []
+        self.ids = {}
+
+    def define(self, name, frames, durations=None, loop=True):
+        """Register a clip and return its id. Re-defining a name replaces it."""
+        if durations is None:
+            durations = [1] * len(frames)
+        clip = Clip(frames, durations, loop)
+        if name in self.ids:
+            clip_id = self.ids[name]
+            self.clips[clip_id] = clip
+        else:
+            clip_id = len(self.clips)
+            self.clips.append(clip)
+            self.ids[name] = clip_id
+        return clip_id
+
+    def id(self, name):
+        return self.ids[name]
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def frame(self, clip_id, start_tick, tick):
+        """Current frame of `clip_id` for a clip that started on `start_tick`."""
+        return self.clips[clip_id].frame_at(tick - start_tick)
+
+
+def play(entity, clip_id, tick):
+    """Switch `entity` to `clip_id`, restarting it only when the clip changes."""
+    if entity.clip != clip_id:
+        entity.clip = clip_id
+        entity.clip_start = tick
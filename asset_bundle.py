@@ -0,0 +1,176 @@
+# asset_bundle.py
+#
+# Baked asset bundle.
+#
+# All the art in these games is drawn procedurally with pygame.draw. Instead
+# of paying for those draw calls on every launch (and every level load), the
+# generators are registered with an AssetBundle which renders them all once,
+# packs the results into a single RGBA atlas and writes it to disk together
+# with its index. Later launches load the whole bundle with one read.
+#
+# The cache file is keyed by a hash of the generators' compiled code plus any
+# settings passed in (e.g. TILE_SIZE), so editing a generator or changing the
+# tile size invalidates it automatically. Hashing the code objects rather
+# than the source text keeps the key check far cheaper than a re-bake.
+#
+# Usage: python asset_bundle.py <game script> [...]   (re-bake ahead of time)
+
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import pygame
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+MAGIC = b"MFAB1\n"
+ATLAS_WIDTH = 512
+PADDING = 1
+
+
+class AssetBundle:
+    """Named surface generators, rendered once and cached as a packed atlas."""
+
+    def __init__(self, name, *settings, cache_dir=CACHE_DIR):
+        self.name = name
+        self.settings = settings
+        self.cache_dir = cache_dir
+        self.generators = {}  # name -> (generator, args)
+        self.surfaces = None
+        self.atlas = None
+        self._key = None
+
+    def add(self, name, generator, *args):
+        self.generators[name] = (generator, args)
+        self.surfaces = None
+        self._key = None
+
+    def __contains__(self, name):
+        return name in self.generators
+
+    def get(self, name):
+        if self.surfaces is None:
+            self.load()
+        return self.surfaces[name]
+
+    @property
+    def path(self):
+        return os.path.join(self.cache_dir, self.name + ".bundle")
+
+    def key(self):
+        if self._key is not None:
+            return self._key
+        codes = {}
+        entries = []
+        for name, (generator, args) in sorted(self.generators.items()):
+            code = getattr(generator, "__func__", generator).__code__
+            codes[code] = None
+            entries.append((name, code.co_name, args))
+        digest = hashlib.sha256(repr((self.settings, entries)).encode())
+        for code in codes:
+            hash_code(digest, code)
+        self._key = digest.hexdigest()
+        return self._key
+
+    def load(self):
+        key = self.key()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        if not self._unpack(data, key):
+            self.bake(key)
+
+    def bake(self, key=None):
+        """Render every generator, pack the atlas and write it to disk."""
+        if key is None:
+            key = self.key()
+        rendered = {name: generator(*args) for name, (generator, args) in self.generators.items()}
+        index, size = pack(rendered)
+        atlas = pygame.Surface(size, pygame.SRCALPHA)
+        for name, (x, y, w, h) in index.items():
+            # Copy pixels exactly (alpha included) into the transparent atlas
+            atlas.blit(rendered[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        self._use(atlas, index)
+
+        header = json.dumps({"size": size, "assets": index}).encode()
+        pixels = pygame.image.tobytes(atlas, "RGBA")
+        temp_path = self.path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(MAGIC + key.encode() + b"\n" + struct.pack("<I", len(header)) + header + pixels)
+            os.replace(temp_path, self.path)
+        except OSError:
+            # Read-only install or full disk: the atlas is already in use,
+            # the next launch just bakes it again
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _unpack(self, data, key):
+        start = len(MAGIC) + len(key) + 1
+        if data[:start] != MAGIC + key.encode() + b"\n":
+            return False
+        try:
+            (header_size,) = struct.unpack_from("<I", data, start)
+            start += 4
+            header = json.loads(data[start:start + header_size])
+            width, height = header["size"]
+            pixels = data[start + header_size:]
+            if len(pixels) != width * height * 4 or set(header["assets"]) != set(self.generators):
+                return False
+            self._use(pygame.image.frombytes(pixels, (width, height), "RGBA"), header["assets"])
+        except (struct.error, ValueError, KeyError, TypeError):
+            return False  # truncated or corrupt: a cache miss
+        return True
+
+    def _use(self, atlas, index):
+        self.atlas = atlas
+        self.surfaces = {name: atlas.subsurface(rect) for name, rect in index.items()}
+
+
+def hash_code(digest, code):
+    digest.update(code.co_code)
+    nested = [const for const in code.co_consts if hasattr(const, "co_code")]
+    plain = [const for const in code.co_consts if not hasattr(const, "co_code")]
+    digest.update(repr((code.co_names, plain)).encode())
+    for const in nested:
+        hash_code(digest, const)
+
+
+def pack(surfaces):
+    """Shelf-pack surfaces, tallest first. Returns ({name: [x, y, w, h]}, (w, h))."""
+    order = sorted(surfaces, key=lambda name: (-surfaces[name].get_height(), name))
+    index = {}
+    x = y = shelf_height = width = 0
+    for name in order:
+        w, h = surfaces[name].get_size()
+        if x and x + w > ATLAS_WIDTH:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        index[name] = [x, y, w, h]
+        x += w + PADDING
+        width = max(width, x)
+        shelf_height = max(shelf_height, h)
+    return index, (max(1, width), max(1, y + shelf_height))
+
+
+def main(argv):
+    import importlib.util
+
+    for script in argv:
+        spec = importlib.util.spec_from_file_location("baked_game", script)
+        game = importlib.util.module_from_spec(spec)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        spec.loader.exec_module(game)
+        game.assets.bake()
+        print(f"{script}: {len(game.assets.generators)} assets -> {game.assets.path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
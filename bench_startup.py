@@ -0,0 +1,89 @@
+# bench_startup.py
+#
+# Startup benchmark: launches a game script in a fresh interpreter (the same
+# way the launcher does) and reports the time from spawn until its first
+# pygame.display.flip(), i.e. time to first frame. The part spent after
+# `import pygame` is reported separately, since that import is a fixed cost
+# the game scripts can't do anything about.
+#
+# Usage: python bench_startup.py [script.py ...] [--runs N] [--headless]
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_SCRIPTS = ["marioforeverreboot20XX.py", "rebooted!marioforever.py"]
+
+# Runs inside the child: replace flip/update so the first presented frame
+# reports back and exits instead of entering the game loop for good.
+CHILD = r"""
+import os, runpy, sys, time
+import pygame
+imported = time.perf_counter()
+
+def first_frame(*args):
+    sys.stdout.write("FIRST_FRAME %f\n" % (time.perf_counter() - imported))
+    sys.stdout.flush()
+    os._exit(0)
+
+pygame.display.flip = first_frame
+pygame.display.update = first_frame
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[1])))
+runpy.run_path(sys.argv[1], run_name="__main__")
+"""
+
+
+def time_to_first_frame(script, headless=False):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    if headless:
+        env["SDL_VIDEODRIVER"] = "dummy"
+        env["SDL_AUDIODRIVER"] = "dummy"
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", CHILD, script],
+                             stdout=subprocess.PIPE, env=env, text=True)
+    result = None
+    for line in child.stdout:
+        if line.startswith("FIRST_FRAME"):
+            # (total since spawn, time spent after pygame was imported)
+            result = (time.perf_counter() - start, float(line.split()[1]))
+            break
+    child.wait()
+    return result
+
+
+def main(argv):
+    runs = 10
+    headless = False
+    scripts = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--runs":
+            runs = int(next(args))
+        elif arg == "--headless":
+            headless = True
+        else:
+            scripts.append(arg)
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = scripts or [os.path.join(here, name) for name in DEFAULT_SCRIPTS]
+
+    print(f"{'script':<32} {'min ms':>8} {'median ms':>10} {'max ms':>8} {'after import ms':>16}")
+    for script in scripts:
+        totals = []
+        game = []
+        for _ in range(runs):
+            result = time_to_first_frame(script, headless)
+            if result is None:
+                print(f"{os.path.basename(script):<32} never presented a frame")
+                break
+            totals.append(result[0] * 1000)
+            game.append(result[1] * 1000)
+        else:
+            print(f"{os.path.basename(script):<32} {min(totals):>8.1f} "
+                  f"{statistics.median(totals):>10.1f} {max(totals):>8.1f} "
+                  f"{statistics.median(game):>16.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,138 @@
+# bitmap_text.py
+#
+# Glyph-atlas text renderer.
+#
+# Each font/size/color gets its glyphs rasterized once into a single atlas
+# surface. Strings are then drawn as one batched Surface.blits() call of
+# atlas areas instead of a TrueType render per call, and lines that repeat
+# (labels, menu entries) are kept composed so they cost a single blit. Digits
+# get a fixed-width fast path so score and coin counters don't jiggle and can
+# be drawn as a few digit blits without composing a new line.
+
+import pygame
+
+DEFAULT_CHARSET = "".join(chr(code) for code in range(32, 127)) + "×"
+DIGITS = "0123456789"
+MAX_CACHED_LINES = 256
+
+
+class GlyphAtlas:
+    """All glyphs of one font in one color, packed into a single surface."""
+
+    def __init__(self, font, color, charset=DEFAULT_CHARSET):
+        self.font = font
+        self.color = color
+        self.height = font.get_height()
+        self.glyphs = {}  # char -> (source surface, area, advance)
+        self.lines = {}  # text -> composed surface
+
+        rendered = [(char, font.render(char, True, color)) for char in dict.fromkeys(charset)]
+        width = sum(glyph.get_width() for _, glyph in rendered)
+        self.surface = pygame.Surface((max(1, width), self.height), pygame.SRCALPHA)
+        x = 0
+        for char, glyph in rendered:
+            # The atlas starts fully transparent, so MAX copies the glyph
+            # pixels (alpha included) without blending them against black.
+            self.surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            area = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+            self.glyphs[char] = (self.surface, area, glyph.get_width())
+            x += glyph.get_width()
+
+        # Fixed-width digit cells, each digit centered in its cell
+        self.digit_width = max(self.glyphs[digit][2] for digit in DIGITS)
+        self.digits = [
+            (self.glyphs[digit][1], (self.digit_width - self.glyphs[digit][2]) // 2)
+            for digit in DIGITS
+        ]
+
+    def _glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            # Characters outside the charset are rendered once on demand
+            surface = self.font.render(char, True, self.color)
+            glyph = (surface, surface.get_rect(), surface.get_width())
+            self.glyphs[char] = glyph
+        return glyph
+
+    def width(self, text):
+        glyphs = self.glyphs
+        width = 0
+        for char in text:
+            glyph = glyphs.get(char) or self._glyph(char)
+            width += glyph[2]
+        return width
+
+    def size(self, text):
+        return self.width(text), self.height
+
+    def compose(self, text):
+        """Build `text` from atlas glyphs into its own surface (cached)."""
+        line = self.lines.get(text)
+        if line is None:
+            glyphs = self.glyphs
+            batch = []
+            x = 0
+            for char in text:
+                glyph = glyphs.get(char) or self._glyph(char)
+                batch.append((glyph[0], (x, 0), glyph[1], pygame.BLEND_RGBA_MAX))
+                x += glyph[2]
+            line = pygame.Surface((max(1, x), self.height), pygame.SRCALPHA)
+            line.blits(batch, doreturn=False)
+            if len(self.lines) >= MAX_CACHED_LINES:
+                self.lines.clear()
+            self.lines[text] = line
+        return line
+
+    def render_to(self, surface, pos, text):
+        """Draw `text` with its top-left at `pos`. Returns the covered rect."""
+        line = self.compose(text)
+        surface.blit(line, pos)
+        return pygame.Rect(pos, line.get_size())
+
+    def number_width(self, value, min_digits=1):
+        digits = len(str(abs(value)))
+        width = max(digits, min_digits) * self.digit_width
+        if value < 0:
+            width += self._glyph("-")[2]
+        return width
+
+    def draw_number(self, surface, pos, value, min_digits=1):
+        """Draw an integer using fixed-width digit cells (zero-padded to `min_digits`)."""
+        x, y = pos
+        batch = []
+        if value < 0:
+            glyph = self._glyph("-")
+            batch.append((glyph[0], (x, y), glyph[1]))
+            x += glyph[2]
+            value = -value
+        atlas = self.surface
+        cell = self.digit_width
+        for char in str(value).rjust(min_digits, "0"):
+            area, offset = self.digits[ord(char) - 48]
+            batch.append((atlas, (x + offset, y), area))
+            x += cell
+        surface.blits(batch, doreturn=False)
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+
+# Atlases are built once per (font name, size, color) and reused
+_fonts = {}
+_atlases = {}
+
+
+def get_font(size, name=None):
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[key] = pygame.font.Font(name, size)
+    return font
+
+
+def get_atlas(size, color, name=None):
+    key = (name, size, tuple(pygame.Color(color)))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = GlyphAtlas(get_font(size, name), color)
+    return atlas
@@ -0,0 +1,101 @@
+# broadphase.py
+#
+# Sort-and-sweep broadphase for moving entities.
+#
+# Instead of every entity scanning every other one, all registered entities
+# are kept sorted by the left edge of their rect. Entities move only a few
+# pixels per frame, so the order barely changes and an insertion sort puts
+# it right again in close to linear time. A single sweep over that order
+# then only compares entities whose x-intervals overlap, and the resulting
+# pairs are filtered by kind ("player", "enemy", "item", ...) so each game
+# only gets the pairs it asked for.
+#
+# Entities that were in a sprite group when added leave the broadphase on
+# their own once they're killed (or released back to a pool); anything else,
+# e.g. a player that's drawn directly, stays until remove().
+
+class SweepAndPrune:
+    """Finds overlapping pairs among entities of the requested kinds."""
+
+    def __init__(self, pair_kinds):
+        self.wanted = {pair: pair for pair in pair_kinds}
+        self.found = {pair: [] for pair in pair_kinds}
+        self.entries = []  # [rect.left, sprite, kind, tracked], sorted by left
+        self.members = {}  # sprite -> entry
+
+    def add(self, sprite, kind):
+        entry = self.members.get(sprite)
+        if entry is not None:
+            entry[2] = kind
+            return
+        entry = [sprite.rect.left, sprite, kind, sprite.alive()]
+        self.members[sprite] = entry
+        self.entries.append(entry)
+
+    def remove(self, sprite):
+        entry = self.members.pop(sprite, None)
+        if entry is not None:
+            entry[1] = None
+
+    def clear(self):
+        self.entries.clear()
+        self.members.clear()
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, sprite):
+        return sprite in self.members
+
+    def update(self):
+        """Re-sort by x and collect this frame's overlapping pairs."""
+        members = self.members
+        live = []
+        for entry in self.entries:
+            sprite = entry[1]
+            if sprite is None:
+                continue
+            if entry[3] and not sprite.alive():
+                del members[sprite]
+                continue
+            entry[0] = sprite.rect.left
+            live.append(entry)
+
+        # Insertion sort: cheap because last frame's order is nearly right
+        for i in range(1, len(live)):
+            entry = live[i]
+            left = entry[0]
+            j = i - 1
+            while j >= 0 and live[j][0] > left:
+                live[j + 1] = live[j]
+                j -= 1
+            live[j + 1] = entry
+        self.entries = live
+
+        wanted = self.wanted
+        found = self.found
+        for pairs in found.values():
+            pairs.clear()
+        active = []
+        for entry in live:
+            left = entry[0]
+            if active:
+                active = [other for other in active if other[1].rect.right > left]
+            sprite = entry[1]
+            rect = sprite.rect
+            kind = entry[2]
+            for other in active:
+                if not rect.colliderect(other[1].rect):
+                    continue
+                pair = wanted.get((other[2], kind))
+                if pair is not None:
+                    found[pair].append((other[1], sprite))
+                    continue
+                pair = wanted.get((kind, other[2]))
+                if pair is not None:
+                    found[pair].append((sprite, other[1]))
+            active.append(entry)
+
+    def pairs(self, kind_a, kind_b):
+        """Overlapping (a, b) pairs from the last update(), a of kind_a."""
+        return self.found[(kind_a, kind_b)]
@@ -0,0 +1,82 @@
+# collision.py
+#
+# Interned collision kinds and a response table.
+#
+# Each entity class declares what it is once, as a `kinds` bit mask built
+# from interned kind flags (kind("player"), kind("bumpable"), ...). Instead
+# of probing objects with hasattr() or comparing type strings on every
+# contact, collision code hands both parties to a ResponseTable, which looks
+# up the handlers registered for their (kind_a, kind_b) pairs. The lookup for
+# a pair of masks is worked out the first time that pair is seen and cached,
+# so resolving a contact is one dict lookup.
+#
+# The table also counts how often each handler fires; report() lists them.
+
+_kinds = {}  # name -> flag
+
+
+def kind(name):
+    """The interned flag for `name`; the same name always gives the same flag."""
+    flag = _kinds.get(name)
+    if flag is None:
+        flag = _kinds[name] = 1 << len(_kinds)
+    return flag
+
+
+def kind_names(kinds):
+    """Names of the flags set in a `kinds` mask, for debugging."""
+    return [name for name, flag in _kinds.items() if kinds & flag]
+
+
+class ResponseTable:
+    """(kind_a, kind_b) -> handler(a, b, *args), with fire counts."""
+
+    def __init__(self):
+        self.rules = []  # (kind_a, kind_b, label, handler), in registration order
+        self.fired = {}  # label -> count
+        self._compiled = {}  # (kinds_a, kinds_b) -> ((label, handler), ...)
+
+    def on(self, kind_a, kind_b, handler=None):
+        """Register handler(a, b, *args) for a of kind_a meeting b of kind_b.
+
+        Usable as a decorator. Handlers for one contact fire in the order
+        they were registered.
+        """
+        def register(handler):
+            label = "{}/{}: {}".format(
+                "|".join(kind_names(kind_a)), "|".join(kind_names(kind_b)),
+                getattr(handler, "__qualname__", repr(handler)))
+            self.rules.append((kind_a, kind_b, label, handler))
+            self.fired.setdefault(label, 0)
+            self._compiled.clear()
+            return handler
+        if handler is None:
+            return register
+        return register(handler)
+
+    def handlers(self, kinds_a, kinds_b):
+        key = (kinds_a, kinds_b)
+        found = self._compiled.get(key)
+        if found is None:
+            found = self._compiled[key] = tuple(
+                (label, handler) for kind_a, kind_b, label, handler in self.rules
+                if kinds_a & kind_a and kinds_b & kind_b)
+        return found
+
+    def respond(self, a, b, *args):
+        """Run every handler for a meeting b; returns whether any fired."""
+        found = self._compiled.get((a.kinds, b.kinds))
+        if found is None:
+            found = self.handlers(a.kinds, b.kinds)
+        fired = self.fired
+        for label, handler in found:
+            fired[label] += 1
+            handler(a, b, *args)
+        return bool(found)
+
+    def report(self):
+        """One line per handler, most frequently fired first."""
+        width = max((len(label) for label in self.fired), default=0)
+        return "\n".join(
+            f"{label:<{width}}  {count}"
+            for label, count in sorted(self.fired.items(), key=lambda item: -item[1]))
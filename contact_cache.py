@@ -0,0 +1,127 @@
+# contact_cache.py
+#
+# Resting-contact cache.
+#
+# An entity standing on flat ground still gets pulled down by gravity every
+# frame, lands a pixel inside the floor and needs a full scan over every
+# platform, pipe and block just to be snapped back to where it was. When it
+# lands, settle() records the flat surface under it (adjacent tiles with the
+# same top merge into one run) plus the nearest solids to its left and right
+# at its height. On later frames resting_on() confirms in a few comparisons
+# that, after gravity's push, the entity can only be touching that surface,
+# so it can be snapped back without the scan.
+#
+# The shortcut gives exactly the result the full scan would: it only applies
+# while every solid the entity overlaps is part of the recorded surface.
+# Anything else (walking past the end of the surface or up to a wall, being
+# moved, changing size, or any solid in the level moving, appearing or
+# disappearing, which must be reported with invalidate()) falls back to the
+# full scan.
+
+class Rest:
+    __slots__ = ("version", "top", "bottom", "surface", "runs", "left_limit", "right_limit")
+
+
+class ContactCache:
+    """What each grounded entity is standing on, valid until a solid changes."""
+
+    def __init__(self):
+        self.version = 0
+        self.entries = {}  # entity -> Rest
+
+    def invalidate(self):
+        """A solid moved, appeared or disappeared: drop every cached contact."""
+        self.version += 1
+
+    def forget(self, entity):
+        self.entries.pop(entity, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.version += 1
+
+    def settle(self, entity, drop, *groups):
+        """Record the surface `entity` has just landed on.
+
+        `drop` is how many pixels gravity pushes a resting entity into the
+        floor each frame; the cached contact describes the entity after
+        that push.
+        """
+        rect = entity.rect
+        surface = rect.bottom
+        top = rect.top + drop
+        bottom = rect.bottom + drop
+        if drop < 1:
+            # Gravity doesn't move it into the floor: nothing to skip
+            self.entries.pop(entity, None)
+            return
+        flush = []
+        left_limit = float("-inf")
+        right_limit = float("inf")
+        for group in groups:
+            for solid in group:
+                other = solid.rect
+                if other.bottom <= top or other.top >= bottom:
+                    continue  # not at the entity's height
+                if other.top == surface:
+                    flush.append((other.left, other.right))
+                elif other.right <= rect.left:
+                    left_limit = max(left_limit, other.right)
+                elif other.left >= rect.right:
+                    right_limit = min(right_limit, other.left)
+                else:
+                    # Overlapping something that isn't floor: don't cache
+                    self.entries.pop(entity, None)
+                    return
+
+        # Merge touching floor tiles into continuous runs
+        flush.sort()
+        runs = []
+        for left, right in flush:
+            if runs and left <= runs[-1][1]:
+                if right > runs[-1][1]:
+                    runs[-1][1] = right
+            else:
+                runs.append([left, right])
+
+        rest = Rest()
+        rest.version = self.version
+        rest.top = top
+        rest.bottom = bottom
+        rest.surface = surface
+        rest.runs = runs
+        rest.left_limit = left_limit
+        rest.right_limit = right_limit
+        self.entries[entity] = rest
+
+    def resting_on(self, entity):
+        """The y the entity rests at if it's still just on its cached surface,
+        else None (the full collision scan is needed)."""
+        rest = self.entries.get(entity)
+        if rest is None or rest.version != self.version:
+            return None
+        rect = entity.rect
+        if rect.top != rest.top or rect.bottom != rest.bottom:
+            return None
+        if rect.left < rest.left_limit or rect.right > rest.right_limit:
+            return None
+        if self._on_run(rest, rect.left, rect.right):
+            return rest.surface
+        return None
+
+    def supports(self, entity, rect):
+        """Whether `rect`, just below the entity's feet, lies over its cached
+        surface (e.g. a ledge check); False means "don't know"."""
+        rest = self.entries.get(entity)
+        if rest is None or rest.version != self.version:
+            return False
+        if rect.top != rest.surface or entity.rect.bottom != rest.surface:
+            return False
+        return self._on_run(rest, rect.left, rect.right)
+
+    @staticmethod
+    def _on_run(rest, left, right):
+        for run_left, run_right in rest.runs:
+            if right > run_left and left < run_right:
+                return True
+        return False
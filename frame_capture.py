@@ -0,0 +1,149 @@
+# frame_capture.py
+#
+# Gameplay recording that doesn't stall the game loop.
+#
+# FrameCapture.capture(surface) is called once per frame, after drawing. It
+# copies the surface's pixels, straight from its buffer in one memcpy, into
+# the next free slot of a ring of preallocated arrays and queues that slot
+# for a background thread. The thread does all the file I/O and hands the
+# slot back. Nothing is allocated per frame on the game's side. When the
+# writer falls behind and every slot is still waiting, the frame is dropped
+# rather than waiting; dropped frame numbers are counted, listed in the
+# sidecar file and reported by close().
+#
+# Output, in `directory`:
+#   raw  capture.raw: the frames back to back, width*4 bytes a row, pixel
+#        bytes in the order of capture.json's "pix_fmt", e.g.
+#          ffmpeg -f rawvideo -pix_fmt bgr0 -s 800x600 -r 60 -i capture.raw out.mp4
+#   png  frame_000001.png, ... (numbered by game frame, so gaps are drops)
+# plus capture.json: size, pixel format, frame count and the dropped frames.
+
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+
+def pixel_format(surface):
+    """The surface's 32-bit pixel layout by byte, in ffmpeg's names ("bgr0",
+    "rgba", ...; 0 is an unused byte)."""
+    if surface.get_bytesize() != 4:
+        raise ValueError("frame capture needs a 32-bit surface")
+    names = ["0"] * 4
+    for channel, shift, mask in zip("rgba", surface.get_shifts(), surface.get_masks()):
+        if mask:
+            names[shift // 8] = channel
+    return "".join(names)
+
+
+class FrameCapture:
+    """Ring-buffered, threaded recording of a surface, one frame per call."""
+
+    def __init__(self, directory, size, pitch, masks, pix_fmt, format="raw", slots=8):
+        if format not in ("raw", "png"):
+            raise ValueError(f"unknown capture format {format!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.pitch = pitch
+        self.masks = masks
+        self.pix_fmt = pix_fmt
+        self.format = format
+        width, height = size
+        self.ring = [np.empty((height, pitch), np.uint8) for _ in range(slots)]
+        self.free = queue.SimpleQueue()  # slot indices the writer is done with
+        for slot in range(slots):
+            self.free.put(slot)
+        self.pending = queue.SimpleQueue()  # (slot, frame), None to stop
+        self.frame = 0
+        self.written = 0
+        self.dropped = []  # frame numbers that didn't fit in the ring
+        self.capture_seconds = 0.0
+        self.worst_capture = 0.0
+        self.error = None
+        self.writer = threading.Thread(target=self._write_frames, name="frame-capture", daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def for_surface(cls, surface, directory, format="raw", slots=8):
+        return cls(directory, surface.get_size(), surface.get_pitch(),
+                   surface.get_masks(), pixel_format(surface), format, slots)
+
+    def capture(self, surface):
+        """Copy this frame's pixels; never waits for the writer."""
+        started = time.perf_counter()
+        self.frame += 1
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped.append(self.frame)
+            return False
+        pixels = surface.get_buffer()
+        np.copyto(self.ring[slot].reshape(-1), np.frombuffer(pixels, np.uint8))
+        del pixels  # unlocks the surface
+        self.pending.put((slot, self.frame))
+        elapsed = time.perf_counter() - started
+        self.capture_seconds += elapsed
+        self.worst_capture = max(self.worst_capture, elapsed)
+        return True
+
+    def _write_frames(self):
+        width, height = self.size
+        row_bytes = width * 4
+        raw = image = None
+        if self.format == "raw":
+            raw = open(os.path.join(self.directory, "capture.raw"), "wb")
+        else:
+            # Same layout as the captured surface, so a frame is one write
+            image = pygame.Surface(self.size, 0, 32, self.masks)
+        try:
+            while True:
+                item = self.pending.get()
+                if item is None:
+                    break
+                slot, frame = item
+                pixels = self.ring[slot]
+                if self.error is None:
+                    try:
+                        if raw is not None:
+                            if self.pitch != row_bytes:
+                                pixels = pixels[:, :row_bytes].tobytes()  # drop row padding
+                            raw.write(pixels)
+                        else:
+                            image.get_buffer().write(pixels.tobytes())
+                            pygame.image.save(image, os.path.join(
+                                self.directory, f"frame_{frame:06d}.png"))
+                        self.written += 1
+                    except (OSError, pygame.error) as error:
+                        self.error = error  # keep the game running; close() reports it
+                self.free.put(slot)
+        finally:
+            if raw is not None:
+                raw.close()
+
+    def close(self):
+        """Finish writing queued frames; returns a one-line report."""
+        self.pending.put(None)
+        self.writer.join()
+        with open(os.path.join(self.directory, "capture.json"), "w") as sidecar:
+            json.dump({
+                "format": self.format,
+                "width": self.size[0],
+                "height": self.size[1],
+                "pix_fmt": self.pix_fmt,
+                "frames": self.frame,
+                "written": self.written,
+                "dropped": self.dropped,
+            }, sidecar)
+        captured = self.frame - len(self.dropped)
+        average = self.capture_seconds / captured * 1000 if captured else 0.0
+        report = (f"captured {self.written}/{self.frame} frames to {self.directory}, "
+                  f"{len(self.dropped)} dropped; {average:.2f} ms per frame "
+                  f"(worst {self.worst_capture * 1000:.2f} ms)")
+        if self.error is not None:
+            report += f"; writing stopped: {self.error}"
+        return report
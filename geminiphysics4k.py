@@ -6,6 +6,11 @@
 # To run this, you need pygame: pip install pygame
 
 import pygame
+from active_set import ActiveSet
+from collision import ResponseTable, kind
+from particles import ParticleSystem
+from telemetry import BLOCK_HIT, GROUND_POUND, EventLog
+from timer_wheel import TimerWheel
 
 # --- Game Constants ---
 SCREEN_WIDTH = 800
@@ -16,11 +21,48 @@ FPS = 60
 GRAVITY = 0.35
 MAX_FALL_SPEED = 10
 GROUND_POUND_SPEED = 12
+JUMP_FORCE = 10
+JUMP_TIMER_DURATION = 20  # How long the jump button can be held for a boost
+VARIABLE_JUMP_BOOST = 0.6  # Upward boost per frame while jump is held
+MOVE_SPEED = 5
+
+class Physics:
+    """One controller's tuning constants; defaults are the module constants.
+
+    Physics(GRAVITY=0.5) overrides just gravity for the players given it.
+    """
+    GRAVITY = GRAVITY
+    MAX_FALL_SPEED = MAX_FALL_SPEED
+    GROUND_POUND_SPEED = GROUND_POUND_SPEED
+    JUMP_FORCE = JUMP_FORCE
+    JUMP_TIMER_DURATION = JUMP_TIMER_DURATION
+    VARIABLE_JUMP_BOOST = VARIABLE_JUMP_BOOST
+    MOVE_SPEED = MOVE_SPEED
+
+    def __init__(self, **overrides):
+        for name, value in overrides.items():
+            if not hasattr(Physics, name):
+                raise TypeError(f"unknown physics constant {name!r}")
+            setattr(self, name, value)
+
+# --- Collision Kinds ---
+PLAYER = kind("player")
+SOLID = kind("solid")
+BUMPABLE = kind("bumpable")  # Reacts to being hit from below
+
+# --- Telemetry ---
+# Gameplay events (see telemetry.py); only written out with --telemetry PATH
+events = EventLog()
+
+# --- Particle Colors ---
+DUST_COLORS = [(200, 200, 200), (255, 200, 80)]
 
 # --- Stub Classes and Functions for Demonstration ---
 
 class MockSprite(pygame.sprite.Sprite):
     """A base class for our visible game objects."""
+    kinds = 0  # Collision kind flags, see `responses`
+
     def __init__(self, x, y, width, height, color):
         super().__init__()
         self.image = pygame.Surface([width, height])
@@ -29,40 +71,60 @@ class MockSprite(pygame.sprite.Sprite):
 
 class Solid(MockSprite):
     """Represents a simple, non-interactive solid platform."""
+    kinds = SOLID
+
     def __init__(self, x, y, width, height):
         super().__init__(x, y, width, height, "darkgreen")
 
 class Block(MockSprite):
     """Represents an interactive block that can be hit from below."""
-    def __init__(self, x, y):
+    kinds = SOLID | BUMPABLE
+
+    def __init__(self, x, y, timers, scheduler=None):
         super().__init__(x, y, 40, 40, "brown")
         self.original_y = y
-        self.hit_timer = 0
+        self.timers = timers  # TimerWheel that ends the bounce
+        self.hit_timer = None
+        self.scheduler = scheduler  # ActiveSet that updates us while animating
 
     def hit(self, player):
         """Called when the player hits this block from below."""
-        print("Player hit a Block!")
+        events.emit(BLOCK_HIT, self.rect.x, self.rect.y)
         self.image.fill("orange") # Change color to show it was hit
-        self.hit_timer = 10 # Timer to animate a small bounce
+        if self.hit_timer:
+            self.hit_timer.cancel()
+        self.hit_timer = self.timers.schedule(10, self.settle) # Animate a small bounce
+        if self.scheduler is not None:
+            self.scheduler.add(self) # Start receiving updates
 
     def update(self):
         """Update block's state, like a small bounce animation."""
-        if self.hit_timer > 0:
+        remaining = self.timers.remaining(self.hit_timer)
+        if remaining > 0:
             # Animate a simple bounce up and down
-            if self.hit_timer > 5:
+            if remaining > 5:
                 self.rect.y -= 1
             else:
                 self.rect.y += 1
-            self.hit_timer -= 1
-        elif self.rect.y != self.original_y:
+
+    def settle(self):
+        """Called by the timer wheel when the bounce is over."""
+        self.hit_timer = None
+        if self.rect.y != self.original_y:
             self.rect.y = self.original_y # Return to original position
             self.image.fill("brown") # Reset color
+        if self.scheduler is not None:
+            self.scheduler.discard(self) # Settled, stop updating
 
 
 class Player(MockSprite):
     """The player character, containing the new movement logic."""
-    def __init__(self, x, y):
+    kinds = PLAYER
+
+    def __init__(self, x, y, particles=None, physics=None):
         super().__init__(x, y, 30, 50, "cyan")
+        self.particles = particles  # Optional ParticleSystem for effects
+        self.physics = physics or Physics()  # Tuning constants
 
         # Movement attributes
         self.velocity_y = 0
@@ -80,21 +142,23 @@ class Player(MockSprite):
         This improved version unifies collision handling, resolves collisions
         more robustly, and decouples interactions for more flexible design.
         """
+        p = self.physics
+
         # --- 1. Update Velocity ---
         # Handle ground pound state first (overrides normal gravity)
         if self.ground_pounding and not self.on_ground:
-            self.velocity_y = GROUND_POUND_SPEED
+            self.velocity_y = p.GROUND_POUND_SPEED
             self._create_ground_pound_particles()
         else:
             # Apply normal gravity
-            self.velocity_y += GRAVITY
+            self.velocity_y += p.GRAVITY
             # Cap fall speed to a maximum
-            if self.velocity_y > MAX_FALL_SPEED:
-                self.velocity_y = MAX_FALL_SPEED
+            if self.velocity_y > p.MAX_FALL_SPEED:
+                self.velocity_y = p.MAX_FALL_SPEED
 
             # Allow for variable jump height by reducing velocity while jump is held
             if self.jump_held and self.jump_timer > 0:
-                self.velocity_y -= 0.6  # This creates an upward boost
+                self.velocity_y -= p.VARIABLE_JUMP_BOOST  # This creates an upward boost
                 self.jump_timer -= 1
 
         # --- 2. Apply Vertical Movement & Check for Collisions ---
@@ -139,16 +203,19 @@ class Player(MockSprite):
                 self.velocity_y = 0  # Stop upward movement
                 self.jump_timer = 0  # Cancel variable jump boost
 
-                # NEW: Check if this platform is interactive (has a 'hit' method)
-                # This is a flexible way to handle interactions without caring about the object's class
-                if hasattr(ceiling_platform, 'hit'):
-                    ceiling_platform.hit(self)
+                # Let the platform react to being hit, if its kind does
+                # (looked up in the `responses` table, not per-object probing)
+                responses.respond(ceiling_platform, self)
 
     # --- Player action methods (for demonstration) ---
+    def move(self, direction):
+        """Simple horizontal movement: -1 left, 1 right, 0 stand still."""
+        self.rect.x += direction * self.physics.MOVE_SPEED
+
     def jump(self):
         if self.on_ground:
-            self.velocity_y = -10  # Apply initial jump speed
-            self.jump_timer = 20   # Set timer for how long the jump button can be held for a boost
+            self.velocity_y = -self.physics.JUMP_FORCE  # Apply initial jump speed
+            self.jump_timer = self.physics.JUMP_TIMER_DURATION
             self.on_ground = False
 
     def ground_pound(self):
@@ -157,33 +224,51 @@ class Player(MockSprite):
             self.velocity_y = 0 # Reset velocity before pound
 
     def _create_ground_pound_particles(self):
-        """Stub method for particle effects."""
-        # print("Creating ground pound particles...")
-        pass
+        """Trail of dust streaming up from the player while pounding."""
+        if self.particles is not None:
+            self.particles.emit(4, self.rect.centerx, self.rect.bottom, 1.5, (-3, -1), (10, 20), 0)
 
     def _create_ground_pound_impact(self):
-        """Stub method for impact effects on landing."""
-        print("GROUND POUND IMPACT!")
+        """Burst of dust and sparks where the player lands."""
+        events.emit(GROUND_POUND, self.rect.centerx, self.rect.bottom)
+        if self.particles is not None:
+            self.particles.emit(150, self.rect.centerx, self.rect.bottom, 5, (-7, -1), (20, 45), 0)
+            self.particles.emit(50, self.rect.centerx, self.rect.bottom, 3, (-9, -3), (15, 30), 1)
+
 
+# --- Collision Responses ---
+responses = ResponseTable()
+responses.on(BUMPABLE, PLAYER, Block.hit) # Hit from below
 
 # --- Main Game Setup ---
-def main():
+def main(argv=()):
     """Main game loop for demonstration."""
+    args = iter(argv)
+    for arg in args:
+        if arg == "--telemetry":
+            events.open(next(args))
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Physics Test - Use Arrows, Space to Jump, Down Arrow in air to Ground Pound")
     clock = pygame.time.Clock()
 
     # Create game objects
-    player = Player(100, 500)
+    particles = ParticleSystem(20000, DUST_COLORS)
+    player = Player(100, 500, particles)
     
     solids = pygame.sprite.Group()
     solids.add(Solid(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40)) # Floor
     solids.add(Solid(200, 450, 150, 20))
     solids.add(Solid(400, 350, 150, 20))
 
+    # Only blocks that are currently animating get updated each frame;
+    # countdowns live in the timer wheel
+    scheduler = ActiveSet()
+    timers = TimerWheel()
+
     blocks = pygame.sprite.Group()
-    blocks.add(Block(455, 250)) # An interactive block
+    blocks.add(Block(455, 250, timers, scheduler)) # An interactive block
 
     all_sprites = pygame.sprite.Group(player, solids, blocks)
 
@@ -205,21 +290,27 @@ def main():
 
         # --- Horizontal Movement (simple) ---
         keys = pygame.key.get_pressed()
-        player.rect.x += (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * 5
+        player.move(keys[pygame.K_RIGHT] - keys[pygame.K_LEFT])
 
         # --- Update ---
+        timers.advance() # Fire the timers that expire this frame
+        events.next_frame()
         player._update_vertical_movement(solids, blocks)
-        blocks.update() # Update the blocks for their animations
+        scheduler.update() # Update the blocks that are animating
+        particles.update()
 
         # --- Drawing ---
         screen.fill("black")
         all_sprites.draw(screen)
+        particles.draw(screen)
         pygame.display.flip()
 
         # --- Frame Rate ---
         clock.tick(FPS)
 
+    events.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
+    import sys
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+# level_file.py
+#
+# Text level files, and watching one for edits while the game runs.
+#
+# A level file is a picture of the level, one character per tile, in the
+# same glyphs level_gen.render_text() prints. The bottom line is the ground
+# row (row 0) and columns count from the left edge, so (col, row) mean the
+# same as in level_gen:
+#
+#   =  ground          #  brick           ?  question block (coin)
+#   |  pipe            o  coin            M  question block (mushroom)
+#   g  enemy spawn     anything else is empty
+#
+# LevelWatcher checks the file's modification time and size once per poll()
+# (one stat call) and, when they change, re-reads it and reports only the
+# tiles that differ from the previous version: (removed, added), each a dict
+# of (col, row) -> glyph. A tile that changed glyph is in both. Lines are
+# compared as whole strings first, so only lines that actually changed are
+# looked at tile by tile; a small edit to a long level costs about as much
+# as reading the file.
+#
+# Usage: python level_file.py [seed] [chunks] > level.txt
+#   writes a generated level to start editing from.
+
+import os
+import sys
+
+import level_gen
+
+TILES = {
+    "=": ("ground", None),
+    "#": ("brick", None),
+    "?": ("question", "coin"),
+    "M": ("question", "mushroom"),
+    "|": ("pipe", None),
+    "o": ("coin", None),
+    "g": ("enemy", None),
+}
+
+
+def read_lines(path):
+    """The file's lines, bottom line (row 0) first."""
+    with open(path) as level:
+        lines = level.read().splitlines()
+    while lines and not lines[-1].strip():
+        lines.pop()  # blank lines an editor left at the end aren't row 0
+    lines.reverse()
+    return lines
+
+
+def cells(lines):
+    """Every tile in `lines` as (col, row) -> glyph."""
+    found = {}
+    for row, line in enumerate(lines):
+        for col, char in enumerate(line):
+            if char in TILES:
+                found[col, row] = char
+    return found
+
+
+def diff_lines(old, new):
+    """(removed, added) tiles going from lines `old` to lines `new`."""
+    removed = {}
+    added = {}
+    for row in range(max(len(old), len(new))):
+        before = old[row] if row < len(old) else ""
+        after = new[row] if row < len(new) else ""
+        if before == after:
+            continue
+        for col in range(max(len(before), len(after))):
+            was = before[col] if col < len(before) else " "
+            now = after[col] if col < len(after) else " "
+            if was == now or TILES.get(was) == TILES.get(now):
+                continue
+            if was in TILES:
+                removed[col, row] = was
+            if now in TILES:
+                added[col, row] = now
+    return removed, added
+
+
+class LevelWatcher:
+    """A level file plus the version of it the game last saw."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = self._stamp()
+        self.lines = read_lines(path)
+
+    def _stamp(self):
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def cells(self):
+        return cells(self.lines)
+
+    def poll(self):
+        """(removed, added) if the file changed since the last poll, else None."""
+        stamp = self._stamp()
+        if stamp is None or stamp == self.stamp:
+            return None  # unchanged, or gone for a moment mid-save
+        try:
+            lines = read_lines(self.path)
+        except (OSError, UnicodeDecodeError):
+            return None  # try again next poll
+        self.stamp = stamp
+        removed, added = diff_lines(self.lines, lines)
+        self.lines = lines
+        if not removed and not added:
+            return None
+        return removed, added
+
+
+def main(argv):
+    seed = int(argv[0]) if argv else 0
+    count = int(argv[1]) if len(argv) > 1 else 8
+    level = [level_gen.generate_chunk(seed, index) for index in range(count)]
+    print("\n".join(line.rstrip() for line in level_gen.render_text(level).splitlines()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
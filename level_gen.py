@@ -0,0 +1,229 @@
+# level_gen.py
+#
+# Seeded procedural level generator with streaming output.
+#
+# chunks(seed) is an endless generator of Chunks, each a fixed number of
+# tile columns wide, holding terrain (ground columns, gaps, pipes), brick and
+# question blocks with their content, floating platforms, coins and enemy
+# spawns. Levels of any length are produced lazily, a chunk at a time.
+#
+# Every chunk gets its own random stream seeded by (seed, chunk index), and
+# chunks never put gaps or pipes on their outer two columns, so they fit
+# together whatever comes next. The same seed therefore always gives the
+# same level, and chunk N doesn't depend on how (or whether) chunks before
+# it were consumed. The first chunk leaves the start area clear.
+#
+# Positions are in tiles: `col` counts from the level's left edge, `row`
+# counts up from the ground row (row 0 is the ground tile itself, row 1 the
+# space just above it). A game maps them with x = col * tile_size and
+# y = ground_y - row * tile_size, where ground_y is the top of its ground.
+#
+# LevelStream keeps a scrolling game supplied: it builds chunks a margin
+# ahead of the camera, unloads the ones left far behind and builds those
+# again if the camera comes back.
+#
+# Usage: python level_gen.py [seed] [chunks]   prints the level as text
+
+import collections
+import random
+import sys
+import time
+
+CHUNK_WIDTH = 16
+START_CLEAR = 8  # columns at the very start of a level with nothing in them
+
+
+class Chunk:
+    """One slice of a generated level."""
+
+    def __init__(self, index, left, width):
+        self.index = index
+        self.left = left  # first column
+        self.width = width
+        self.ground = []  # columns with a ground tile
+        self.pipes = []  # (col, height in tiles)
+        self.blocks = []  # (col, row, type, content); type "brick", "question" or "ground"
+        self.coins = []  # (col, row)
+        self.enemies = []  # (col, row)
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+
+def chunks(seed, width=CHUNK_WIDTH):
+    """Endless chunks of the level for `seed`."""
+    index = 0
+    while True:
+        yield generate_chunk(seed, index, width)
+        index += 1
+
+
+def generate_chunk(seed, index, width=CHUNK_WIDTH):
+    """Chunk `index` of the level for `seed`."""
+    rng = random.Random(f"{seed}:{index}")
+    chunk = Chunk(index, index * width, width)
+    left = chunk.left
+    # Hazards get more frequent over the first dozen chunks
+    difficulty = min(1.0, index / 12)
+    ground = [True] * width
+    busy = [False] * width  # column already has a feature
+
+    col = START_CLEAR if index == 0 else 2
+    while col < width - 2:
+        feature = rng.choices(
+            ("flat", "gap", "pipe", "blocks", "platform", "enemies", "coins"),
+            (4, 1 + 2 * difficulty, 2, 3, 2, 1 + 3 * difficulty, 2))[0]
+        room = width - 2 - col
+
+        if feature == "gap" and room >= 3:
+            size = rng.randint(2, 2 + (difficulty > 0.5))
+            for i in range(size):
+                ground[col + i] = False
+                busy[col + i] = True
+            # Coins hanging over the gap, for the brave
+            if rng.random() < 0.5:
+                for i in range(size):
+                    chunk.coins.append((left + col + i, 3))
+            col += size + rng.randint(2, 3)
+
+        elif feature == "pipe" and room >= 2:
+            height = rng.choice((2, 2, 3, 3, 4) if difficulty > 0.5 else (2, 3))
+            chunk.pipes.append((left + col, height))
+            busy[col] = busy[col + 1] = True
+            col += 2 + rng.randint(2, 3)
+
+        elif feature == "blocks" and room >= 3:
+            size = rng.randint(3, min(5, room))
+            question = rng.randrange(size)
+            for i in range(size):
+                if i == question:
+                    content = "mushroom" if rng.random() < 0.2 else "coin"
+                    chunk.blocks.append((left + col + i, 2, "question", content))
+                else:
+                    chunk.blocks.append((left + col + i, 2, "brick", "none"))
+            if rng.random() < 0.4:
+                chunk.blocks.append((left + col + question, 5, "question", "coin"))
+            col += size + rng.randint(1, 2)
+
+        elif feature == "platform" and room >= 3:
+            size = rng.randint(3, min(5, room))
+            for i in range(size):
+                chunk.blocks.append((left + col + i, 3, "ground", "none"))
+                if rng.random() < 0.5:
+                    chunk.coins.append((left + col + i, 4))
+            col += size + rng.randint(1, 2)
+
+        elif feature == "enemies" and room >= 2:
+            count = 1 + (rng.random() < difficulty)
+            for i in range(min(count, room // 2)):
+                chunk.enemies.append((left + col + i * 2, 1))
+            col += 2 * count + rng.randint(1, 2)
+
+        elif feature == "coins" and room >= 3:
+            size = rng.randint(3, min(5, room))
+            row = rng.choice((1, 3))
+            for i in range(size):
+                chunk.coins.append((left + col + i, row))
+            col += size + 1
+
+        else:
+            col += rng.randint(2, 3)
+
+    chunk.ground = [left + i for i in range(width) if ground[i]]
+    # Enemies only start on solid ground, clear of pipes
+    solid = set(chunk.ground)
+    pipe_cols = {col + i for col, _ in chunk.pipes for i in (0, 1)}
+    chunk.enemies = [(col, row) for col, row in chunk.enemies
+                     if col in solid and col not in pipe_cols]
+    return chunk
+
+
+class LevelStream:
+    """Feeds chunks to a scrolling game as the camera moves.
+
+    build(chunk) adds a chunk's sprites to the level and returns whatever
+    unload() needs to take them out again; unload isn't called for chunks
+    that are still within `behind` pixels of the camera's left edge. When
+    the camera scrolls back, unloaded chunks are built again from
+    chunk_at(index) (e.g. generate_chunk for the same seed), so without
+    chunk_at nothing is unloaded.
+    """
+
+    def __init__(self, chunks, tile_size, build, unload=None, ahead=0, behind=None,
+                 chunk_at=None):
+        self.chunks = chunks
+        self.tile_size = tile_size
+        self.build = build
+        self.unload = unload
+        self.ahead = ahead
+        self.behind = behind
+        self.chunk_at = chunk_at
+        self.loaded = collections.deque()  # (chunk, whatever build returned)
+        self.right = 0  # pixel edge of everything built so far
+
+    def update(self, camera_x, view_width):
+        """Build up to `ahead` pixels past the view on either side, unload
+        far behind it."""
+        tile = self.tile_size
+        edge = camera_x + view_width + self.ahead
+        while self.right < edge:
+            chunk = next(self.chunks)
+            self.loaded.append((chunk, self.build(chunk)))
+            self.right = chunk.right * tile
+        if self.unload is None or self.behind is None or self.chunk_at is None:
+            return
+        # Rebuild on the left no further out than chunks are kept, or a
+        # rebuilt chunk could be unloaded again straight away
+        left_edge = camera_x - min(self.ahead, self.behind)
+        while self.loaded[0][0].index > 0 and self.loaded[0][0].left * tile > left_edge:
+            chunk = self.chunk_at(self.loaded[0][0].index - 1)
+            self.loaded.appendleft((chunk, self.build(chunk)))
+        while len(self.loaded) > 1 and self.loaded[0][0].right * tile < camera_x - self.behind:
+            self.unload(self.loaded.popleft()[1])
+
+
+def render_text(level_chunks, rows=7):
+    """Text picture of some chunks, for eyeballing a seed."""
+    width = sum(chunk.width for chunk in level_chunks)
+    left = level_chunks[0].left
+    grid = [[" "] * width for _ in range(rows)]
+
+    def put(col, row, char):
+        if 0 <= row < rows:
+            grid[rows - 1 - row][col - left] = char
+
+    for chunk in level_chunks:
+        for col in chunk.ground:
+            put(col, 0, "=")
+        for col, height in chunk.pipes:
+            for row in range(height):
+                put(col, row, "|")
+                put(col + 1, row, "|")
+        for col, row, block_type, content in chunk.blocks:
+            if block_type == "question" and content == "mushroom":
+                put(col, row, "M")
+            else:
+                put(col, row, {"brick": "#", "question": "?", "ground": "="}[block_type])
+        for col, row in chunk.coins:
+            put(col, row, "o")
+        for col, row in chunk.enemies:
+            put(col, row, "g")
+    return "\n".join("".join(line) for line in grid)
+
+
+def main(argv):
+    seed = int(argv[0]) if argv else 0
+    count = int(argv[1]) if len(argv) > 1 else 4
+    started = time.perf_counter()
+    level = [generate_chunk(seed, index) for index in range(count)]
+    elapsed = time.perf_counter() - started
+    for start in range(0, count, 4):
+        print(render_text(level[start:start + 4]))
+        print()
+    print(f"{count} chunks in {elapsed * 1000:.2f} ms ({elapsed / count * 1e6:.0f} us per chunk)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
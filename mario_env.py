@@ -0,0 +1,310 @@
+# mario_env.py
+#
+# Gym-style environments over marioforeverreboot20XX.py, for training agents
+# without driving main() through synthetic key events.
+#
+#   env = MarioEnv()
+#   obs = env.reset(seed=0)
+#   obs, reward, done, info = env.step(RIGHT_JUMP)
+#
+# Nothing is drawn and no sound is played: a step runs the same per-frame
+# update as the game loop (update_level()) and builds a symbolic tile-grid
+# observation straight from the level (see tile_observation.py). The reward is the change in score (scaled) plus
+# the change in coins since the last step.
+#
+# The game keeps its world in module-level singletons (timers, broadphase,
+# pools, ...), so every MarioEnv loads its own private copy of the game
+# module. VectorEnv steps K of them per call in one process; SubprocVectorEnv
+# spreads them over worker processes. Both write observations, rewards and
+# done flags into preallocated arrays (shared memory for the worker version),
+# so nothing but the small info dicts is pickled per step. Finished episodes
+# are reset automatically; the last observation of the old episode is kept
+# in info["terminal_observation"].
+#
+# gym/gymnasium are not needed; the API just follows the classic Gym shape.
+
+import importlib.util
+import itertools
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import tile_observation
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marioforeverreboot20XX.py")
+
+# Actions: (left, right, jump)
+NOOP, LEFT, RIGHT, JUMP, LEFT_JUMP, RIGHT_JUMP = range(6)
+ACTIONS = (
+    (False, False, False),
+    (True, False, False),
+    (False, True, False),
+    (False, False, True),
+    (True, False, True),
+    (False, True, True),
+)
+
+# Observation: tile grids around the player plus player features, flattened
+OBS_ROWS = 15
+OBS_COLS = 17
+OBS_SIZE = tile_observation.observation_size(OBS_ROWS, OBS_COLS)
+
+_copies = itertools.count()
+
+
+def load_game():
+    """A private copy of the game module, with its own world state."""
+    spec = importlib.util.spec_from_file_location(f"_mario_env_game_{next(_copies)}", GAME_PATH)
+    game = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(game)
+    game.preallocate_pools()
+    return game
+
+
+class MarioEnv:
+    """One game, stepped a frame (or `frame_skip` frames) per action."""
+
+    action_count = len(ACTIONS)
+    observation_shape = (OBS_SIZE,)
+
+    def __init__(self, frame_skip=1, max_steps=None, score_weight=0.01, coin_weight=1.0, obs=None):
+        self.game = load_game()
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.score_weight = score_weight
+        self.coin_weight = coin_weight
+        self.view = tile_observation.TileObservation(self.game.TILE_SIZE, OBS_ROWS, OBS_COLS, obs)
+        self.obs = self.view.out
+        self.player = None
+        self.level = None
+        self.seed = None
+        self.steps = 0
+
+    def reset(self, seed=None):
+        """Start a new episode; returns the first observation.
+
+        `seed` picks a generated level (see level_gen.py); None plays the
+        game's original screen. Either way the same seed and actions always
+        replay the same episode.
+        """
+        game = self.game
+        if self.level is not None:
+            game.release_level(*self.level)
+        game.timers.reset()
+        game.contacts.clear()
+        self.player = game.Player(100, game.SCREEN_HEIGHT - game.TILE_SIZE * 2)
+        game.contacts.add(self.player, game.PLAYER)
+        self.seed = seed
+        self.level = game.create_level(seed)
+        self.steps = 0
+        self.observe()
+        return self.obs
+
+    def step(self, action):
+        """Apply `action` (see ACTIONS); returns (obs, reward, done, info)."""
+        game = self.game
+        player = self.player
+        platforms, pipes, blocks = self.level[:3]
+        left, right, jump = ACTIONS[action]
+        score = player.score
+        coins = player.coins
+        done = level_complete = False
+
+        for _ in range(self.frame_skip):
+            if jump:
+                player.jump()
+            if left:
+                player.move_left()
+            if right:
+                player.move_right()
+            if not left and not right:
+                player.stop()
+
+            player_died = game.update_level(player, platforms, pipes, blocks)
+
+            # The player can't leave the screen, so the goal is reaching its
+            # right edge: the goal column reachability.py solves for
+            if player.rect.right >= game.SCREEN_WIDTH:
+                player.score += 5000
+                done = level_complete = True
+                break
+            if player_died:
+                if player.die():
+                    done = True
+                    break
+                game.release_level(*self.level)
+                self.level = game.create_level(self.seed)
+                platforms, pipes, blocks = self.level[:3]
+
+        self.steps += 1
+        truncated = not done and self.max_steps is not None and self.steps >= self.max_steps
+        reward = (player.score - score) * self.score_weight + (player.coins - coins) * self.coin_weight
+        self.observe()
+        info = {
+            "score": player.score,
+            "coins": player.coins,
+            "lives": player.lives,
+            "tick": game.timers.tick,
+            "level_complete": level_complete,
+            "truncated": truncated,
+            "seed": self.seed,
+        }
+        return self.obs, reward, done or truncated, info
+
+    def observe(self):
+        """Write the current observation into self.obs."""
+        game = self.game
+        platforms, pipes, blocks, enemies, coins = self.level
+        # Blocks changing invalidate ground_contacts, so its version tells
+        # the view when to redraw the terrain
+        return self.view.build(
+            self.player, game.ground_contacts.version, platforms, pipes, blocks, coins, enemies,
+            game.timers.remaining(self.player.invincible) / 120)
+
+
+class VectorEnv:
+    """K MarioEnvs stepped together in this process.
+
+    Observations, rewards and done flags live in arrays of K rows, which
+    step() overwrites in place (pass your own to have them written there).
+    """
+
+    def __init__(self, num_envs, obs=None, rewards=None, dones=None, **env_kwargs):
+        self.num_envs = num_envs
+        self.obs = np.zeros((num_envs, OBS_SIZE), np.float32) if obs is None else obs
+        self.rewards = np.zeros(num_envs, np.float32) if rewards is None else rewards
+        self.dones = np.zeros(num_envs, np.bool_) if dones is None else dones
+        self.envs = [MarioEnv(obs=self.obs[i], **env_kwargs) for i in range(num_envs)]
+
+    def reset(self, seed=None):
+        """Reset every env (env i gets seed + i); returns the observations."""
+        for i, env in enumerate(self.envs):
+            env.reset(None if seed is None else seed + i)
+        return self.obs
+
+    def step(self, actions):
+        """Step env i with actions[i]; returns (obs, rewards, dones, infos)."""
+        infos = []
+        for i, env in enumerate(self.envs):
+            _, reward, done, info = env.step(actions[i])
+            if done:
+                info["terminal_observation"] = env.obs.copy()
+                env.reset(env.seed)
+            self.rewards[i] = reward
+            self.dones[i] = done
+            infos.append(info)
+        return self.obs, self.rewards, self.dones, infos
+
+    def close(self):
+        pass
+
+
+def _layout(num_envs):
+    # obs, actions, rewards, dones, back to back in one shared block
+    return (((num_envs, OBS_SIZE), np.float32), ((num_envs,), np.int64),
+            ((num_envs,), np.float32), ((num_envs,), np.bool_))
+
+
+def _shared_size(num_envs):
+    return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in _layout(num_envs))
+
+
+def _shared_arrays(buffer, num_envs):
+    arrays = []
+    offset = 0
+    for shape, dtype in _layout(num_envs):
+        array = np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+        offset += array.nbytes
+        arrays.append(array)
+    return arrays
+
+
+def _worker(conn, shm_name, num_envs, start, stop, env_kwargs):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        obs, actions, rewards, dones = _shared_arrays(shm.buf, num_envs)
+        envs = VectorEnv(stop - start, obs[start:stop], rewards[start:stop], dones[start:stop],
+                         **env_kwargs)
+        actions = actions[start:stop]
+        while True:
+            command, arg = conn.recv()
+            if command == "step":
+                conn.send(envs.step(actions)[3])
+            elif command == "reset":
+                envs.reset(arg)
+                conn.send(None)
+            elif command == "close":
+                break
+        del obs, actions, rewards, dones, envs
+    finally:
+        shm.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    """K MarioEnvs spread over worker processes, same interface as VectorEnv.
+
+    Actions, observations, rewards and done flags are exchanged through one
+    shared memory block; the pipes only carry commands and info dicts.
+    """
+
+    def __init__(self, num_envs, num_workers=None, start_method=None, **env_kwargs):
+        num_workers = min(num_envs, num_workers or os.cpu_count() or 1)
+        self.num_envs = num_envs
+        self.shm = shared_memory.SharedMemory(create=True, size=_shared_size(num_envs))
+        self.obs, self.actions, self.rewards, self.dones = _shared_arrays(self.shm.buf, num_envs)
+
+        context = multiprocessing.get_context(start_method)
+        bounds = [num_envs * i // num_workers for i in range(num_workers + 1)]
+        self.starts = bounds[:-1]
+        self.conns = []
+        self.workers = []
+        for start, stop in zip(bounds, bounds[1:]):
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_worker, args=(child, self.shm.name, num_envs, start, stop, env_kwargs),
+                daemon=True)
+            worker.start()
+            child.close()
+            self.conns.append(parent)
+            self.workers.append(worker)
+
+    def reset(self, seed=None):
+        """Reset every env (env i gets seed + i); returns the observations."""
+        for start, conn in zip(self.starts, self.conns):
+            conn.send(("reset", None if seed is None else seed + start))
+        for conn in self.conns:
+            conn.recv()
+        return self.obs
+
+    def step(self, actions):
+        """Step env i with actions[i]; returns (obs, rewards, dones, infos)."""
+        self.actions[:] = actions
+        for conn in self.conns:
+            conn.send(("step", None))
+        infos = []
+        for conn in self.conns:
+            infos.extend(conn.recv())
+        return self.obs, self.rewards, self.dones, infos
+
+    def close(self):
+        if self.shm is None:
+            return
+        for conn in self.conns:
+            conn.send(("close", None))
+        for worker in self.workers:
+            worker.join()
+        for conn in self.conns:
+            conn.close()
+        del self.obs, self.actions, self.rewards, self.dones
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __del__(self):
+        if getattr(self, "shm", None) is not None:
+            self.close()
@@ -3,10 +3,22 @@ import sys
 import random
 import os
 from pygame.locals import *
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+import activation
+import active_set
+import animation
+import asset_bundle
+import bitmap_text
+import broadphase
+import collision
+import contact_cache
+import frame_capture
+import level_gen
+import netplay
+import particles
+import pools
+import sound
+import telemetry
+import timer_wheel
 
 # Constants
 SCREEN_WIDTH = 800
@@ -28,27 +40,59 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 
-# Create the window
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Mario Forever: Community Edition - Python Version")
+# The window is opened by init_display(); fonts and the mixer are started
+# by the code that first needs them
+screen = None
 clock = pygame.time.Clock()
 
-# Font
-font = pygame.font.Font(None, 36)
-small_font = pygame.font.Font(None, 24)
+def init_display():
+    global screen
+    if screen is None:
+        pygame.display.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Mario Forever: Community Edition - Python Version")
+    return screen
+
+# Sound effects, decoded when play starts (which also starts the mixer)
+sounds = sound.SoundBank()
+
+# Countdowns (invincibility, stomped enemies); advanced once per frame
+timers = timer_wheel.TimerWheel()
+
+# Gameplay events (see telemetry.py); only written out with --telemetry PATH
+events = telemetry.EventLog()
+
+# Animation clips, shared by every entity and looked up by the frame counter
+clips = animation.ClipLibrary()
+
+# Player poses (index into Player.clip_table)
+POSE_STAND = 0
+POSE_WALK = 1
+POSE_JUMP = 2
+
+# Collision kinds (see collision.py); each class declares its own
+PLAYER = collision.kind("player")
+ENEMY = collision.kind("enemy")
+ITEM = collision.kind("item")
+BRICK = collision.kind("brick")
+QUESTION = collision.kind("question")
+GROUND = collision.kind("ground")
+HOLDS_COIN = collision.kind("holds_coin")
+HOLDS_MUSHROOM = collision.kind("holds_mushroom")
+BLOCK_KINDS = {"brick": BRICK, "question": QUESTION, "ground": GROUND}
+CONTENT_KINDS = {"none": 0, "coin": HOLDS_COIN, "mushroom": HOLDS_MUSHROOM}
 
 # Player class
 class Player(pygame.sprite.Sprite):
+    kinds = PLAYER
+    images = None
+    clip_table = None  # [flashing][facing][pose] -> clip id
+    net_lerp = (0, 1)  # net_state fields the netplay client interpolates
+
     def __init__(self, x, y):
         super().__init__()
-        self.images = {
-            "stand_right": self.create_player_surface(True),
-            "stand_left": self.create_player_surface(False),
-            "walk_right": [self.create_player_surface(True, frame) for frame in range(1, 4)],
-            "walk_left": [self.create_player_surface(False, frame) for frame in range(1, 4)],
-            "jump_right": self.create_player_surface(True, jump=True),
-            "jump_left": self.create_player_surface(False, jump=True)
-        }
+        if Player.clip_table is None:
+            Player.load_clips()
         
         self.image = self.images["stand_right"]
         self.rect = self.image.get_rect()
@@ -57,16 +101,54 @@ class Player(pygame.sprite.Sprite):
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
-        self.direction = "right"
-        self.walk_frame = 0
-        self.walk_timer = 0
+        self.facing = 1  # 1=right, 0=left
+        self.clip = self.clip_table[0][1][POSE_STAND]
+        self.clip_start = 0
         self.lives = 3
         self.score = 0
         self.coins = 0
-        self.invincible = 0
+        self.invincible = None  # Timer while invincible
         self.power_up = 0  # 0=small, 1=big, 2=fire
         
-    def create_player_surface(self, facing_right=True, frame=0, jump=False):
+    @classmethod
+    def load_clips(cls):
+        # Render the player frames once and define a clip per pose/facing.
+        # Flashing (invincible) clips use half-transparent copies so the
+        # shared frames are never mutated with set_alpha.
+        cls.images = {
+            "stand_right": assets.get("player_stand_right"),
+            "stand_left": assets.get("player_stand_left"),
+            "walk_right": [assets.get(f"player_walk_right_{frame}") for frame in range(1, 4)],
+            "walk_left": [assets.get(f"player_walk_left_{frame}") for frame in range(1, 4)],
+            "jump_right": assets.get("player_jump_right"),
+            "jump_left": assets.get("player_jump_left")
+        }
+        
+        def faded(surface):
+            surface = surface.copy()
+            surface.set_alpha(128)
+            return surface
+        
+        table = []
+        for flashing in (False, True):
+            by_facing = []
+            for side in ("left", "right"):
+                stand = cls.images["stand_" + side]
+                walk = cls.images["walk_" + side]
+                jump = cls.images["jump_" + side]
+                if flashing:
+                    stand, walk, jump = faded(stand), [faded(f) for f in walk], faded(jump)
+                prefix = "player_flash_" if flashing else "player_"
+                by_facing.append((
+                    clips.define(prefix + "stand_" + side, [stand]),
+                    clips.define(prefix + "walk_" + side, walk, [6, 6, 6]),
+                    clips.define(prefix + "jump_" + side, [jump]),
+                ))
+            table.append(by_facing)
+        cls.clip_table = table
+        
+    @staticmethod
+    def create_player_surface(facing_right=True, frame=0, jump=False):
         surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
         
         # Body color
@@ -131,7 +213,9 @@ class Player(pygame.sprite.Sprite):
             
         return surface
         
-    def update(self, platforms, enemies, blocks, pipes, coins):
+    def update(self, platforms, blocks, pipes, tick):
+        grounded = self.on_ground and self.velocity_y == 0
+        
         # Apply gravity
         self.velocity_y += GRAVITY
         self.rect.y += self.velocity_y
@@ -145,166 +229,254 @@ class Player(pygame.sprite.Sprite):
         if self.rect.right > SCREEN_WIDTH:
             self.rect.right = SCREEN_WIDTH
         
-        # Reset ground status
-        self.on_ground = False
-        
-        # Check collisions with platforms
-        for platform in platforms:
-            if self.rect.colliderect(platform.rect):
-                if self.velocity_y > 0:  # Falling
-                    self.rect.bottom = platform.rect.top
-                    self.on_ground = True
-                    self.velocity_y = 0
-                elif self.velocity_y < 0:  # Jumping
-                    self.rect.top = platform.rect.bottom
-                    self.velocity_y = 0
-        
-        # Check collisions with pipes
-        for pipe in pipes:
-            if self.rect.colliderect(pipe.rect):
-                if self.velocity_y > 0:  # Falling
-                    self.rect.bottom = pipe.rect.top
-                    self.on_ground = True
-                    self.velocity_y = 0
-                elif self.velocity_y < 0:  # Jumping
-                    self.rect.top = pipe.rect.bottom
-                    self.velocity_y = 0
-        # Check collisions with blocks
+        # Standing on the same flat ground as last frame, gravity only
+        # pushed us into it: snap back without scanning every solid
         block_hit = None
-        for block in blocks:
-            if self.rect.colliderect(block.rect):
-                if self.velocity_y < 0:  # Hitting from below
-                    self.rect.top = block.rect.bottom
-                    self.velocity_y = 0
-                    block_hit = block
-                elif self.velocity_y > 0:  # Landing on top
-                    self.rect.bottom = block.rect.top
-                    self.on_ground = True
-                    self.velocity_y = 0
+        floor = ground_contacts.resting_on(self) if grounded else None
+        if floor is not None:
+            self.rect.bottom = floor
+            self.velocity_y = 0
+        else:
+            # Reset ground status
+            self.on_ground = False
+            
+            # Check collisions with platforms
+            for platform in platforms:
+                if self.rect.colliderect(platform.rect):
+                    if self.velocity_y > 0:  # Falling
+                        self.rect.bottom = platform.rect.top
+                        self.on_ground = True
+                        self.velocity_y = 0
+                    elif self.velocity_y < 0:  # Jumping
+                        self.rect.top = platform.rect.bottom
+                        self.velocity_y = 0
+            
+            # Check collisions with pipes
+            for pipe in pipes:
+                if self.rect.colliderect(pipe.rect):
+                    if self.velocity_y > 0:  # Falling
+                        self.rect.bottom = pipe.rect.top
+                        self.on_ground = True
+                        self.velocity_y = 0
+                    elif self.velocity_y < 0:  # Jumping
+                        self.rect.top = pipe.rect.bottom
+                        self.velocity_y = 0
+            # Check collisions with blocks
+            for block in blocks:
+                if self.rect.colliderect(block.rect):
+                    if self.velocity_y < 0:  # Hitting from below
+                        self.rect.top = block.rect.bottom
+                        self.velocity_y = 0
+                        block_hit = block
+                    elif self.velocity_y > 0:  # Landing on top
+                        self.rect.bottom = block.rect.top
+                        self.on_ground = True
+                        self.velocity_y = 0
+            
+            if self.on_ground:
+                ground_contacts.settle(self, round(GRAVITY), platforms, pipes, blocks)
+            else:
+                ground_contacts.forget(self)
         
         # Handle block hit
         if block_hit:
-            if block_hit.type == "brick" and self.power_up > 0:
-                block_hit.break_block()
-                self.score += 50
-            elif block_hit.type == "question":
-                block_hit.hit_block()
-                if block_hit.content == "coin":
-                    self.coins += 1
-                    self.score += 200
-                elif block_hit.content == "mushroom":
-                    if self.power_up == 0:
-                        self.power_up = 1
-                    self.score += 1000
-        
-        # Check collisions with coins
-        for coin in coins:
-            if self.rect.colliderect(coin.rect):
-                coin.collect()
-                self.coins += 1
-                self.score += 200
+            responses.respond(self, block_hit)
         
-        # Check collisions with enemies
-        for enemy in enemies:
-            if self.rect.colliderect(enemy.rect):
-                if self.velocity_y > 0 and self.rect.bottom < enemy.rect.centery:  # Jumping on enemy
-                    enemy.stomp()
-                    self.velocity_y = -JUMP_STRENGTH / 1.5
-                    self.score += 100
-                else:  # Hit by enemy
-                    if self.invincible <= 0:
-                        if self.power_up > 0:
-                            self.power_up -= 1
-                            self.invincible = 60  # 1 second invincibility
-                        else:
-                            self.die()
+        # Coins and enemies touching the player come from the broadphase
+        contacts.update()
         
-        # Update animation
-        self.walk_timer += 1
-        if self.walk_timer > 5:
-            self.walk_timer = 0
-            self.walk_frame = (self.walk_frame + 1) % 3
+        # Check collisions with coins (pairs include other players' contacts)
+        for player, coin in contacts.pairs(PLAYER, ITEM):
+            if player is self:
+                responses.respond(self, coin)
         
-        # Update sprite based on state
-        if not self.on_ground:
-            if self.direction == "right":
-                self.image = self.images["jump_right"]
-            else:
-                self.image = self.images["jump_left"]
-        else:
-            if self.velocity_x == 0:
-                if self.direction == "right":
-                    self.image = self.images["stand_right"]
-                else:
-                    self.image = self.images["stand_left"]
-            else:
-                if self.direction == "right":
-                    self.image = self.images["walk_right"][self.walk_frame]
-                else:
-                    self.image = self.images["walk_left"][self.walk_frame]
+        # Check collisions with enemies
+        for player, enemy in contacts.pairs(PLAYER, ENEMY):
+            if player is self:
+                responses.respond(self, enemy)
         
-        # Update invincibility timer
-        if self.invincible > 0:
-            self.invincible -= 1
-            if self.invincible % 4 < 2:  # Flash effect
-                self.image.set_alpha(128)
-            else:
-                self.image.set_alpha(255)
-        else:
-            self.image.set_alpha(255)
+        # Update animation
+        flashing, facing, pose = self.animation_state()
+        animation.play(self, self.clip_table[flashing][facing][pose], tick)
+        self.image = clips.frame(self.clip, self.clip_start, tick)
         
         # Game over if player falls off the bottom
         if self.rect.top > SCREEN_HEIGHT:
             return True  # Player died
         return False
     
+    def animation_state(self):
+        # Flash while invincible
+        flashing = False
+        if self.invincible:
+            flashing = (timers.remaining(self.invincible) - 1) % 4 < 2
+        
+        if not self.on_ground:
+            pose = POSE_JUMP
+        elif self.velocity_x == 0:
+            pose = POSE_STAND
+        else:
+            pose = POSE_WALK
+        return flashing, self.facing, pose
+    
+    def net_state(self):
+        flashing, facing, pose = self.animation_state()
+        return (self.rect.x, self.rect.y, facing | pose << 1 | flashing << 3,
+                self.score, self.coins, self.lives, self.power_up)
+    
+    def apply_net_state(self, state, tick):
+        x, y, flags, self.score, self.coins, self.lives, self.power_up = state
+        self.rect.topleft = (x, y)
+        animation.play(self, self.clip_table[flags >> 3][flags & 1][flags >> 1 & 3], tick)
+        self.image = clips.frame(self.clip, self.clip_start, tick)
+    
+    def hit_brick(self, block):
+        events.emit(telemetry.BLOCK_HIT, block.rect.x, block.rect.y)
+        if self.power_up > 0:
+            block.break_block()
+            sounds.play("break")
+            spawn_popup(block.rect, 50)
+            self.score += 50
+        else:
+            block.bump()
+            sounds.play("bump")
+            
+    def hit_question(self, block):
+        events.emit(telemetry.BLOCK_HIT, block.rect.x, block.rect.y)
+        block.hit_block()
+        sounds.play("bump")
+        if block.kinds & HOLDS_COIN:
+            events.emit(telemetry.COIN, block.rect.x, block.rect.y, 1)
+            sounds.play("coin")
+            spawn_popup(block.rect, 200)
+            self.coins += 1
+            self.score += 200
+        elif block.kinds & HOLDS_MUSHROOM:
+            sounds.play("powerup")
+            if self.power_up == 0:
+                self.power_up = 1
+            self.score += 1000
+            
+    def collect_coin(self, coin):
+        events.emit(telemetry.COIN, coin.rect.x, coin.rect.y, 1)
+        coin.collect()
+        sounds.play("coin")
+        self.coins += 1
+        self.score += 200
+        
+    def touch_enemy(self, enemy):
+        if self.velocity_y > 0 and self.rect.bottom < enemy.rect.centery:  # Jumping on enemy
+            events.emit(telemetry.STOMP, enemy.rect.x, enemy.rect.y, 100)
+            enemy.stomp()
+            sounds.play("stomp")
+            spawn_popup(enemy.rect, 100)
+            self.velocity_y = -JUMP_STRENGTH / 1.5
+            self.score += 100
+        else:  # Hit by enemy
+            if not self.invincible:
+                if self.power_up > 0:
+                    self.power_up -= 1
+                    self.make_invincible(60)  # 1 second invincibility
+                else:
+                    self.die()
+    
     def die(self):
+        sounds.play("die")
         self.lives -= 1
+        events.emit(telemetry.DEATH, self.rect.x, self.rect.y, self.lives)
         self.rect.x = 100
         self.rect.y = 300
         self.velocity_x = 0
         self.velocity_y = 0
         self.power_up = 0
-        self.invincible = 120  # 2 seconds of invincibility after death
+        self.make_invincible(120)  # 2 seconds of invincibility after death
         
         # Return True if game over
         return self.lives <= 0
         
+    def make_invincible(self, ticks):
+        if self.invincible:
+            self.invincible.cancel()
+        self.invincible = timers.schedule(ticks, self.end_invincible)
+        
+    def end_invincible(self):
+        self.invincible = None
+        
     def move_left(self):
         self.velocity_x = -PLAYER_SPEED
-        self.direction = "left"
+        self.facing = 0
     
     def move_right(self):
         self.velocity_x = PLAYER_SPEED
-        self.direction = "right"
+        self.facing = 1
     
     def stop(self):
         self.velocity_x = 0
     
     def jump(self):
         if self.on_ground:
+            sounds.play("jump")
             self.velocity_y = -JUMP_STRENGTH
 
 # Block class
+@pools.pooled
 class Block(pygame.sprite.Sprite):
-    def __init__(self, x, y, block_type="brick", content="none"):
+    net_lerp = (1,)
+    
+    def __init__(self, x=0, y=0, block_type="brick", content="none"):
         super().__init__()
+        self.reset(x, y, block_type, content)
+        
+    def reset(self, x, y, block_type="brick", content="none"):
         self.type = block_type
         self.content = content
+        self.kinds = BLOCK_KINDS[block_type] | CONTENT_KINDS[content]
         self.hit_count = 0
+        self.bump_timer = 0
         
-        if block_type == "brick":
-            self.image = self.create_brick()
-        elif block_type == "question":
-            self.image = self.create_question_block()
-        elif block_type == "ground":
-            self.image = self.create_ground_block()
+        self.image = assets.get(block_type)
             
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        self.draw_rect = self.rect.copy()  # where it's drawn; moves while bumped
+        ground_contacts.invalidate()
+        
+    def on_release(self):
+        active.discard(self)
+        ground_contacts.invalidate()
+        
+    def bump(self):
+        # Pop up and back down; only updated (via `active`) while moving.
+        # Only the drawn position moves: the rect the player collides with
+        # stays put, so a bump can't push the block into the player.
+        if self.bump_timer > 0:
+            return
+        self.bump_timer = 8
+        active.add(self)
+        
+    def update(self):
+        if self.bump_timer > 0:
+            self.draw_rect.y = self.rect.y - (4 - abs(self.bump_timer - 4)) * 2
+            self.bump_timer -= 1
+        else:
+            self.draw_rect.y = self.rect.y
+            active.discard(self)
+            
+    def net_state(self):
+        return (self.alive(), self.draw_rect.y, self.hit_count)
+    
+    def apply_net_state(self, state, tick):
+        alive, self.draw_rect.y, hit_count = state
+        if not alive:
+            if self.alive():
+                self.pool.release(self)
+        elif hit_count and not self.hit_count:
+            self.hit_count = hit_count
+            self.image = assets.get("question_empty")
         
-    def create_brick(self):
+    @staticmethod
+    def create_brick():
         surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
         surface.fill(BRICK_RED)
         
@@ -320,7 +492,8 @@ class Block(pygame.sprite.Sprite):
         
         return surface
     
-    def create_question_block(self):
+    @staticmethod
+    def create_question_block():
         surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
         surface.fill(BLOCK_YELLOW)
         
@@ -335,7 +508,8 @@ class Block(pygame.sprite.Sprite):
         
         return surface
     
-    def create_ground_block(self):
+    @staticmethod
+    def create_ground_block():
         surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
         surface.fill(GROUND_BROWN)
         
@@ -352,83 +526,200 @@ class Block(pygame.sprite.Sprite):
         return surface
     
     def hit_block(self):
-        if self.type == "question" and self.hit_count == 0:
+        if self.kinds & QUESTION and self.hit_count == 0:
             self.hit_count += 1
             # Change to hit question block
-            self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
-            self.image.fill((180, 140, 0))
-            pygame.draw.rect(self.image, (160, 120, 0), (0, 0, TILE_SIZE, TILE_SIZE), 2)
+            self.image = assets.get("question_empty")
+            self.bump()
             return True
         return False
     
+    @staticmethod
+    def create_empty_block():
+        surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        surface.fill((180, 140, 0))
+        pygame.draw.rect(surface, (160, 120, 0), (0, 0, TILE_SIZE, TILE_SIZE), 2)
+        return surface
+    
     def break_block(self):
-        if self.type == "brick":
-            self.kill()
+        if self.kinds & BRICK:
+            # Four brick pieces fly out of the block's corners
+            for dx, dy, vx, vy in ((0, 0, -2, -8), (1, 0, 2, -8), (0, 1, -2, -5), (1, 1, 2, -5)):
+                effects.add(Debris.pool.acquire(
+                    self.rect.x + dx * TILE_SIZE // 2, self.rect.y + dy * TILE_SIZE // 2, vx, vy))
+            dust.emit(40, self.rect.centerx, self.rect.centery, 3, (-6, -1), (20, 40), 0)
+            dust.emit(20, self.rect.centerx, self.rect.centery, 2, (-8, -3), (20, 40), 1)
+            self.pool.release(self)
             return True
         return False
 
+# Brick debris
+@pools.pooled
+class Debris(pygame.sprite.Sprite):
+    def __init__(self, x=0, y=0, velocity_x=0, velocity_y=0):
+        super().__init__()
+        self.image = assets.get("debris")
+        self.rect = self.image.get_rect()
+        self.reset(x, y, velocity_x, velocity_y)
+        
+    def reset(self, x, y, velocity_x, velocity_y):
+        self.rect.x = x
+        self.rect.y = y
+        self.velocity_x = velocity_x
+        self.velocity_y = velocity_y
+        
+    @staticmethod
+    def create_debris_surface():
+        surface = pygame.Surface((TILE_SIZE // 2, TILE_SIZE // 2))
+        surface.fill(BRICK_RED)
+        pygame.draw.rect(surface, (160, 60, 0), (0, 0, TILE_SIZE // 2, TILE_SIZE // 2), 2)
+        return surface
+        
+    def update(self):
+        self.velocity_y += GRAVITY
+        self.rect.x += self.velocity_x
+        self.rect.y += self.velocity_y
+        if self.rect.top > SCREEN_HEIGHT:
+            self.pool.release(self)
+
+# Floating "+100" style score popup
+@pools.pooled
+class ScorePopup(pygame.sprite.Sprite):
+    LIFETIME = 30
+    
+    def __init__(self, x=0, y=0, points=0):
+        super().__init__()
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, points)
+        
+    def reset(self, x, y, points):
+        # Composed lines are cached by the atlas, so this doesn't render anything new
+        self.image = bitmap_text.get_atlas(24, WHITE).compose(f"+{points}")
+        self.rect.size = self.image.get_size()
+        self.rect.midbottom = (x, y)
+        self.age = 0
+        
+    def update(self):
+        self.age += 1
+        self.rect.y -= 1
+        if self.age >= self.LIFETIME:
+            self.pool.release(self)
+
+def spawn_popup(rect, points):
+    effects.add(ScorePopup.pool.acquire(rect.centerx, rect.top, points))
+
 # Pipe class
 class Pipe(pygame.sprite.Sprite):
     def __init__(self, x, y, height=2):
         super().__init__()
         self.height = height  # Height in tiles
-        self.image = pygame.Surface((TILE_SIZE * 1.5, TILE_SIZE * height))
-        self.image.fill(PIPE_GREEN)
+        name = f"pipe_{height}"
+        self.image = assets.get(name) if name in assets else self.create_pipe_surface(height)
+        
+        self.rect = self.image.get_rect()
+        self.rect.x = x
+        self.rect.y = y - (height - 1) * TILE_SIZE  # Adjust y position based on height
+        
+    @staticmethod
+    def create_pipe_surface(height):
+        surface = pygame.Surface((TILE_SIZE * 1.5, TILE_SIZE * height))
+        surface.fill(PIPE_GREEN)
         
         # Pipe details
-        pygame.draw.rect(self.image, (0, 140, 0), (0, 0, TILE_SIZE * 1.5, TILE_SIZE * height), 3)
+        pygame.draw.rect(surface, (0, 140, 0), (0, 0, TILE_SIZE * 1.5, TILE_SIZE * height), 3)
         
         # Pipe rim
-        pygame.draw.rect(self.image, (0, 200, 0), (0, 0, TILE_SIZE * 1.5, 8))
-        pygame.draw.rect(self.image, (0, 120, 0), (0, 4, TILE_SIZE * 1.5, 4))
+        pygame.draw.rect(surface, (0, 200, 0), (0, 0, TILE_SIZE * 1.5, 8))
+        pygame.draw.rect(surface, (0, 120, 0), (0, 4, TILE_SIZE * 1.5, 4))
         
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y - (height - 1) * TILE_SIZE  # Adjust y position based on height
+        return surface
 
 # Coin class
+@pools.pooled
 class Coin(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    kinds = ITEM
+    net_lerp = ()
+    
+    def __init__(self, x=0, y=0):
         super().__init__()
-        self.image = pygame.Surface((TILE_SIZE // 2, TILE_SIZE // 2), pygame.SRCALPHA)
-        
-        # Draw coin
-        pygame.draw.circle(self.image, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
-        pygame.draw.circle(self.image, (220, 180, 0), (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 2)
-        pygame.draw.circle(self.image, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 4)
-        
+        self.image = assets.get("coin")
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+        
+    def reset(self, x, y):
         self.rect.x = x + TILE_SIZE//4
         self.rect.y = y + TILE_SIZE//4
         self.collected = False
         
+    @staticmethod
+    def create_coin_surface():
+        surface = pygame.Surface((TILE_SIZE // 2, TILE_SIZE // 2), pygame.SRCALPHA)
+        
+        # Draw coin
+        pygame.draw.circle(surface, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
+        pygame.draw.circle(surface, (220, 180, 0), (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 2)
+        pygame.draw.circle(surface, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 4)
+        
+        return surface
+        
     def collect(self):
         if not self.collected:
             self.collected = True
-            self.kill()
+            dust.emit(40, self.rect.centerx, self.rect.centery, 3, (-6, -1), (20, 40), 0)
+            dust.emit(20, self.rect.centerx, self.rect.centery, 2, (-8, -3), (20, 40), 1)
+            self.pool.release(self)
             return True
         return False
+        
+    def net_state(self):
+        return (self.alive(),)
+    
+    def apply_net_state(self, state, tick):
+        if not state[0] and self.alive():
+            self.pool.release(self)
 
 # Goomba enemy class
+@pools.pooled
 class Goomba(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    kinds = ENEMY
+    walk_clip = None
+    flat_image = None
+    net_lerp = (1, 2)
+
+    def __init__(self, x=0, y=0):
         super().__init__()
-        self.walk_images = [
-            self.create_goomba_surface(),
-            self.create_goomba_surface(True)
-        ]
-        self.image = self.walk_images[0]
-        self.rect = self.image.get_rect()
+        if Goomba.walk_clip is None:
+            Goomba.load_clips()
+        self.rect = pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE)
+        self.reset(x, y)
+        
+    def reset(self, x, y):
+        self.clip = self.walk_clip
+        self.clip_start = 0
+        self.image = clips.frame(self.clip, self.clip_start, 0)
+        self.rect.size = self.image.get_size()
         self.rect.x = x
         self.rect.y = y
         self.velocity_x = -1.5
         self.velocity_y = 0
-        self.walk_timer = 0
-        self.walk_frame = 0
         self.dead = False
-        self.death_timer = 0
+        self.death_timer = None
+        ground_contacts.forget(self)
         
-    def create_goomba_surface(self, frame2=False):
+    def on_release(self):
+        if self.death_timer:
+            self.death_timer.cancel()
+        
+    @classmethod
+    def load_clips(cls):
+        cls.walk_clip = clips.define(
+            "goomba_walk",
+            [assets.get("goomba_0"), assets.get("goomba_1")],
+            [11, 11])
+        cls.flat_image = assets.get("goomba_flat")
+        
+    @staticmethod
+    def create_goomba_surface(frame2=False):
         surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
         
         # Body color
@@ -455,12 +746,16 @@ class Goomba(pygame.sprite.Sprite):
         
         return surface
         
-    def update(self, platforms, pipes):
+    @staticmethod
+    def create_flat_goomba_surface():
+        surface = pygame.Surface((TILE_SIZE, TILE_SIZE // 2), pygame.SRCALPHA)
+        pygame.draw.ellipse(surface, (140, 60, 0), (0, 0, TILE_SIZE, TILE_SIZE // 2))
+        return surface
+        
+    def update(self, platforms, pipes, tick):
         if self.dead:
-            self.death_timer += 1
-            if self.death_timer > 30:  # Remove after 0.5 seconds
-                self.kill()
             return
+        grounded = self.velocity_y == 0
             
         # Apply gravity
         self.velocity_y += GRAVITY
@@ -469,26 +764,34 @@ class Goomba(pygame.sprite.Sprite):
         # Apply horizontal movement
         self.rect.x += self.velocity_x
         
-        # Animation
-        self.walk_timer += 1
-        if self.walk_timer > 10:
-            self.walk_timer = 0
-            self.walk_frame = (self.walk_frame + 1) % 2
-            self.image = self.walk_images[self.walk_frame]
-        
-        # Check collisions with platforms
-        for platform in platforms:
-            if self.rect.colliderect(platform.rect):
-                if self.velocity_y > 0:  # Falling
-                    self.rect.bottom = platform.rect.top
-                    self.velocity_y = 0
-        
-        # Check collisions with pipes
-        for pipe in pipes:
-            if self.rect.colliderect(pipe.rect):
-                if self.velocity_y > 0:  # Falling
-                    self.rect.bottom = pipe.rect.top
-                    self.velocity_y = 0
+        # Animation (off-screen goombas skip it; the frame comes from the tick)
+        if self.rect.right > 0 and self.rect.left < SCREEN_WIDTH:
+            self.image = clips.frame(self.clip, self.clip_start, tick)
+        
+        # Resting on the same flat ground as last frame: just snap back
+        floor = ground_contacts.resting_on(self) if grounded else None
+        if floor is not None:
+            self.rect.bottom = floor
+            self.velocity_y = 0
+        else:
+            # Check collisions with platforms
+            for platform in platforms:
+                if self.rect.colliderect(platform.rect):
+                    if self.velocity_y > 0:  # Falling
+                        self.rect.bottom = platform.rect.top
+                        self.velocity_y = 0
+        
+            # Check collisions with pipes
+            for pipe in pipes:
+                if self.rect.colliderect(pipe.rect):
+                    if self.velocity_y > 0:  # Falling
+                        self.rect.bottom = pipe.rect.top
+                        self.velocity_y = 0
+        
+            if self.velocity_y == 0:
+                ground_contacts.settle(self, round(GRAVITY), platforms, pipes)
+            else:
+                ground_contacts.forget(self)
         
         # Reverse direction if hitting a wall or edge
         if self.rect.left < 0 or self.rect.right > SCREEN_WIDTH:
@@ -500,36 +803,149 @@ class Goomba(pygame.sprite.Sprite):
         else:  # Moving right
             test_rect = pygame.Rect(self.rect.right, self.rect.bottom, 2, 2)
             
-        on_ground = False
-        for platform in platforms:
-            if test_rect.colliderect(platform.rect):
-                on_ground = True
-                break
-        for pipe in pipes:
-            if test_rect.colliderect(pipe.rect):
-                on_ground = True
-                break
+        on_ground = ground_contacts.supports(self, test_rect)
+        if not on_ground:
+            for platform in platforms:
+                if test_rect.colliderect(platform.rect):
+                    on_ground = True
+                    break
+            for pipe in pipes:
+                if test_rect.colliderect(pipe.rect):
+                    on_ground = True
+                    break
         if not on_ground:
             self.velocity_x *= -1
             
+    def bump_into(self, other):
+        # Goombas that walk into each other both turn around
+        if self.dead or other.dead:
+            return
+        if self.rect.centerx < other.rect.centerx:
+            self.velocity_x = -abs(self.velocity_x)
+            other.velocity_x = abs(other.velocity_x)
+        else:
+            self.velocity_x = abs(self.velocity_x)
+            other.velocity_x = -abs(other.velocity_x)
+            
     def stomp(self):
         if not self.dead:
             self.dead = True
-            self.image = pygame.Surface((TILE_SIZE, TILE_SIZE // 2), pygame.SRCALPHA)
-            pygame.draw.ellipse(self.image, (140, 60, 0), (0, 0, TILE_SIZE, TILE_SIZE // 2))
+            self.image = self.flat_image
             self.rect.y += TILE_SIZE // 2
+            # Remove after 0.5 seconds
+            self.death_timer = timers.schedule(31, self.pool.release, self)
+            
+    def net_state(self):
+        return (self.alive(), self.rect.x, self.rect.y, self.dead)
+    
+    def apply_net_state(self, state, tick):
+        alive, x, y, dead = state
+        if not alive:
+            if self.alive():
+                self.pool.release(self)
+            return
+        self.rect.topleft = (x, y)
+        if dead:
+            self.image = self.flat_image
+        else:
+            self.image = clips.frame(self.clip, self.clip_start, tick)
+
+# Baked art: every generator above is rendered once into a cached atlas
+assets = asset_bundle.AssetBundle(
+    "marioforever", TILE_SIZE,
+    GROUND_BROWN, BRICK_RED, BLOCK_YELLOW, PIPE_GREEN, COIN_YELLOW, WHITE, BLACK)
+for side, facing_right in (("right", True), ("left", False)):
+    assets.add(f"player_stand_{side}", Player.create_player_surface, facing_right)
+    for frame in range(1, 4):
+        assets.add(f"player_walk_{side}_{frame}", Player.create_player_surface, facing_right, frame)
+    assets.add(f"player_jump_{side}", Player.create_player_surface, facing_right, 0, True)
+assets.add("brick", Block.create_brick)
+assets.add("question", Block.create_question_block)
+assets.add("question_empty", Block.create_empty_block)
+assets.add("ground", Block.create_ground_block)
+for height in range(1, 5):
+    assets.add(f"pipe_{height}", Pipe.create_pipe_surface, height)
+assets.add("coin", Coin.create_coin_surface)
+assets.add("goomba_0", Goomba.create_goomba_surface)
+assets.add("goomba_1", Goomba.create_goomba_surface, True)
+assets.add("goomba_flat", Goomba.create_flat_goomba_surface)
+assets.add("debris", Debris.create_debris_surface)
+
+# Short-lived effect sprites (debris, score popups); not part of the level
+effects = pygame.sprite.Group()
+
+# Sprites that are mid-animation (bumped blocks); everything else in the
+# level is static and isn't updated at all
+active = active_set.ActiveSet()
+
+# Enemies sleep until they come near the screen (see activation.py for what
+# stays deterministic); ones left far behind are despawned
+enemy_zones = activation.ActivationZones(TILE_SIZE * 2, TILE_SIZE * 4, SCREEN_WIDTH)
+
+# Sort-and-sweep over everything that moves or can be touched; released
+# sprites drop out of it by themselves
+contacts = broadphase.SweepAndPrune(((PLAYER, ENEMY), (PLAYER, ITEM), (ENEMY, ENEMY)))
+
+# What happens when two kinds of thing meet (fire counts: responses.report())
+responses = collision.ResponseTable()
+responses.on(PLAYER, BRICK, Player.hit_brick)
+responses.on(PLAYER, QUESTION, Player.hit_question)
+responses.on(PLAYER, ITEM, Player.collect_coin)
+responses.on(PLAYER, ENEMY, Player.touch_enemy)
+responses.on(ENEMY, ENEMY, Goomba.bump_into)
+
+# What grounded players and goombas stand on; any block moving, appearing or
+# disappearing invalidates it
+ground_contacts = contact_cache.ContactCache()
+
+# Dust particles (brick breaks), kept in preallocated arrays
+dust = particles.ParticleSystem(4096, [(252, 220, 180), BRICK_RED], gravity=0.4)
 
-# Create level
-def create_level():
+# How many of each pooled sprite to preallocate when play starts
+POOL_SIZES = ((Block, 64), (Coin, 32), (Goomba, 8), (Debris, 16), (ScorePopup, 8))
+
+def preallocate_pools():
+    for cls, count in POOL_SIZES:
+        cls.pool.reserve(count)
+
+def release_level(*groups):
+    # Hand every pooled sprite of the old level (and any live effects) back
+    pools.release_all(*groups)
+    pools.release_all(effects)
+    active.clear()
+    enemy_zones.clear()
+    ground_contacts.clear()
+    dust.clear()
+
+# Create level: the original screen, or a generated one for a seed
+def create_level(seed=None):
     platforms = pygame.sprite.Group()
     pipes = pygame.sprite.Group()
     blocks = pygame.sprite.Group()
     enemies = pygame.sprite.Group()
     coins = pygame.sprite.Group()
     
+    if seed is None:
+        build_original_level(platforms, pipes, blocks, enemies, coins)
+    else:
+        # Just the first screen of the level (see level_gen.py); the view
+        # doesn't scroll
+        for chunk in level_gen.chunks(seed):
+            if chunk.left * TILE_SIZE > SCREEN_WIDTH:
+                break
+            build_chunk(chunk, platforms, pipes, blocks, enemies, coins)
+    for enemy in enemies:
+        enemy_zones.add(enemy)
+        contacts.add(enemy, ENEMY)
+    for coin in coins:
+        contacts.add(coin, ITEM)
+    
+    return platforms, pipes, blocks, enemies, coins
+
+def build_original_level(platforms, pipes, blocks, enemies, coins):
     # Create ground
     for x in range(0, SCREEN_WIDTH + TILE_SIZE, TILE_SIZE):
-        platforms.add(Block(x, SCREEN_HEIGHT - TILE_SIZE, "ground"))
+        platforms.add(Block.pool.acquire(x, SCREEN_HEIGHT - TILE_SIZE, "ground"))
     
     # Create pipes
     pipes.add(Pipe(500, SCREEN_HEIGHT - TILE_SIZE, 3))
@@ -537,48 +953,118 @@ def create_level():
     
     # Create brick blocks
     for i in range(3):
-        blocks.add(Block(200 + i * TILE_SIZE, SCREEN_HEIGHT - TILE_SIZE * 3, "brick"))
+        blocks.add(Block.pool.acquire(200 + i * TILE_SIZE, SCREEN_HEIGHT - TILE_SIZE * 3, "brick"))
     
     # Create question blocks
-    blocks.add(Block(300, SCREEN_HEIGHT - TILE_SIZE * 5, "question", "coin"))
-    blocks.add(Block(350, SCREEN_HEIGHT - TILE_SIZE * 5, "question", "mushroom"))
+    blocks.add(Block.pool.acquire(300, SCREEN_HEIGHT - TILE_SIZE * 5, "question", "coin"))
+    blocks.add(Block.pool.acquire(350, SCREEN_HEIGHT - TILE_SIZE * 5, "question", "mushroom"))
     
     # Create floating platforms
     for i in range(5):
-        platforms.add(Block(400 + i * TILE_SIZE, SCREEN_HEIGHT - TILE_SIZE * 4, "ground"))
+        platforms.add(Block.pool.acquire(400 + i * TILE_SIZE, SCREEN_HEIGHT - TILE_SIZE * 4, "ground"))
     
     # Create coins
-    coins.add(Coin(150, SCREEN_HEIGHT - TILE_SIZE * 4))
-    coins.add(Coin(170, SCREEN_HEIGHT - TILE_SIZE * 4))
-    coins.add(Coin(190, SCREEN_HEIGHT - TILE_SIZE * 4))
+    coins.add(Coin.pool.acquire(150, SCREEN_HEIGHT - TILE_SIZE * 4))
+    coins.add(Coin.pool.acquire(170, SCREEN_HEIGHT - TILE_SIZE * 4))
+    coins.add(Coin.pool.acquire(190, SCREEN_HEIGHT - TILE_SIZE * 4))
     
     # Create enemies
-    enemies.add(Goomba(600, SCREEN_HEIGHT - TILE_SIZE * 2))
-    enemies.add(Goomba(650, SCREEN_HEIGHT - TILE_SIZE * 2))
-    
-    return platforms, pipes, blocks, enemies, coins
+    enemies.add(Goomba.pool.acquire(600, SCREEN_HEIGHT - TILE_SIZE * 2))
+    enemies.add(Goomba.pool.acquire(650, SCREEN_HEIGHT - TILE_SIZE * 2))
+
+def build_chunk(chunk, platforms, pipes, blocks, enemies, coins):
+    # Tiles past the right edge of the screen are left out
+    ground_y = SCREEN_HEIGHT - TILE_SIZE
+    last = SCREEN_WIDTH // TILE_SIZE
+    for col in chunk.ground:
+        if col <= last:
+            platforms.add(Block.pool.acquire(col * TILE_SIZE, ground_y, "ground"))
+    for col, height in chunk.pipes:
+        if col <= last:
+            pipes.add(Pipe(col * TILE_SIZE, ground_y, height))
+    for col, row, block_type, content in chunk.blocks:
+        if col <= last:
+            block = Block.pool.acquire(col * TILE_SIZE, ground_y - row * TILE_SIZE, block_type, content)
+            (platforms if block_type == "ground" else blocks).add(block)
+    for col, row in chunk.coins:
+        if col <= last:
+            coins.add(Coin.pool.acquire(col * TILE_SIZE, ground_y - row * TILE_SIZE))
+    for col, row in chunk.enemies:
+        if col <= last:
+            enemies.add(Goomba.pool.acquire(col * TILE_SIZE, ground_y - row * TILE_SIZE))
+
+def update_level(player, platforms, pipes, blocks, *others):
+    # One frame of simulation, no drawing; returns True if the player fell.
+    # Other players (netplay) just respawn when they fall
+    frame_count = timers.advance()
+    sounds.next_frame()
+    events.next_frame()
+    active.update()
+    enemy_zones.update(0, SCREEN_WIDTH)  # the view doesn't scroll
+    enemy_zones.update_awake(platforms, pipes, frame_count)
+    effects.update()
+    dust.update()
+    player_died = player.update(platforms, blocks, pipes, frame_count)
+    for other in others:
+        if other.update(platforms, blocks, pipes, frame_count) and other.die():
+            other.lives = 3
+    for goomba, other in contacts.pairs(ENEMY, ENEMY):
+        responses.respond(goomba, other)
+    return player_died
+
+# Netplay: what the host sends each snapshot, in an order both ends agree on
+# (create_level builds the same level in the same order on both)
+def net_entities(blocks, coins, enemies):
+    return list(blocks) + list(coins) + list(enemies)
+
+def apply_net_states(sprites, states, newer, alpha, tick):
+    # Show the jitter buffer's sample: moving fields interpolated towards the
+    # next snapshot, everything else as of the older one
+    for index, sprite in enumerate(sprites):
+        if index < len(states):
+            state = netplay.lerp_fields(states[index], newer[index] if newer else None,
+                                        alpha, sprite.net_lerp)
+            sprite.apply_net_state(state, tick)
+
+def steer(player, bits, previous_bits):
+    # Input bits (netplay.LEFT/RIGHT/JUMP) to the same calls the keyboard makes
+    if bits & netplay.JUMP and not previous_bits & netplay.JUMP:
+        player.jump()
+    if bits & netplay.LEFT:
+        player.move_left()
+    if bits & netplay.RIGHT:
+        player.move_right()
+    if not bits & (netplay.LEFT | netplay.RIGHT):
+        player.stop()
+
+# Draw blocks where they're drawn, not where they collide (see Block.bump)
+def draw_blocks(blocks):
+    screen.blits([(block.image, block.draw_rect) for block in blocks], doreturn=False)
 
 # Draw HUD
 def draw_hud(player):
     # Draw coins
-    coin_surf = pygame.Surface((TILE_SIZE//2, TILE_SIZE//2), pygame.SRCALPHA)
-    pygame.draw.circle(coin_surf, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
-    pygame.draw.circle(coin_surf, (220, 180, 0), (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 2)
-    pygame.draw.circle(coin_surf, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4 - 4)
-    screen.blit(coin_surf, (20, 20))
+    screen.blit(assets.get("coin"), (20, 20))
     
-    coin_text = font.render(f"× {player.coins}", True, WHITE)
-    screen.blit(coin_text, (50, 20))
+    hud_text = bitmap_text.get_atlas(36, WHITE)
+    coin_label = hud_text.render_to(screen, (50, 20), "× ")
+    hud_text.draw_number(screen, (coin_label.right, 20), player.coins)
     
     # Draw score
-    score_text = font.render(f"SCORE: {player.score}", True, WHITE)
-    screen.blit(score_text, (SCREEN_WIDTH - score_text.get_width() - 20, 20))
+    score_width = hud_text.width("SCORE: ") + hud_text.number_width(player.score)
+    score_label = hud_text.render_to(screen, (SCREEN_WIDTH - score_width - 20, 20), "SCORE: ")
+    hud_text.draw_number(screen, (score_label.right, 20), player.score)
     
     # Draw lives
+    life_img = Player.images["stand_right"]
     for i in range(player.lives):
-        life_img = Player(0, 0).images["stand_right"]
         screen.blit(life_img, (20 + i * 40, 60))
 
+# Draw a line of text centered horizontally, using the cached glyph atlas
+def draw_centered_text(text, size, color, y):
+    atlas = bitmap_text.get_atlas(size, color)
+    atlas.render_to(screen, (SCREEN_WIDTH//2 - atlas.width(text)//2, y), text)
+
 # World Map class
 class WorldMap:
     def __init__(self):
@@ -601,27 +1087,19 @@ class WorldMap:
         screen.fill(SKY_BLUE)
         
         # Draw title
-        title_font = pygame.font.Font(None, 72)
-        title = title_font.render("WORLD MAP", True, BLACK)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        draw_centered_text("WORLD MAP", 72, BLACK, 50)
         
         # Draw worlds
-        world_font = pygame.font.Font(None, 48)
         for i, world in enumerate(self.worlds):
-            world_text = world_font.render(world, True, BLACK if i != self.current_world else RED)
-            screen.blit(world_text, (SCREEN_WIDTH//2 - world_text.get_width()//2, 150 + i * 50))
+            draw_centered_text(world, 48, BLACK if i != self.current_world else RED, 150 + i * 50)
             
         # Draw selected world's levels
-        level_font = pygame.font.Font(None, 36)
         selected_world_levels = self.level_data.get(self.worlds[self.current_world], [])
         for i, level in enumerate(selected_world_levels):
-            level_text = level_font.render(level, True, BLACK if i != self.current_level else RED)
-            screen.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2, 400 + i * 40))
+            draw_centered_text(level, 36, BLACK if i != self.current_level else RED, 400 + i * 40)
             
         # Draw navigation instructions
-        nav_font = pygame.font.Font(None, 24)
-        nav_text = nav_font.render("Use UP/DOWN to select world, LEFT/RIGHT to select level, ENTER to play", True, BLACK)
-        screen.blit(nav_text, (SCREEN_WIDTH//2 - nav_text.get_width()//2, SCREEN_HEIGHT - 100))
+        draw_centered_text("Use UP/DOWN to select world, LEFT/RIGHT to select level, ENTER to play", 24, BLACK, SCREEN_HEIGHT - 100)
         
         pygame.display.flip()
 
@@ -630,22 +1108,13 @@ def show_main_menu():
     screen.fill(SKY_BLUE)
     
     # Draw title
-    title_font = pygame.font.Font(None, 72)
-    title = title_font.render("MARIO FOREVER", True, RED)
-    subtitle = title_font.render("Community Edition", True, WHITE)
-    
-    screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 100))
-    screen.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 170))
+    draw_centered_text("MARIO FOREVER", 72, RED, 100)
+    draw_centered_text("Community Edition", 72, WHITE, 170)
     
     # Draw menu options
-    menu_font = pygame.font.Font(None, 48)
-    start_text = menu_font.render("Press ENTER to Start", True, WHITE)
-    world_map_text = menu_font.render("Press W for World Map", True, WHITE)
-    quit_text = menu_font.render("Press ESC to Quit", True, WHITE)
-    
-    screen.blit(start_text, (SCREEN_WIDTH//2 - start_text.get_width()//2, 350))
-    screen.blit(world_map_text, (SCREEN_WIDTH//2 - world_map_text.get_width()//2, 400))
-    screen.blit(quit_text, (SCREEN_WIDTH//2 - quit_text.get_width()//2, 450))
+    draw_centered_text("Press ENTER to Start", 48, WHITE, 350)
+    draw_centered_text("Press W for World Map", 48, WHITE, 400)
+    draw_centered_text("Press ESC to Quit", 48, WHITE, 450)
     
     pygame.display.flip()
 
@@ -653,22 +1122,13 @@ def show_main_menu():
 def show_game_over(score, coins):
     screen.fill(BLACK)
     
-    title_font = pygame.font.Font(None, 72)
-    title = title_font.render("GAME  OVER", True, RED)
-    screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 150))
-    
-    score_font = pygame.font.Font(None, 48)
-    score_text = score_font.render(f"Final Score: {score}", True, WHITE)
-    coin_text = score_font.render(f"Coins Collected: {coins}", True, WHITE)
-    
-    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, 250))
-    screen.blit(coin_text, (SCREEN_WIDTH//2 - coin_text.get_width()//2, 300))
+    draw_centered_text("GAME  OVER", 72, RED, 150)
     
-    restart_text = score_font.render("Press R to Restart", True, WHITE)
-    menu_text = score_font.render("Press ESC for Menu", True, WHITE)
+    draw_centered_text(f"Final Score: {score}", 48, WHITE, 250)
+    draw_centered_text(f"Coins Collected: {coins}", 48, WHITE, 300)
     
-    screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 400))
-    screen.blit(menu_text, (SCREEN_WIDTH//2 - menu_text.get_width()//2, 450))
+    draw_centered_text("Press R to Restart", 48, WHITE, 400)
+    draw_centered_text("Press ESC for Menu", 48, WHITE, 450)
     
     pygame.display.flip()
 
@@ -676,41 +1136,136 @@ def show_game_over(score, coins):
 def show_level_complete(score, coins):
     screen.fill(SKY_BLUE)
     
-    title_font = pygame.font.Font(None, 72)
-    title = title_font.render("LEVEL COMPLETE!", True, BLACK)
-    screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 150))
+    draw_centered_text("LEVEL COMPLETE!", 72, BLACK, 150)
     
     flag_img = pygame.Surface((TILE_SIZE, TILE_SIZE * 3))
     flag_img.fill(RED)
     pygame.draw.rect(flag_img, WHITE, (0, 0, TILE_SIZE, TILE_SIZE * 3), 2)
     screen.blit(flag_img, (SCREEN_WIDTH//2 - TILE_SIZE//2, 250))
     
-    score_font = pygame.font.Font(None, 48)
-    score_text = score_font.render(f"Score: {score}", True, BLACK)
-    coin_text = score_font.render(f"Coins: {coins}", True, BLACK)
-    
-    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, 350))
-    screen.blit(coin_text, (SCREEN_WIDTH//2 - coin_text.get_width()//2, 400))
-    
-    restart_text = score_font.render("Press R to Restart", True, BLACK)
-    menu_text = score_font.render("Press ESC for Menu", True, BLACK)
+    draw_centered_text(f"Score: {score}", 48, BLACK, 350)
+    draw_centered_text(f"Coins: {coins}", 48, BLACK, 400)
     
-    screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 450))
-    screen.blit(menu_text, (SCREEN_WIDTH//2 - menu_text.get_width()//2, 500))
+    draw_centered_text("Press R to Restart", 48, BLACK, 450)
+    draw_centered_text("Press ESC for Menu", 48, BLACK, 500)
     
     pygame.display.flip()
 
+# Netplay client: shows the host's game and sends it this keyboard's input
+def run_client(address, port):
+    init_display()
+    link = netplay.ClientLink(address, port)
+    players = [Player(0, 0), Player(0, 0)]  # the host's, then ours
+    level = None
+    sprites = []
+    frame = 0
+    
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT or event.type == KEYDOWN and event.key == K_ESCAPE:
+                seconds = max(1, frame) / FPS
+                print(f"received {link.bytes_received / seconds / 1024:.2f} KB/s from the host")
+                link.close()
+                pygame.quit()
+                return
+        
+        frame += 1
+        if link.epoch is None:
+            if frame % FPS == 1:  # until the host answers
+                link.hello()
+        else:
+            keys = pygame.key.get_pressed()
+            link.send_input(keys[K_LEFT] * netplay.LEFT | keys[K_RIGHT] * netplay.RIGHT
+                            | keys[K_SPACE] * netplay.JUMP)
+        
+        if link.poll():
+            # The host started a level: build the same one
+            if level is not None:
+                release_level(*level)
+            level = create_level(link.seed)
+            platforms, pipes, blocks, enemies, coins = level
+            sprites = players + net_entities(blocks, coins, enemies)
+        link.buffer.advance()
+        sample = link.buffer.sample()
+        if sample is not None:
+            apply_net_states(sprites, *sample, frame)
+        
+        screen.fill(SKY_BLUE)
+        if level is not None and sample is not None:
+            platforms.draw(screen)
+            pipes.draw(screen)
+            draw_blocks(blocks)
+            coins.draw(screen)
+            enemies.draw(screen)
+            for player in players:
+                screen.blit(player.image, player.rect)
+            draw_hud(players[1])
+        else:
+            draw_centered_text(f"Waiting for {address}:{port}...", 48, WHITE, 250)
+        pygame.display.flip()
+        clock.tick(FPS)
+
 # Main game loop
-def main():
+#   --host          play and let one other player join over UDP
+#   --join ADDRESS  be the other player
+#   --port N        UDP port (default netplay.DEFAULT_PORT)
+#   --seed N        play the generated level for a seed instead
+#   --capture DIR   record every frame into DIR (see frame_capture.py)
+#   --capture-format raw|png
+#   --telemetry PATH  log gameplay events to PATH (.jsonl or .bin)
+def main(argv=()):
+    seed = None
+    host = False
+    join = None
+    port = netplay.DEFAULT_PORT
+    capture_dir = None
+    capture_format = "raw"
+    args = iter(argv)
+    for arg in args:
+        if arg == "--host":
+            host = True
+        elif arg == "--join":
+            join = next(args)
+        elif arg == "--port":
+            port = int(next(args))
+        elif arg == "--seed":
+            seed = int(next(args))
+        elif arg == "--capture":
+            capture_dir = next(args)
+        elif arg == "--capture-format":
+            capture_format = next(args)
+        elif arg == "--telemetry":
+            events.open(next(args))
+    if join is not None:
+        run_client(join, port)
+        return
+    
     running = True
     game_state = "menu"
-    player = Player(100, SCREEN_HEIGHT - TILE_SIZE * 2)
-    platforms, pipes, blocks, enemies, coins = create_level()
+    init_display()
+    # The player and level are built when play starts, not before the menu
+    player = None
     world_map = WorldMap()
+    capture = None
+    if capture_dir is not None:
+        capture = frame_capture.FrameCapture.for_surface(screen, capture_dir, capture_format)
+    
+    # Netplay host: the joined player is simulated here along with ours
+    link = None
+    if host:
+        link = netplay.HostLink(seed, port)
+        remote = Player(100 + TILE_SIZE * 2, SCREEN_HEIGHT - TILE_SIZE * 2)
+        remote_bits = 0
+        net_blocks = None
+        game_state = "playing"
+        print(f"hosting on UDP port {port}")
     
     while running:
         for event in pygame.event.get():
             if event.type == QUIT:
+                if capture is not None:
+                    print(capture.close())
+                events.close()
                 pygame.quit()
                 sys.exit()
                 
@@ -721,6 +1276,9 @@ def main():
                     elif event.key == K_w:
                         game_state = "world_map"
                     elif event.key == K_ESCAPE:
+                        if capture is not None:
+                            print(capture.close())
+                        events.close()
                         pygame.quit()
                         sys.exit()
                         
@@ -740,14 +1298,19 @@ def main():
                         game_state = "menu"
                         
                 elif game_state == "playing":
-                    if event.key == K_SPACE:
+                    # The player is built on the first playing frame, after
+                    # this batch of events
+                    if event.key == K_SPACE and player is not None:
                         player.jump()
                         
                 elif game_state == "game_over" or game_state == "level_complete":
                     if event.key == K_r:
                         game_state = "playing"
+                        contacts.remove(player)
                         player = Player(100, SCREEN_HEIGHT - TILE_SIZE * 2)
-                        platforms, pipes, blocks, enemies, coins = create_level()
+                        contacts.add(player, PLAYER)
+                        release_level(platforms, pipes, blocks, enemies, coins)
+                        platforms, pipes, blocks, enemies, coins = create_level(seed)
                     if event.key == K_ESCAPE:
                         game_state = "menu"
                         
@@ -758,6 +1321,13 @@ def main():
             world_map.draw_world_map(screen)
             
         elif game_state == "playing":
+            if player is None:
+                sounds.load()
+                preallocate_pools()
+                player = Player(100, SCREEN_HEIGHT - TILE_SIZE * 2)
+                contacts.add(player, PLAYER)
+                platforms, pipes, blocks, enemies, coins = create_level(seed)
+                
             keys = pygame.key.get_pressed()
             if keys[K_LEFT]:
                 player.move_left()
@@ -765,37 +1335,56 @@ def main():
                 player.move_right()
             if not keys[K_LEFT] and not keys[K_RIGHT]:
                 player.stop()
+            
+            others = ()
+            if link is not None:
+                if link.poll():
+                    contacts.add(remote, PLAYER)
+                if link.client is not None:
+                    steer(remote, link.bits, remote_bits)
+                    remote_bits = link.bits
+                    others = (remote,)
                 
             # Update game objects
-            platforms.update()
-            pipes.update()
-            blocks.update()
-            enemies.update(platforms, pipes)
-            coins.update()
-            player_died = player.update(platforms, enemies, blocks, pipes, coins)
+            player_died = update_level(player, platforms, pipes, blocks, *others)
             
             # Check for level completion (simplified)
             if player.rect.x > SCREEN_WIDTH:
-                platforms, pipes, blocks, enemies, coins = create_level()
+                release_level(platforms, pipes, blocks, enemies, coins)
+                platforms, pipes, blocks, enemies, coins = create_level(seed)
                 player.rect.x = 100
                 player.rect.y = SCREEN_HEIGHT - TILE_SIZE * 2
                 player.score += 5000
+                events.emit(telemetry.LEVEL_COMPLETE, player.rect.x, player.rect.y, player.score)
                 game_state = "level_complete"
                 
             if player_died:
                 if player.die():
                     game_state = "game_over"
                 else:
-                    platforms, pipes, blocks, enemies, coins = create_level()
+                    release_level(platforms, pipes, blocks, enemies, coins)
+                    platforms, pipes, blocks, enemies, coins = create_level(seed)
+            
+            if link is not None:
+                if blocks is not net_blocks:
+                    # A new level: the client rebuilds it and ids start over
+                    net_blocks = blocks
+                    net_sprites = [player, remote] + net_entities(blocks, coins, enemies)
+                    link.new_epoch()
+                link.send_state(timers.tick, [sprite.net_state() for sprite in net_sprites])
             
             # Draw everything
             screen.fill(SKY_BLUE)
             platforms.draw(screen)
             pipes.draw(screen)
-            blocks.draw(screen)
+            draw_blocks(blocks)
             coins.draw(screen)
             enemies.draw(screen)
+            effects.draw(screen)
+            dust.draw(screen)
             
+            for other in others:
+                screen.blit(other.image, other.rect)
             screen.blit(player.image, player.rect)
             draw_hud(player)
             
@@ -807,7 +1396,9 @@ def main():
         elif game_state == "level_complete":
             show_level_complete(player.score, player.coins)
             
+        if capture is not None:
+            capture.capture(screen)
         clock.tick(FPS)
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,331 @@
+# netplay.py
+#
+# Two-player netplay over UDP: an authoritative host and one client.
+#
+# The host runs the whole simulation. Each frame the client sends its input
+# bits (left, right, jump) and the newest snapshot tick it has received; the
+# host applies the latest bits to the client's player. A snapshot of the
+# world goes back every `send_interval` ticks.
+#
+# World state is a list of small integer tuples, one per networked entity
+# (players first, then whatever the game lists). Snapshots are delta
+# compressed against the last snapshot the client acknowledged: only
+# entities whose tuple changed are sent, for those only the changed fields
+# (a bit mask says which), and each of those as the difference from the
+# baseline value, as a zigzag varint (a goomba walking a pixel costs one
+# byte). If the client hasn't acknowledged anything the host still
+# remembers, or the level was rebuilt (a new epoch), the host sends a full
+# snapshot instead. Lost packets just mean the next delta is taken against
+# an older baseline. A client that gets snapshots for an epoch it hasn't
+# been welcomed to (the WELCOME was lost) says HELLO again.
+#
+# The client doesn't simulate. Snapshots go into a jitter buffer and are
+# shown `delay` ticks behind the newest one received, interpolating between
+# the two snapshots around that moment, so uneven arrival and the lower
+# snapshot rate don't show as stutter.
+#
+# Wire format (network byte order; v = zigzag varint):
+#   HELLO     B                    client -> host
+#   WELCOME   B i H                seed (-1: the original level), epoch
+#   INPUT     B I I B              client frame, acked tick, input bits
+#   SNAPSHOT  B I I H H {v B v*}*  tick, baseline tick (0: full), epoch,
+#                                  entry count, then per changed entity:
+#                                  id, field mask, changed fields
+
+import collections
+import socket
+import struct
+
+DEFAULT_PORT = 47600
+
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+SNAPSHOT = 4
+
+# Input bits
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+
+_HELLO = struct.Struct("!B")
+_WELCOME = struct.Struct("!BiH")
+_INPUT = struct.Struct("!BIIB")
+_SNAPSHOT = struct.Struct("!BIIHH")
+
+HISTORY = 64  # snapshots kept for use as delta baselines
+MAX_PACKET = 1400
+
+
+def _put_varint(out, value):
+    value = value * 2 if value >= 0 else -value * 2 - 1  # zigzag
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(packet, offset):
+    value = shift = 0
+    while True:
+        byte = packet[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1 if not value & 1 else -(value >> 1) - 1), offset
+
+
+def encode_snapshot(tick, epoch, states, baseline=None, baseline_tick=0):
+    """SNAPSHOT packet for `states`, as a delta from `baseline` if given."""
+    body = bytearray()
+    count = 0
+    for entity, state in enumerate(states):
+        old = baseline[entity] if baseline is not None and entity < len(baseline) else None
+        if old == state:
+            continue
+        _put_varint(body, entity)
+        mask_at = len(body)
+        body.append(0)
+        mask = 0
+        for field, value in enumerate(state):
+            if old is None:
+                _put_varint(body, value)
+            elif old[field] != value:
+                _put_varint(body, value - old[field])
+            else:
+                continue
+            mask |= 1 << field
+        body[mask_at] = mask
+        count += 1
+    if baseline is None:
+        baseline_tick = 0
+    return _SNAPSHOT.pack(SNAPSHOT, tick, baseline_tick, epoch, count) + body
+
+
+def decode_snapshot(packet, baseline=None):
+    """(tick, baseline tick, epoch, states) from a SNAPSHOT packet.
+
+    A delta needs the states of its baseline tick passed as `baseline`.
+    """
+    _, tick, baseline_tick, epoch, count = _SNAPSHOT.unpack_from(packet)
+    states = list(baseline) if baseline is not None else []
+    offset = _SNAPSHOT.size
+    for _ in range(count):
+        entity, offset = _get_varint(packet, offset)
+        mask = packet[offset]
+        offset += 1
+        while len(states) <= entity:
+            states.append(None)
+        old = states[entity]
+        state = list(old) if old is not None else []
+        field = 0
+        while mask >> field:
+            if mask & 1 << field:
+                value, offset = _get_varint(packet, offset)
+                if old is None:
+                    state.append(value)
+                else:
+                    state[field] += value
+            field += 1
+        states[entity] = tuple(state)
+    return tick, baseline_tick, epoch, states
+
+
+def lerp_fields(old, new, alpha, fields):
+    """`old` with the given fields moved `alpha` of the way to `new`."""
+    if old == new or new is None:
+        return old
+    state = list(old)
+    for field in fields:
+        state[field] = round(old[field] + (new[field] - old[field]) * alpha)
+    return state
+
+
+class HostLink:
+    """The host's end: one remote player, snapshots out, inputs in."""
+
+    def __init__(self, seed, port=DEFAULT_PORT, send_interval=2):
+        self.seed = -1 if seed is None else seed
+        self.send_interval = send_interval
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("", port))
+        self.socket.setblocking(False)
+        self.client = None  # address of the joined client
+        self.bits = 0  # the client's latest input bits
+        self.input_frame = -1
+        self.acked = 0  # newest snapshot tick the client has
+        self.epoch = 0
+        self.history = collections.OrderedDict()  # tick -> states, this epoch
+        self.bytes_sent = 0
+
+    def poll(self):
+        """Read everything waiting; returns True when a client has just joined."""
+        joined = False
+        while True:
+            try:
+                packet, address = self.socket.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return joined
+            except ConnectionResetError:
+                continue
+            kind = packet[0] if packet else None
+            if kind == HELLO:
+                if self.client is None:
+                    self.client = address
+                    joined = True
+                if address == self.client:
+                    self._send(_WELCOME.pack(WELCOME, self.seed, self.epoch))
+            elif kind == INPUT and address == self.client and len(packet) >= _INPUT.size:
+                _, frame, acked, bits = _INPUT.unpack_from(packet)
+                if frame > self.input_frame:  # drop late, reordered inputs
+                    self.input_frame = frame
+                    self.bits = bits
+                    self.acked = max(self.acked, acked)
+
+    def new_epoch(self):
+        """The level was rebuilt: entity ids start over, deltas restart."""
+        self.epoch = (self.epoch + 1) & 0xFFFF
+        self.history.clear()
+        self.acked = 0
+        if self.client is not None:
+            self._send(_WELCOME.pack(WELCOME, self.seed, self.epoch))
+
+    def send_state(self, tick, states):
+        """Call every tick; sends a snapshot every send_interval ticks."""
+        if self.client is None or tick % self.send_interval:
+            return
+        states = [tuple(state) for state in states]
+        baseline = self.history.get(self.acked)
+        self._send(encode_snapshot(tick, self.epoch, states, baseline, self.acked))
+        self.history[tick] = states
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+
+    def _send(self, packet):
+        self.bytes_sent += len(packet)
+        try:
+            self.socket.sendto(packet, self.client)
+        except OSError:
+            pass
+
+    def close(self):
+        self.socket.close()
+
+
+class JitterBuffer:
+    """Received snapshots, replayed `delay` ticks behind the newest one."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.snapshots = collections.OrderedDict()  # tick -> states, in order
+        self.clock = None  # estimate of the host's current tick
+
+    def add(self, tick, states):
+        if self.snapshots and tick <= next(reversed(self.snapshots)):
+            return  # late; we're past it
+        self.snapshots[tick] = states
+        while len(self.snapshots) > HISTORY:
+            self.snapshots.popitem(last=False)
+        if self.clock is None or tick > self.clock or self.clock - tick > 2 * self.delay:
+            self.clock = tick
+
+    def clear(self):
+        self.snapshots.clear()
+        self.clock = None
+
+    def advance(self):
+        """Call once per local frame."""
+        if self.clock is not None:
+            self.clock += 1
+
+    def sample(self):
+        """(older, newer, alpha) around the render tick, or None before any
+        snapshot arrives; newer is None when there's nothing past it yet."""
+        if not self.snapshots:
+            return None
+        render = self.clock - self.delay
+        older = None
+        for tick, states in self.snapshots.items():
+            if tick > render:
+                if older is None:
+                    return states, None, 0.0
+                return older[1], states, (render - older[0]) / (tick - older[0])
+            older = (tick, states)
+        return older[1], None, 0.0
+
+
+class ClientLink:
+    """The client's end: inputs out, snapshots in (into a JitterBuffer)."""
+
+    def __init__(self, host, port=DEFAULT_PORT, delay=6):
+        self.address = (socket.gethostbyname(host), port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.buffer = JitterBuffer(delay)
+        self.received = collections.OrderedDict()  # tick -> states, baselines
+        self.seed = None
+        self.epoch = None
+        self.acked = 0
+        self.frame = 0
+        self.bytes_received = 0
+
+    def hello(self):
+        self.socket.sendto(_HELLO.pack(HELLO), self.address)
+
+    def send_input(self, bits):
+        self.frame += 1
+        self.socket.sendto(_INPUT.pack(INPUT, self.frame, self.acked, bits), self.address)
+
+    def poll(self):
+        """Read everything waiting; returns True when the level must be
+        (re)built for a new epoch (see self.seed)."""
+        rebuild = False
+        asked = False
+        while True:
+            try:
+                packet, address = self.socket.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return rebuild
+            except ConnectionResetError:
+                continue
+            if address != self.address:
+                continue  # not from the host
+            self.bytes_received += len(packet)
+            kind = packet[0] if packet else None
+            if kind == WELCOME and len(packet) >= _WELCOME.size:
+                _, seed, epoch = _WELCOME.unpack_from(packet)
+                if epoch != self.epoch:
+                    self.seed = None if seed < 0 else seed
+                    self.epoch = epoch
+                    self.received.clear()
+                    self.buffer.clear()
+                    self.acked = 0
+                    rebuild = True
+            elif kind == SNAPSHOT and self.epoch is not None and len(packet) >= _SNAPSHOT.size:
+                _, tick, baseline_tick, epoch, _ = _SNAPSHOT.unpack_from(packet)
+                if epoch != self.epoch:
+                    # The WELCOME for a rebuilt level was lost; the host
+                    # answers a known client's HELLO with it again
+                    if not asked:
+                        self.hello()
+                        asked = True
+                    continue
+                baseline = None
+                if baseline_tick:
+                    baseline = self.received.get(baseline_tick)
+                    if baseline is None:
+                        continue  # can't decode without it; a later one will do
+                try:
+                    tick, _, _, states = decode_snapshot(packet, baseline)
+                except (IndexError, struct.error):
+                    continue  # truncated or corrupt
+                self.received[tick] = states
+                while len(self.received) > HISTORY:
+                    self.received.popitem(last=False)
+                self.acked = max(self.acked, tick)
+                self.buffer.add(tick, states)
+
+    def close(self):
+        self.socket.close()
@@ -0,0 +1,105 @@
+# particles.py
+#
+# Array-backed particle system.
+#
+# Particle state (position, velocity, remaining life, color) lives in
+# preallocated NumPy arrays; live particles are always packed at the front.
+# Emitting writes a slice of those arrays, updating is a handful of
+# vectorized operations and drawing is a single vectorized pixel write into
+# the target surface, so there is no Python object or blit per particle and
+# tens of thousands of particles stay cheap.
+
+import numpy as np
+import pygame
+
+
+class ParticleSystem:
+    """Fixed-capacity pool of point particles."""
+
+    def __init__(self, capacity, palette, gravity=0.3, size=2, seed=None):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.size = size
+        self.palette = np.array(palette, dtype=np.uint8)  # color index -> RGB
+        self.count = 0
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int32)
+        self.color = np.zeros(capacity, np.uint8)
+        self._alive = np.zeros(capacity, bool)
+        self._random = np.zeros(capacity, np.float64)
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, count, x, y, speed_x, speed_y, life, color=0):
+        """Spawn up to `count` particles at (x, y).
+
+        Velocities are uniform in [-speed_x, speed_x] and
+        [speed_y[0], speed_y[1]]; lifetimes (in frames) are uniform in
+        [life[0], life[1]]. Particles beyond capacity are dropped.
+        """
+        start = self.count
+        count = min(count, self.capacity - start)
+        if count <= 0:
+            return 0
+        end = start + count
+        random = self._random[:count]
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.rng.random(out=random)
+        np.multiply(random, 2 * speed_x, out=random)
+        np.subtract(random, speed_x, out=self.vx[start:end], casting="same_kind")
+        self.rng.random(out=random)
+        np.multiply(random, speed_y[1] - speed_y[0], out=random)
+        np.add(random, speed_y[0], out=self.vy[start:end], casting="same_kind")
+        self.rng.random(out=random)
+        np.multiply(random, life[1] - life[0] + 1, out=random)
+        np.add(random, life[0], out=random)
+        self.life[start:end] = random
+        self.color[start:end] = color
+        self.count = end
+        return count
+
+    def clear(self):
+        self.count = 0
+
+    def update(self):
+        n = self.count
+        if not n:
+            return
+        vy = self.vy[:n]
+        vy += self.gravity
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += vy
+        life = self.life[:n]
+        life -= 1
+        alive = self._alive[:n]
+        np.greater(life, 0, out=alive)
+        kept = int(np.count_nonzero(alive))
+        if kept != n:
+            # Pack the survivors back to the front of every array
+            for array in (self.x, self.y, self.vx, self.vy, self.life, self.color):
+                array[:kept] = array[:n][alive]
+            self.count = kept
+
+    def draw(self, surface, camera_x=0, camera_y=0):
+        n = self.count
+        if not n:
+            return
+        width, height = surface.get_size()
+        size = self.size
+        xs = self.x[:n].astype(np.int32)
+        ys = self.y[:n].astype(np.int32)
+        if camera_x or camera_y:
+            xs -= int(camera_x)
+            ys -= int(camera_y)
+        visible = (xs >= 0) & (ys >= 0) & (xs <= width - size) & (ys <= height - size)
+        xs = xs[visible]
+        ys = ys[visible]
+        colors = self.palette[self.color[:n][visible]]
+        pixels = pygame.surfarray.pixels3d(surface)
+        for dx in range(size):
+            for dy in range(size):
+                pixels[xs + dx, ys + dy] = colors
+        del pixels  # unlock the surface
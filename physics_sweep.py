@@ -0,0 +1,194 @@
+# physics_sweep.py
+#
+# Parameter sweep for the player controllers' tuning constants.
+#
+# Every combination of the given values becomes a Physics for the chosen
+# controller (reboot20256.8.25.py or geminiphysics4k.py). Each configuration
+# plays a few scripted input sequences on a flat floor, with no display, and
+# the runs are spread over a process pool. The results come back as a table:
+#
+#   stand apex / air   height (px) and frames in the air of a standing jump,
+#                      jump held all the way
+#   run apex / air     the same for a jump taken at full speed
+#   run dist           pixels covered during that running jump
+#   to max speed       frames from standing still to full speed
+#
+# Usage:
+#   python physics_sweep.py reboot --set GRAVITY=0.4,0.5,0.6 --set JUMP_FORCE=10,11,12
+#   python physics_sweep.py gemini --set GRAVITY=0.3,0.35 --workers 4
+
+import concurrent.futures
+import importlib.util
+import itertools
+import os
+import sys
+
+import pygame
+
+from smb3_batch import JUMP, LEFT, RIGHT, RUN
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONTROLLERS = {
+    "reboot": os.path.join(HERE, "reboot20256.8.25.py"),
+    "gemini": os.path.join(HERE, "geminiphysics4k.py"),
+}
+MAX_FRAMES = 600  # a script that hasn't finished by then gives no result
+COLUMNS = ("stand apex", "stand air", "run apex", "run air", "run dist", "to max speed")
+
+_loaded = {}  # controller name -> module, per worker process
+
+
+def load_controller(name):
+    module = _loaded.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(f"sweep_{name}", CONTROLLERS[name])
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[name] = module
+    return module
+
+
+# --- Driving a player -------------------------------------------------------
+
+def _step_reboot(player, bits, solids, blocks):
+    # Same order as that game's loop: the jump key-down event, then update
+    if bits & JUMP and not player.jump_held:
+        player.jump()
+    player.jump_held = bool(bits & JUMP)
+    keys = {
+        pygame.K_LEFT: bool(bits & LEFT),
+        pygame.K_RIGHT: bool(bits & RIGHT),
+        pygame.K_LSHIFT: bool(bits & RUN),
+        pygame.K_RSHIFT: False,
+    }
+    player.update(keys, solids, blocks)
+
+
+def _step_gemini(player, bits, solids, blocks):
+    if bits & JUMP and not player.jump_held:
+        player.jump()
+    player.jump_held = bool(bits & JUMP)
+    player.move(bool(bits & RIGHT) - bool(bits & LEFT))
+    player._update_vertical_movement(solids, blocks)
+
+
+_STEPS = {"reboot": _step_reboot, "gemini": _step_gemini}
+
+
+class Run:
+    """One player on a flat floor, stepped frame by frame from input bits."""
+
+    def __init__(self, name, overrides):
+        controller = load_controller(name)
+        self.step_player = _STEPS[name]
+        self.solids = pygame.sprite.Group(controller.Solid(-100000, 560, 200000, 40))
+        self.blocks = pygame.sprite.Group()
+        self.player = controller.Player(100, 500, physics=controller.Physics(**overrides))
+        self.frames = 0
+
+    def step(self, bits):
+        self.step_player(self.player, bits, self.solids, self.blocks)
+        self.frames += 1
+        return self.frames < MAX_FRAMES
+
+    def settle(self, bits=0):
+        """Step until the player is standing; False if it never does."""
+        while not self.player.on_ground:
+            if not self.step(bits):
+                return False
+        return True
+
+    def jump(self, bits):
+        """A jump with the key held until landing: (apex, airtime, distance)."""
+        player = self.player
+        if not self.settle(bits):
+            return None
+        bottom = player.rect.bottom
+        x = player.rect.x
+        highest = bottom
+        airtime = 0
+        self.step(bits | JUMP)
+        while not player.on_ground:
+            highest = min(highest, player.rect.bottom)
+            airtime += 1
+            if not self.step(bits | JUMP):
+                return None
+        if airtime == 0:
+            return None
+        return bottom - highest, airtime + 1, player.rect.x - x
+
+
+def measure(name, overrides):
+    """Run every script for one configuration; returns a row for COLUMNS."""
+    standing = Run(name, overrides).jump(0)
+
+    # Run right from a standstill, tracking per-frame speed
+    run = Run(name, overrides)
+    run.settle()
+    speeds = []
+    x = run.player.rect.x
+    for _ in range(120):
+        run.step(RIGHT | RUN)
+        speeds.append(run.player.rect.x - x)
+        x = run.player.rect.x
+    top_speed = max(speeds)
+    to_max_speed = speeds.index(top_speed) + 1 if top_speed > 0 else None
+    running = run.jump(RIGHT | RUN)
+
+    row = []
+    for result in (standing, running):
+        row.extend(result[:2] if result else (None, None))
+    row.append(running[2] if running else None)
+    row.append(to_max_speed)
+    return row
+
+
+def sweep(name, grid, workers=None):
+    """[(overrides, row)] for every combination in `grid` (name -> values)."""
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        rows = list(pool.map(measure, [name] * len(configs), configs))
+    return list(zip(configs, rows))
+
+
+def format_table(results):
+    names = list(results[0][0]) if results else []
+    header = names + list(COLUMNS)
+    lines = [[str(config[n]) for n in names] + ["-" if v is None else str(v) for v in row]
+             for config, row in results]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *lines)]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths))
+                     for line in [header] + lines)
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def main(argv):
+    if not argv or argv[0] not in CONTROLLERS:
+        print(f"usage: physics_sweep.py {{{'|'.join(CONTROLLERS)}}} [--set NAME=V1,V2,...] [--workers N]")
+        return 2
+    name = argv[0]
+    grid = {}
+    workers = None
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == "--set":
+            constant, _, values = next(args).partition("=")
+            grid[constant] = [parse_value(value) for value in values.split(",")]
+        elif arg == "--workers":
+            workers = int(next(args))
+
+    # Unknown constant names fail here rather than in every worker
+    load_controller(name).Physics(**{constant: values[0] for constant, values in grid.items()})
+    print(format_table(sweep(name, grid, workers)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
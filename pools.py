@@ -0,0 +1,64 @@
+# pools.py
+#
+# Object pools for short-lived sprites.
+#
+# Coins, brick debris, stomped enemies and score popups come and go
+# constantly. Instead of creating a new sprite each time and leaving the old
+# one to the garbage collector, pooled classes are handed out from a free
+# list and given back when they'd otherwise be killed.
+#
+# A pooled class must accept being constructed with no arguments and provide
+# reset(*args), which re-initializes every piece of per-use state; its
+# __init__ normally just calls reset() too. An optional on_release() hook
+# runs when the object goes back on the free list.
+
+class Pool:
+    """Free list of preallocated instances of one class."""
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0
+
+    def reserve(self, count):
+        """Make sure at least `count` instances are waiting on the free list."""
+        while len(self.free) < count:
+            self.free.append(self.cls())
+            self.created += 1
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+        else:
+            obj = self.cls()
+            self.created += 1
+        obj.reset(*args)
+        return obj
+
+    def release(self, obj):
+        obj.kill()
+        on_release = getattr(obj, "on_release", None)
+        if on_release is not None:
+            on_release()
+        self.free.append(obj)
+
+
+def pooled(cls):
+    """Class decorator: give `cls` its own Pool as `cls.pool`."""
+    cls.pool = Pool(cls)
+    return cls
+
+
+def release(sprite):
+    """Return a sprite to its pool, or just kill it if it isn't pooled."""
+    pool = getattr(sprite, "pool", None)
+    if pool is None:
+        sprite.kill()
+    else:
+        pool.release(sprite)
+
+
+def release_all(*groups):
+    for group in groups:
+        for sprite in group.sprites():
+            release(sprite)
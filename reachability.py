@@ -0,0 +1,296 @@
+# reachability.py
+#
+# Jump-reachability tables and a level solvability checker for
+# marioforeverreboot20XX.py.
+#
+# JumpTable simulates the Player's own physics (GRAVITY, JUMP_STRENGTH,
+# PLAYER_SPEED and pygame's Rect rounding, applied in Player.update's order)
+# for every way of steering a jump or a walk off a ledge, and records, per
+# move, which tile it can land on relative to where it started, how many
+# frames that takes, and which tiles the player passes through on the way
+# (they must be empty). Moves with the same target keep only the variants
+# that aren't beaten by another one that is as fast and needs no more free
+# tiles.
+#
+# solve() then runs A* over the level's tiles: a node is a solid tile the
+# player can stand on, edges are walking one tile or a move from the table,
+# costs are frames, and the heuristic is the remaining distance at full
+# speed. It proves a level can be finished (reach the goal column) and
+# returns the fastest path it found.
+#
+# The tile model is deliberately conservative: take-off is treated as
+# tile-aligned, the landing tile is the one under the player's centre, and
+# a jump is only counted if its whole path is clear (bumping a block and
+# falling somewhere useful is never relied on). A level it proves
+# completable can be finished in the game.
+#
+# Usage: python reachability.py [--seed S] [--levels N] [--chunks N]
+#   checks the game's original screen plus a world of N generated levels.
+
+import heapq
+import os
+import sys
+import time
+
+import pygame
+
+import level_gen
+
+JUMP = "jump"
+FALL = "fall"
+WALK = "walk"
+
+
+class Move:
+    __slots__ = ("kind", "dx", "dy", "frames", "clear")
+
+    def __init__(self, kind, dx, dy, frames, clear):
+        self.kind = kind
+        self.dx = dx  # landing tile, relative to the tile stood on
+        self.dy = dy  # (rows up)
+        self.frames = frames
+        self.clear = clear  # (dx, dy) tiles that must be empty
+
+
+class JumpTable:
+    """Every landing reachable by a jump or a fall, from one set of physics."""
+
+    def __init__(self, gravity, jump_strength, speed, tile_size, max_drop=14):
+        self.gravity = gravity
+        self.jump_strength = jump_strength
+        self.speed = speed
+        self.tile_size = tile_size
+        self.max_drop = max_drop  # rows below the start a fall is followed to
+        self.walk_frames = -(-tile_size // speed)
+        self.moves = {}  # (dx, dy) -> [Move], fastest first
+        for kind in (JUMP, FALL):
+            for direction in (1, -1):
+                for start, stop in self._steering():
+                    self._simulate(kind, direction, start, stop)
+        self._prune()
+
+    @classmethod
+    def from_game(cls, game):
+        """The table for a loaded game module's Player physics."""
+        return cls(game.GRAVITY, game.JUMP_STRENGTH, game.PLAYER_SPEED, game.TILE_SIZE)
+
+    def _steering(self):
+        # Hold the direction key from frame `start` until frame `stop`
+        for start in range(0, 24, 2):
+            for stop in range(start + 1, 72):
+                yield start, stop
+
+    def _simulate(self, kind, direction, start, stop):
+        tile = self.tile_size
+        rect = pygame.Rect(0, -tile, tile, tile)  # standing on tile (0, 0)
+        support = pygame.Rect(0, 0, tile, tile)
+        velocity_y = -self.jump_strength if kind == JUMP else 0
+        passed = set()
+        airborne = kind == JUMP
+        frame = 0
+        while frame < 400:
+            frame += 1
+            previous_bottom = rect.bottom
+            velocity_y += self.gravity
+            rect.y += velocity_y
+            if start <= frame - 1 < stop:
+                rect.x += direction * self.speed
+            if not airborne:
+                # Still on the ledge: gravity only pushes into it
+                if rect.colliderect(support) and velocity_y > 0:
+                    rect.bottom = support.top
+                    velocity_y = 0
+                    passed |= _cells(rect, tile)
+                    continue
+                airborne = True
+            if rect.bottom > self.max_drop * tile:
+                return
+
+            if velocity_y > 0:
+                # Rows whose top the feet crossed this frame are landings
+                for row in range(_row(previous_bottom, tile), _row(rect.bottom - 1, tile) - 1, -1):
+                    surface = -row * tile
+                    if not previous_bottom <= surface < rect.bottom:
+                        continue
+                    col = rect.centerx // tile
+                    if (col, row) == (0, 0):
+                        return  # back where it started
+                    landed = pygame.Rect(rect.x, surface - tile, tile, tile)
+                    clear = passed | _cells(landed, tile)
+                    self.moves.setdefault((col, row), []).append(
+                        Move(kind, col, row, frame, frozenset(clear)))
+            passed |= _cells(rect, tile)
+
+    def _prune(self):
+        for target, moves in self.moves.items():
+            moves.sort(key=lambda move: (move.frames, len(move.clear)))
+            kept = []
+            for move in moves:
+                if not any(other.clear <= move.clear for other in kept):
+                    kept.append(move)
+            self.moves[target] = kept
+
+    def __len__(self):
+        return sum(len(moves) for moves in self.moves.values())
+
+
+def _row(y, tile):
+    # Tile row containing pixel row y, counting up from the start tile (row 0)
+    return -(y // tile)
+
+
+def _cells(rect, tile):
+    rows = range(_row(rect.bottom - 1, tile), _row(rect.top, tile) + 1)
+    cols = range(rect.left // tile, (rect.right - 1) // tile + 1)
+    return {(col, row) for col in cols for row in rows}
+
+
+class TileGrid:
+    """The solid tiles of a level, as (col, row) with row 0 the ground row."""
+
+    def __init__(self, solid, width):
+        self.solid = solid
+        self.width = width
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        solid = set()
+        width = 0
+        for chunk in chunks:
+            solid.update((col, 0) for col in chunk.ground)
+            for col, height in chunk.pipes:
+                solid.update((col + i, row) for i in (0, 1) for row in range(height))
+            solid.update((col, row) for col, row, _, _ in chunk.blocks)
+            width = max(width, chunk.right)
+        return cls(solid, width)
+
+    @classmethod
+    def from_groups(cls, tile, ground_y, *groups):
+        """From sprite groups; tiles are counted up from the tile at ground_y."""
+        solid = set()
+        width = 0
+        for group in groups:
+            for sprite in group:
+                rect = sprite.rect
+                solid.update(_cells(rect.move(0, -ground_y), tile))
+                width = max(width, (rect.right - 1) // tile + 1)
+        return cls(solid, width)
+
+    def standable(self, col, row):
+        return (col, row) in self.solid and (col, row + 1) not in self.solid
+
+
+def solve(grid, table, start, goal_col):
+    """A* from `start` (col, row stood on) to any tile in goal_col or beyond.
+
+    Returns (frames, path) for the fastest route found, path being
+    [(col, row, how it got there)], or None if the goal can't be reached.
+    """
+    solid = grid.solid
+    speed = table.speed
+    tile = table.tile_size
+    walk = table.walk_frames
+
+    def estimate(col):
+        return max(0, goal_col - col) * tile // speed
+
+    best = {start: 0}
+    parent = {start: (None, "start")}  # node -> (previous node, how it got here)
+    queue = [(estimate(start[0]), 0, start)]
+    while queue:
+        _, frames, node = heapq.heappop(queue)
+        if frames > best.get(node, frames):
+            continue
+        col, row = node
+        if col >= goal_col:
+            path = []
+            while node is not None:
+                previous, how = parent[node]
+                path.append(node + (how,))
+                node = previous
+            return frames, path[::-1]
+
+        edges = []
+        for step in (1, -1):
+            target = (col + step, row)
+            if grid.standable(*target):
+                edges.append((target, walk, WALK))
+        for (dx, dy), moves in table.moves.items():
+            target = (col + dx, row + dy)
+            if target not in solid or (target[0], target[1] + 1) in solid:
+                continue
+            for move in moves:
+                if all((col + cx, row + cy) not in solid for cx, cy in move.clear):
+                    edges.append((target, move.frames, move.kind))
+                    break
+        for target, cost, kind in edges:
+            total = frames + cost
+            if total < best.get(target, total + 1):
+                best[target] = total
+                parent[target] = (node, kind)
+                heapq.heappush(queue, (total + estimate(target[0]), total, target))
+    return None
+
+
+def check_world(table, seed, levels, chunks_per_level):
+    """Solve `levels` generated levels of a world; [(level seed, result, seconds)]."""
+    results = []
+    for level in range(levels):
+        level_seed = seed * 1000 + level
+        chunks = [level_gen.generate_chunk(level_seed, index) for index in range(chunks_per_level)]
+        grid = TileGrid.from_chunks(chunks)
+        started = time.perf_counter()
+        start_col = 3
+        result = solve(grid, table, (start_col, 0), grid.width - 2)
+        results.append((level_seed, result, time.perf_counter() - started))
+    return results
+
+
+def main(argv):
+    seed = 1
+    levels = 8
+    chunks_per_level = 12
+    args = iter(argv)
+    for arg in args:
+        if arg == "--seed":
+            seed = int(next(args))
+        elif arg == "--levels":
+            levels = int(next(args))
+        elif arg == "--chunks":
+            chunks_per_level = int(next(args))
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import mario_env
+    game = mario_env.load_game()
+    started = time.perf_counter()
+    table = JumpTable.from_game(game)
+    print(f"jump table: {len(table)} moves to {len(table.moves)} tiles "
+          f"in {time.perf_counter() - started:.2f} s")
+
+    # The original screen: the player starts at x=100 and has to reach the
+    # right edge (the player can't leave the screen)
+    tile = game.TILE_SIZE
+    ground_y = game.SCREEN_HEIGHT - tile
+    platforms, pipes, blocks, enemies, coins = game.create_level()
+    grid = TileGrid.from_groups(tile, ground_y, platforms, pipes, blocks)
+    result = solve(grid, table, (100 // tile, 0), game.SCREEN_WIDTH // tile - 1)
+    print("original screen:", "completable" if result else "NOT completable",
+          f"({result[0]} frames)" if result else "")
+
+    started = time.perf_counter()
+    unsolved = 0
+    for level_seed, result, seconds in check_world(table, seed, levels, chunks_per_level):
+        if result is None:
+            unsolved += 1
+            print(f"level {level_seed}: NOT completable ({seconds * 1000:.0f} ms)")
+        else:
+            frames, path = result
+            jumps = sum(1 for *_, how in path if how != WALK)
+            print(f"level {level_seed}: {frames} frames, {jumps} jumps/falls ({seconds * 1000:.0f} ms)")
+    print(f"{levels} levels of {chunks_per_level} chunks checked in "
+          f"{time.perf_counter() - started:.2f} s")
+    return 1 if unsolved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -6,6 +6,10 @@
 # To run this, you need pygame: pip install pygame
 
 import pygame
+from active_set import ActiveSet
+from collision import ResponseTable, kind
+from telemetry import BLOCK_HIT, COIN, EventLog
+from timer_wheel import TimerWheel
 
 # --- Game Constants ---
 SCREEN_WIDTH = 800
@@ -32,10 +36,44 @@ RUNNING_JUMP_BOOST = 2  # Extra jump power when running
 VARIABLE_JUMP_BOOST = 0.4 # Upward force applied when jump key is held
 JUMP_TIMER_DURATION = 18 # How long the jump key can be held for extra height
 
+class Physics:
+    """One controller's tuning constants; defaults are the module constants.
+
+    Physics(GRAVITY=0.6) overrides just gravity for the players given it.
+    """
+    GRAVITY = GRAVITY
+    MAX_FALL_SPEED = MAX_FALL_SPEED
+    ACCELERATION = ACCELERATION
+    RUN_ACCELERATION = RUN_ACCELERATION
+    FRICTION = FRICTION
+    MAX_WALK_SPEED = MAX_WALK_SPEED
+    MAX_RUN_SPEED = MAX_RUN_SPEED
+    JUMP_FORCE = JUMP_FORCE
+    RUNNING_JUMP_BOOST = RUNNING_JUMP_BOOST
+    VARIABLE_JUMP_BOOST = VARIABLE_JUMP_BOOST
+    JUMP_TIMER_DURATION = JUMP_TIMER_DURATION
+
+    def __init__(self, **overrides):
+        for name, value in overrides.items():
+            if not hasattr(Physics, name):
+                raise TypeError(f"unknown physics constant {name!r}")
+            setattr(self, name, value)
+
+# --- Collision Kinds ---
+PLAYER = kind("player")
+SOLID = kind("solid")
+BUMPABLE = kind("bumpable")  # Reacts to being hit from below
+
+# --- Telemetry ---
+# Gameplay events (see telemetry.py); only written out with --telemetry PATH
+events = EventLog()
+
 # --- Stub Classes for Demonstration ---
 
 class MockSprite(pygame.sprite.Sprite):
     """A base class for our visible game objects."""
+    kinds = 0  # Collision kind flags, see `responses`
+
     def __init__(self, x, y, width, height, color):
         super().__init__()
         self.image = pygame.Surface([width, height])
@@ -44,16 +82,22 @@ class MockSprite(pygame.sprite.Sprite):
 
 class Solid(MockSprite):
     """Represents a simple, non-interactive solid platform."""
+    kinds = SOLID
+
     def __init__(self, x, y, width, height):
         super().__init__(x, y, width, height, "darkgreen")
 
 class QuestionBlock(MockSprite):
     """Represents an interactive block that can be hit from below, SMB3 style."""
-    def __init__(self, x, y):
+    kinds = SOLID | BUMPABLE
+
+    def __init__(self, x, y, timers, scheduler=None):
         super().__init__(x, y, 40, 40, "brown")
         self.original_y = y
-        self.hit_timer = 0
+        self.timers = timers  # TimerWheel that ends the bounce
+        self.hit_timer = None
         self.is_hit = False
+        self.scheduler = scheduler  # ActiveSet that updates us while animating
         self._draw_initial_state()
 
     def _draw_initial_state(self):
@@ -68,26 +112,38 @@ class QuestionBlock(MockSprite):
         if self.is_hit:
             return # Can't hit an already empty block
 
-        print("Player hit a Question Block! Coin!")
+        events.emit(BLOCK_HIT, self.rect.x, self.rect.y)
+        events.emit(COIN, self.rect.x, self.rect.y, 1)
         self.image.fill("saddlebrown") # Change to "empty" block color
-        self.hit_timer = 10 # Timer to animate a small bounce
+        self.hit_timer = self.timers.schedule(10, self.settle) # Animate a small bounce
         self.is_hit = True
+        if self.scheduler is not None:
+            self.scheduler.add(self) # Start receiving updates
 
     def update(self):
         """Update block's state, like a small bounce animation."""
-        if self.hit_timer > 0:
-            if self.hit_timer > 5:
+        remaining = self.timers.remaining(self.hit_timer)
+        if remaining > 0:
+            if remaining > 5:
                 self.rect.y -= 2
             else:
                 self.rect.y += 2
-            self.hit_timer -= 1
-        elif self.rect.y != self.original_y:
+
+    def settle(self):
+        """Called by the timer wheel when the bounce is over."""
+        self.hit_timer = None
+        if self.rect.y != self.original_y:
             self.rect.y = self.original_y
+        if self.scheduler is not None:
+            self.scheduler.discard(self) # Settled, stop updating
 
 class Player(MockSprite):
     """The player character, with SMB3-inspired movement logic."""
-    def __init__(self, x, y):
+    kinds = PLAYER
+
+    def __init__(self, x, y, physics=None):
         super().__init__(x, y, 30, 50, "cyan")
+        self.physics = physics or Physics()  # Tuning constants
 
         # Physics attributes
         self.velocity_x = 0
@@ -112,12 +168,14 @@ class Player(MockSprite):
 
     def _update_horizontal_movement(self, keys):
         """Handles acceleration, friction, and running."""
+        p = self.physics
+
         # Check for running state
         self.running = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
 
         # Determine current acceleration and max speed based on state
-        accel = RUN_ACCELERATION if self.running else ACCELERATION
-        max_speed = MAX_RUN_SPEED if self.running else MAX_WALK_SPEED
+        accel = p.RUN_ACCELERATION if self.running else p.ACCELERATION
+        max_speed = p.MAX_RUN_SPEED if self.running else p.MAX_WALK_SPEED
 
         # Apply acceleration based on key presses
         if keys[pygame.K_LEFT]:
@@ -127,10 +185,10 @@ class Player(MockSprite):
 
         # Apply friction if no direction is held
         if not keys[pygame.K_LEFT] and not keys[pygame.K_RIGHT]:
-            if self.velocity_x > FRICTION:
-                self.velocity_x -= FRICTION
-            elif self.velocity_x < -FRICTION:
-                self.velocity_x += FRICTION
+            if self.velocity_x > p.FRICTION:
+                self.velocity_x -= p.FRICTION
+            elif self.velocity_x < -p.FRICTION:
+                self.velocity_x += p.FRICTION
             else:
                 self.velocity_x = 0
 
@@ -145,16 +203,18 @@ class Player(MockSprite):
 
     def _update_vertical_movement(self, solids, blocks):
         """Handles all vertical movement, gravity, and collision."""
+        p = self.physics
+
         # --- 1. Update Velocity ---
         # Apply normal gravity
-        self.velocity_y += GRAVITY
+        self.velocity_y += p.GRAVITY
         # Cap fall speed
-        if self.velocity_y > MAX_FALL_SPEED:
-            self.velocity_y = MAX_FALL_SPEED
+        if self.velocity_y > p.MAX_FALL_SPEED:
+            self.velocity_y = p.MAX_FALL_SPEED
 
         # SMB3-style variable jump height
         if self.jump_held and self.jump_timer > 0:
-            self.velocity_y -= VARIABLE_JUMP_BOOST
+            self.velocity_y -= p.VARIABLE_JUMP_BOOST
             self.jump_timer -= 1
 
         # --- 2. Apply Vertical Movement & Check for Collisions ---
@@ -186,24 +246,47 @@ class Player(MockSprite):
                     self.velocity_y = 0
                     self.jump_timer = 0
 
-                    # Check if the platform is interactive (has a 'hit' method)
-                    if hasattr(ceiling_platform, 'hit'):
-                        ceiling_platform.hit(self)
+                    # Let the platform react to being hit, if its kind does
+                    responses.respond(ceiling_platform, self)
 
     def jump(self):
         """Initiates a jump."""
         if self.on_ground:
-            self.velocity_y = -JUMP_FORCE
+            p = self.physics
+            self.velocity_y = -p.JUMP_FORCE
             # SMB3: Running jumps are higher!
             if self.running:
-                self.velocity_y -= RUNNING_JUMP_BOOST
+                self.velocity_y -= p.RUNNING_JUMP_BOOST
             
-            self.jump_timer = JUMP_TIMER_DURATION
+            self.jump_timer = p.JUMP_TIMER_DURATION
             self.on_ground = False
 
+# --- Collision Responses ---
+responses = ResponseTable()
+responses.on(BUMPABLE, PLAYER, QuestionBlock.hit) # Hit from below
+
+# --- Level ---
+def create_level(timers, scheduler=None):
+    """Builds the demo level; returns the (solids, blocks) groups."""
+    solids = pygame.sprite.Group()
+    solids.add(Solid(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40))
+    solids.add(Solid(200, 450, 150, 20))
+    solids.add(Solid(400, 350, 150, 20))
+    solids.add(Solid(0, 200, 300, 20))
+
+    blocks = pygame.sprite.Group()
+    blocks.add(QuestionBlock(455, 250, timers, scheduler))
+    blocks.add(QuestionBlock(495, 250, timers, scheduler))
+    return solids, blocks
+
 # --- Main Game Setup ---
-def main():
+def main(argv=()):
     """Main game loop for demonstration."""
+    args = iter(argv)
+    for arg in args:
+        if arg == "--telemetry":
+            events.open(next(args))
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("SMB3 Physics - Arrows to Move, Space to Jump, L-Shift to Run")
@@ -211,16 +294,12 @@ def main():
 
     # Create game objects
     player = Player(100, 500)
-    
-    solids = pygame.sprite.Group()
-    solids.add(Solid(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40))
-    solids.add(Solid(200, 450, 150, 20))
-    solids.add(Solid(400, 350, 150, 20))
-    solids.add(Solid(0, 200, 300, 20))
 
-    blocks = pygame.sprite.Group()
-    blocks.add(QuestionBlock(455, 250))
-    blocks.add(QuestionBlock(495, 250))
+    # Only blocks that are currently animating get updated each frame;
+    # countdowns live in the timer wheel
+    scheduler = ActiveSet()
+    timers = TimerWheel()
+    solids, blocks = create_level(timers, scheduler)
 
     all_sprites = pygame.sprite.Group(player, solids, blocks)
 
@@ -241,8 +320,10 @@ def main():
                     player.jump_held = False
 
         # --- Update ---
+        timers.advance()
+        events.next_frame()
         player.update(keys, solids, blocks)
-        blocks.update()
+        scheduler.update()
 
         # --- Drawing ---
         screen.fill(SKY_BLUE)
@@ -252,7 +333,9 @@ def main():
         # --- Frame Rate ---
         clock.tick(FPS)
 
+    events.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
+    import sys
+    main(sys.argv[1:])
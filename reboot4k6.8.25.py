@@ -3,14 +3,27 @@ import pygame
 import sys
 import random
 from pygame.locals import *
+import aabb_tree
+import activation
+import bitmap_text
+import broadphase
+import collision
+import level_file
+import level_gen
+import sound
+import timer_wheel
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+TILE_SIZE = 32
 GRAVITY = 0.5
 JUMP_STRENGTH = 12
 SCROLL_THRESH = 200
+WAKE_MARGIN = 64
+SLEEP_MARGIN = 160
+DESPAWN_MARGIN = SCREEN_WIDTH
 FONT_SIZE = 24
 
 # Initialize Pygame
@@ -18,30 +31,53 @@ pygame.init()
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Mario Forever: Community Edition")
 clock = pygame.time.Clock()
-font = pygame.font.SysFont(None, FONT_SIZE)
 
-# Sound manager placeholder
+# Sound effects: decoded once in main(), played on per-category channels
+sounds = sound.SoundBank()
+
 def play_sfx(name):
-    # Implement actual sound loading/playing logic
-    pass
+    sounds.play(name)
+
+# Countdowns (jump boost, invincibility); advanced once per frame
+timers = timer_wheel.TimerWheel()
+
+# Collision kinds (see collision.py); each sprite class declares its own
+PLAYER = collision.kind('player')
+ENEMY = collision.kind('enemy')
+COIN = collision.kind('coin')
+ITEM = collision.kind('item')
+BUMPABLE = collision.kind('bumpable')  # reacts to being hit from below
+STOMPABLE = collision.kind('stompable')
+GROWS = collision.kind('grows')  # power-up that makes the player big
 
 # Base sprite classes
-class Block(pygame.sprite.Sprite):
+class Ground(pygame.sprite.Sprite):
+    kinds = 0  # plain solid: ground, pipes, platforms
     def __init__(self, pos, image):
         super().__init__()
         self.image = image
         self.rect = self.image.get_rect(topleft=pos)
+
+class Block(pygame.sprite.Sprite):
+    kinds = BUMPABLE
+    def __init__(self, pos, image, content=None):
+        super().__init__()
+        self.image = image
+        self.rect = self.image.get_rect(topleft=pos)
+        self.content = content  # 'coin', 'mushroom' or None
     def hit(self, player, level):
         # Example: spawn coin or item
         pass
 
 class Coin(pygame.sprite.Sprite):
+    kinds = COIN
     def __init__(self, pos, image):
         super().__init__()
         self.image = image
         self.rect = self.image.get_rect(center=pos)
 
 class Item(pygame.sprite.Sprite):
+    kinds = ITEM | GROWS
     def __init__(self, pos, image):
         super().__init__()
         self.image = image
@@ -51,6 +87,7 @@ class Item(pygame.sprite.Sprite):
         pass
 
 class Enemy(pygame.sprite.Sprite):
+    kinds = ENEMY | STOMPABLE
     def __init__(self, pos, image):
         super().__init__()
         self.image = image
@@ -60,13 +97,20 @@ class Enemy(pygame.sprite.Sprite):
     def update(self, solids):
         if self.dead: return
         self.rect.x += self.velocity_x
-        for s in pygame.sprite.spritecollide(self, solids, False):
+        for s in aabb_tree.spritecollide(self, solids, False):
             self.velocity_x *= -1
+    def bump_into(self, other):
+        # Enemies that walk into each other both turn around
+        if self.rect.centerx < other.rect.centerx:
+            self.velocity_x, other.velocity_x = -abs(self.velocity_x), abs(other.velocity_x)
+        else:
+            self.velocity_x, other.velocity_x = abs(self.velocity_x), -abs(other.velocity_x)
     def stomp(self):
         self.dead = True
         self.kill()
 
 class Player(pygame.sprite.Sprite):
+    kinds = PLAYER
     def __init__(self, pos, images):
         super().__init__()
         self.images = images
@@ -77,16 +121,16 @@ class Player(pygame.sprite.Sprite):
         self.direction = 'right'
         self.on_ground = False
         self.jump_held = False
-        self.jump_timer = 0
+        self.jump_timer = None  # Timer while the jump boost lasts
         self.coins = 0
         self.score = 0
         self.lives = 3
         self.power_up = 0
-        self.invincible = 0
+        self.invincible = None  # Timer while invincible
         self.is_dying = False
         self.is_sliding_pole = False
 
-    def update(self, solids, enemies, items, blocks, level):
+    def update(self, solids, blocks, level):
         if self.is_dying:
             self.rect.y += self.velocity_y
             self.velocity_y += GRAVITY
@@ -99,125 +143,389 @@ class Player(pygame.sprite.Sprite):
             return
         # Horizontal movement
         self.rect.x += self.velocity_x
-        for s in pygame.sprite.spritecollide(self, solids, False):
+        for s in aabb_tree.spritecollide(self, solids, False):
             if self.velocity_x > 0:
                 self.rect.right = s.rect.left
             elif self.velocity_x < 0:
                 self.rect.left = s.rect.right
         # Vertical movement
         self.velocity_y += GRAVITY
-        if self.jump_held and self.jump_timer > 0:
+        if self.jump_held and self.jump_timer:
             self.velocity_y -= 0.5
-            self.jump_timer -= 1
         self.rect.y += self.velocity_y
         self.on_ground = False
-        for s in pygame.sprite.spritecollide(self, solids, False):
+        for s in aabb_tree.spritecollide(self, solids, False):
             if self.velocity_y > 0:
                 self.rect.bottom = s.rect.top
                 self.on_ground = True
                 self.velocity_y = 0
-                self.jump_timer = 0
+                self.end_jump_boost()
             elif self.velocity_y < 0:
                 self.rect.top = s.rect.bottom
                 self.velocity_y = 0
-                self.jump_timer = 0
-                if hasattr(s, 'hit'):
-                    s.hit(self, level)
-        # Coins
-        for coin in pygame.sprite.spritecollide(self, level['coins'], True):
-            self.coins += 1
-            self.score += 200
-            if self.coins >= 100:
-                self.coins = 0
-                self.lives += 1
-                play_sfx('1up')
-        # Items
-        for item in pygame.sprite.spritecollide(self, items, True):
-            play_sfx('powerup')
-            self.score += 1000
-            if hasattr(item, 'grow') and self.power_up == 0:
-                item.grow()
-                self.power_up = 1
-        # Enemy collisions
-        if self.invincible <= 0:
-            for e in pygame.sprite.spritecollide(self, enemies, False):
-                if hasattr(e, 'dead') and e.dead:
-                    continue
-                if self.velocity_y > 0 and self.rect.bottom < e.rect.centery + 10:
-                    play_sfx('stomp')
-                    if hasattr(e, 'stomp'):
-                        e.stomp()
-                    self.velocity_y = -JUMP_STRENGTH / 2
-                    self.score += 100
-                else:
-                    self.take_damage()
+                self.end_jump_boost()
+                ceiling_hits.respond(self, s, level)
+        # Coins, items and enemies touching us, from the broadphase
+        contacts = level['contacts']
+        contacts.update()
+        for _, coin in contacts.pairs(PLAYER, COIN):
+            responses.respond(self, coin)
+        for _, item in contacts.pairs(PLAYER, ITEM):
+            responses.respond(self, item)
+        if not self.invincible:
+            for _, e in contacts.pairs(PLAYER, ENEMY):
+                responses.respond(self, e)
         # Animation & invincibility flicker
         self._animate()
-        if self.invincible > 0:
-            self.invincible -= 1
-            self.image.set_alpha(128 if self.invincible % 10 < 5 else 255)
+        if self.invincible:
+            remaining = timers.remaining(self.invincible) - 1
+            self.image.set_alpha(128 if remaining % 10 < 5 else 255)
         else:
             self.image.set_alpha(255)
         # Fall off
         if self.rect.top > SCREEN_HEIGHT + 100:
             self.take_damage()
 
+    def collect_coin(self, coin):
+        coin.kill()
+        play_sfx('coin')
+        self.coins += 1
+        self.score += 200
+        if self.coins >= 100:
+            self.coins = 0
+            self.lives += 1
+            play_sfx('1up')
+
+    def collect_item(self, item):
+        item.kill()
+        play_sfx('powerup')
+        self.score += 1000
+
+    def grow(self, item):
+        if self.power_up == 0:
+            item.grow()
+            self.power_up = 1
+
+    def touch_enemy(self, e):
+        if e.dead:
+            return
+        if self.velocity_y > 0 and self.rect.bottom < e.rect.centery + 10:
+            play_sfx('stomp')
+            if e.kinds & STOMPABLE:
+                e.stomp()
+            self.velocity_y = -JUMP_STRENGTH / 2
+            self.score += 100
+        else:
+            self.take_damage()
+
+    def bump_block(self, block, level):
+        play_sfx('bump')
+        block.hit(self, level)
+
     def take_damage(self):
-        if self.invincible > 0 or self.is_dying:
+        if self.invincible or self.is_dying:
             return
         self.lives -= 1
         if self.lives < 0:
             self.is_dying = True
+            play_sfx('die')
             self.velocity_y = -JUMP_STRENGTH
         else:
-            self.invincible = 120
+            self.invincible = timers.schedule(120, self.end_invincible)
+
+    def end_invincible(self):
+        self.invincible = None
+
+    def start_jump_boost(self, ticks):
+        # The boost runs while jump is held, for at most `ticks` frames; it
+        # can only start on the ground, so holding never resumes mid-air
+        self.end_jump_boost()
+        self.jump_timer = timers.schedule(ticks, self.end_jump_boost)
+
+    def end_jump_boost(self):
+        if self.jump_timer:
+            self.jump_timer.cancel()
+        self.jump_timer = None
 
     def _animate(self):
         # Placeholder for animation logic
         pass
 
+# Collision responses by kind (fire counts: responses.report())
+responses = collision.ResponseTable()
+responses.on(PLAYER, COIN, Player.collect_coin)
+responses.on(PLAYER, ITEM, Player.collect_item)
+responses.on(PLAYER, GROWS, Player.grow)
+responses.on(PLAYER, ENEMY, Player.touch_enemy)
+responses.on(ENEMY, ENEMY, Enemy.bump_into)
+# Solids the player hits from below
+ceiling_hits = collision.ResponseTable()
+ceiling_hits.on(PLAYER, BUMPABLE, Player.bump_block)
+
+# Camera-aware draw index
+class ViewIndex:
+    """Buckets static sprites into fixed-width columns by rect.left so the
+    camera can fetch just the sprites that overlap the screen."""
+    def __init__(self, column_width=SCREEN_WIDTH // 4):
+        self.column_width = column_width
+        self.columns = {}
+        self.max_width = 0
+    def add(self, sprite):
+        column = sprite.rect.left // self.column_width
+        self.columns.setdefault(column, []).append(sprite)
+        self.max_width = max(self.max_width, sprite.rect.width)
+    def discard(self, sprite):
+        column = self.columns.get(sprite.rect.left // self.column_width)
+        if column and sprite in column:
+            column.remove(sprite)
+    def query(self, left, width):
+        right = left + width
+        first = int(left - self.max_width) // self.column_width
+        last = int(right) // self.column_width
+        visible = []
+        for column in range(first, last + 1):
+            for sprite in self.columns.get(column, ()):
+                rect = sprite.rect
+                if rect.right > left and rect.left < right and sprite.alive():
+                    visible.append(sprite)
+        return visible
+
+def build_view_index(level):
+    # Everything that doesn't move goes in the index; items and the player
+    # are few and are culled individually each frame, and only awake
+    # enemies can be on screen
+    view = ViewIndex()
+    moving = set(level['enemies']) | set(level['items'])
+    for sprite in level['all_sprites']:
+        if sprite not in moving and sprite is not level['player']:
+            view.add(sprite)
+    return view
+
+def visible_sprites(level, camera_x):
+    visible = level['view'].query(camera_x, SCREEN_WIDTH)
+    right = camera_x + SCREEN_WIDTH
+    for group in (level['items'], level['zones'].awake):
+        for sprite in group:
+            if sprite.rect.right > camera_x and sprite.rect.left < right and sprite.alive():
+                visible.append(sprite)
+    return visible
+
 # Level creation & HUD
-def create_level():
+tile_images = {}
+
+def make_tile_images():
+    # Flat-colored stand-ins, made once
+    if not tile_images:
+        for name, size, color in (
+                ('ground', (TILE_SIZE, TILE_SIZE), (180, 122, 48)),
+                ('brick', (TILE_SIZE, TILE_SIZE), (200, 76, 12)),
+                ('question', (TILE_SIZE, TILE_SIZE), (252, 188, 24)),
+                ('coin', (TILE_SIZE // 2, TILE_SIZE // 2), (252, 216, 0)),
+                ('enemy', (TILE_SIZE, TILE_SIZE), (180, 92, 0))):
+            tile_images[name] = pygame.Surface(size)
+            tile_images[name].fill(color)
+        for height in range(1, 5):
+            pipe = tile_images[f'pipe_{height}'] = pygame.Surface((TILE_SIZE * 3 // 2, TILE_SIZE * height))
+            pipe.fill((0, 168, 0))
+        tile_images['pipe'] = pygame.Surface((TILE_SIZE, TILE_SIZE))  # one tile of a level file's pipe
+        tile_images['pipe'].fill((0, 168, 0))
+    return tile_images
+
+def build_chunk(level, chunk):
+    # Adds a generated chunk (see level_gen.py); returns what unload_chunk
+    # takes out again. Enemies aren't included: the zones despawn them, so
+    # they're only spawned the first time a chunk is built. A chunk built
+    # again after scrolling back leaves out the coins and blocks used up
+    # before it was unloaded (level['spent']).
+    images = make_tile_images()
+    ground_y = SCREEN_HEIGHT - TILE_SIZE
+    spent = level['spent'].get(chunk.index)
+    coins_taken, block_contents = spent or ((), {})
+    built = []
+    used = []  # (cell, sprite) for what the player can use up
+    def place(sprite, *groups):
+        for group in groups:
+            group.add(sprite)
+        level['all_sprites'].add(sprite)
+        return sprite
+    for col in chunk.ground:
+        built.append(place(Ground((col * TILE_SIZE, ground_y), images['ground']), level['solids']))
+    for col, height in chunk.pipes:
+        pos = (col * TILE_SIZE, ground_y - (height - 1) * TILE_SIZE)
+        built.append(place(Ground(pos, images[f'pipe_{height}']), level['solids']))
+    for col, row, block_type, content in chunk.blocks:
+        pos = (col * TILE_SIZE, ground_y - row * TILE_SIZE)
+        if block_type == 'ground':
+            built.append(place(Ground(pos, images['ground']), level['solids']))
+            continue
+        content = None if content == 'none' else content
+        content = block_contents.get((col, row), content)
+        if content == 'broken':
+            continue
+        block = place(Block(pos, images[block_type], content), level['solids'], level['blocks'])
+        built.append(block)
+        used.append(((col, row), block))
+    for col, row in chunk.coins:
+        if (col, row) in coins_taken:
+            continue
+        pos = (col * TILE_SIZE + TILE_SIZE // 2, ground_y - row * TILE_SIZE + TILE_SIZE // 2)
+        coin = place(Coin(pos, images['coin']), level['coins'])
+        level['contacts'].add(coin, COIN)
+        built.append(coin)
+        used.append(((col, row), coin))
+    for sprite in built:
+        level['view'].add(sprite)
+    if spent is None:
+        for col, row in chunk.enemies:
+            enemy = place(Enemy((col * TILE_SIZE, ground_y - row * TILE_SIZE), images['enemy']),
+                          level['enemies'])
+            level['contacts'].add(enemy, ENEMY)
+            level['zones'].add(enemy)
+    return chunk.index, built, used, spent
+
+def unload_chunk(level, built):
+    # Remembers what was used up, for build_chunk to leave out next time
+    index, sprites, used, spent = built
+    coins_taken, block_contents = spent or (set(), {})
+    for cell, sprite in used:
+        if isinstance(sprite, Coin):
+            if not sprite.alive():
+                coins_taken.add(cell)
+        else:
+            block_contents[cell] = sprite.content if sprite.alive() else 'broken'
+    level['spent'][index] = (coins_taken, block_contents)
+    for sprite in sprites:
+        level['view'].discard(sprite)
+        sprite.kill()
+
+def build_tile(level, col, row, char):
+    # One tile of a level file (see level_file.py); returns its sprite
+    images = make_tile_images()
+    kind, content = level_file.TILES[char]
+    pos = (col * TILE_SIZE, SCREEN_HEIGHT - TILE_SIZE - row * TILE_SIZE)
+    if kind == 'enemy':
+        enemy = Enemy(pos, images['enemy'])
+        level['enemies'].add(enemy)
+        level['all_sprites'].add(enemy)
+        level['contacts'].add(enemy, ENEMY)
+        level['zones'].add(enemy)
+        return enemy
+    if kind == 'coin':
+        sprite = Coin((pos[0] + TILE_SIZE // 2, pos[1] + TILE_SIZE // 2), images['coin'])
+        level['coins'].add(sprite)
+        level['contacts'].add(sprite, COIN)
+    elif kind in ('brick', 'question'):
+        sprite = Block(pos, images[kind], content)
+        level['solids'].add(sprite)
+        level['blocks'].add(sprite)
+    else:
+        sprite = Ground(pos, images[kind])
+        level['solids'].add(sprite)
+    level['all_sprites'].add(sprite)
+    level['view'].add(sprite)
+    return sprite
+
+def apply_level_diff(level, removed, added):
+    # Hot reload: only the tiles that changed are taken out and rebuilt, and
+    # the indexes (solids tree, view columns, broadphase, zones) are updated
+    # per sprite; the player and the rest of the level carry on as they are
+    tiles = level['tiles']
+    for cell in removed:
+        sprite = tiles.pop(cell, None)
+        if sprite is not None:
+            level['view'].discard(sprite)
+            sprite.kill()  # also leaves the tree, broadphase and zones
+    for (col, row), char in added.items():
+        tiles[col, row] = build_tile(level, col, row, char)
+
+def create_level(seed=None, path=None):
+    # An endless generated level, built just ahead of the camera, or the
+    # level file at `path`, reloaded whenever it changes
+    if seed is None:
+        seed = random.randrange(1 << 32)
     level = {
-        'solids': pygame.sprite.Group(),
+        'solids': aabb_tree.AABBTreeGroup(),  # indexed for spritecollide
         'enemies': pygame.sprite.Group(),
         'items': pygame.sprite.Group(),
         'blocks': pygame.sprite.Group(),
         'coins': pygame.sprite.Group(),
         'all_sprites': pygame.sprite.Group(),
-        'player': None
+        'player': None,
+        'seed': seed,
+        'spent': {}  # unloaded chunk index -> (coins taken, {block cell: content})
     }
     # Populate level with sprites
     # ... (load images, create Block, Coin, Item, Enemy instances, add to groups)
+    level['view'] = build_view_index(level)
+    # Moving and collectable sprites go through a sort-and-sweep broadphase
+    level['contacts'] = broadphase.SweepAndPrune((
+        (PLAYER, ENEMY), (PLAYER, COIN), (PLAYER, ITEM), (ENEMY, ENEMY)))
+    for kind, group in ((ENEMY, level['enemies']), (COIN, level['coins']), (ITEM, level['items'])):
+        for sprite in group:
+            level['contacts'].add(sprite, kind)
+    # Enemies sleep until the camera gets near them (see activation.py)
+    level['zones'] = activation.ActivationZones(WAKE_MARGIN, SLEEP_MARGIN, DESPAWN_MARGIN)
+    for enemy in level['enemies']:
+        level['zones'].add(enemy)
+    if path is None:
+        level['stream'] = level_gen.LevelStream(
+            level_gen.chunks(seed), TILE_SIZE,
+            lambda chunk: build_chunk(level, chunk), lambda built: unload_chunk(level, built),
+            ahead=SCREEN_WIDTH // 2, behind=SCREEN_WIDTH,
+            chunk_at=lambda index: level_gen.generate_chunk(seed, index))
+        level['stream'].update(0, SCREEN_WIDTH)
+        level['watch'] = None
+    else:
+        level['stream'] = None
+        level['watch'] = level_file.LevelWatcher(path)
+        level['tiles'] = {}  # (col, row) -> sprite
+        apply_level_diff(level, {}, level['watch'].cells())
     return level
 
 def draw_hud(player):
-    hud_surface = font.render(f"Score: {player.score}   Coins: {player.coins}   Lives: {player.lives}", True, (255,255,255))
-    screen.blit(hud_surface, (20, 20))
+    hud_text = bitmap_text.get_atlas(FONT_SIZE, (255,255,255))
+    x = hud_text.render_to(screen, (20, 20), "Score: ").right
+    x = hud_text.draw_number(screen, (x, 20), player.score).right
+    x = hud_text.render_to(screen, (x, 20), "   Coins: ").right
+    x = hud_text.draw_number(screen, (x, 20), player.coins).right
+    x = hud_text.render_to(screen, (x, 20), "   Lives: ").right
+    hud_text.draw_number(screen, (x, 20), player.lives)
 
 # Main loop
-def main():
+#   --level PATH  play a level file, applying edits to it as it's saved
+def main(argv=()):
+    path = None
+    args = iter(argv)
+    for arg in args:
+        if arg == '--level':
+            path = next(args)
+
     images = {
         'stand_right': pygame.Surface((32, 64)),
         'slide_right': pygame.Surface((32, 64)),
         'slide_left': pygame.Surface((32, 64))
     }
-    level = create_level()
+    sounds.load()
+    level = create_level(path=path)
     player = Player((100, 100), images)
     level['all_sprites'].add(player)
+    level['player'] = player
+    level['contacts'].add(player, PLAYER)
 
     camera_x = 0
     running = True
     while running:
         dt = clock.tick(FPS)
+        timers.advance()
         for event in pygame.event.get():
             if event.type == QUIT:
                 running = False
             elif event.type == KEYDOWN:
                 if event.key == K_SPACE and player.on_ground:
+                    play_sfx('jump')
                     player.velocity_y = -JUMP_STRENGTH
                     player.jump_held = True
-                    player.jump_timer = 10
+                    player.start_jump_boost(10)
                 if event.key in (K_LEFT, K_RIGHT):
                     player.direction = 'left' if event.key == K_LEFT else 'right'
             elif event.type == KEYUP:
@@ -230,20 +538,33 @@ def main():
         if keys[K_LEFT]: player.velocity_x = -5
         if keys[K_RIGHT]: player.velocity_x = 5
 
+        # Edits to the level file, before anything collides with it
+        if level['watch'] is not None:
+            changes = level['watch'].poll()
+            if changes:
+                apply_level_diff(level, *changes)
+
         # Update
-        player.update(level['solids'], level['enemies'], level['items'], level['blocks'], level)
-        level['enemies'].update(level['solids'])
+        sounds.next_frame()
+        player.update(level['solids'], level['blocks'], level)
+        level['zones'].update(camera_x, SCREEN_WIDTH)
+        level['zones'].update_awake(level['solids'])
+        for enemy, other in level['contacts'].pairs(ENEMY, ENEMY):
+            responses.respond(enemy, other)
 
         # Camera scrolling
         if player.rect.centerx - camera_x > SCROLL_THRESH:
             camera_x = player.rect.centerx - SCROLL_THRESH
         elif player.rect.centerx - camera_x < SCROLL_THRESH / 2:
             camera_x = player.rect.centerx - SCROLL_THRESH / 2
+        if level['stream'] is not None:
+            level['stream'].update(camera_x, SCREEN_WIDTH)
 
         # Draw
         screen.fill((0,0,0))
-        for sprite in level['all_sprites']:
-            screen.blit(sprite.image, (sprite.rect.x - camera_x, sprite.rect.y))
+        draw_list = [(s.image, (s.rect.x - camera_x, s.rect.y)) for s in visible_sprites(level, camera_x)]
+        draw_list.append((player.image, (player.rect.x - camera_x, player.rect.y)))
+        screen.blits(draw_list, doreturn=False)
         draw_hud(player)
         pygame.display.flip()
 
@@ -251,4 +572,4 @@ def main():
     sys.exit()
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
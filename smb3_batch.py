@@ -0,0 +1,213 @@
+# smb3_batch.py
+#
+# Lockstep NumPy version of the SMB3 player controller in
+# reboot20256.8.25.py, for running thousands of players at once (population
+# tuning, agent rollouts).
+#
+# PlayerBatch holds N independent players as arrays (position, velocity,
+# on-ground, running, jump timer) and advances all of them one frame per
+# step() from an array of per-player input bitmasks. The arithmetic is the
+# scalar controller's, operation for operation and in float64, so each
+# player follows exactly the path a Player would given the same inputs on
+# the same level.
+#
+# The level is static: every solid, including question blocks, is a fixed
+# rectangle. Players don't see each other's block bounces; instead step()
+# records which solid each player hit from below (ceiling_hit), so a caller
+# can react to it.
+#
+# Usage: python smb3_batch.py [--players N] [--frames N] [--seed N]
+#   checks the batch against the scalar controller on the demo level and
+#   reports players-frames per second.
+
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+
+CONTROLLER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reboot20256.8.25.py")
+
+# Input bits, one int per player per frame
+LEFT = 1
+RIGHT = 2
+RUN = 4
+JUMP = 8  # held; the frame it goes down is the jump press
+
+
+def load_controller():
+    """The scalar controller module (its file name isn't importable)."""
+    spec = importlib.util.spec_from_file_location("reboot2025", CONTROLLER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PlayerBatch:
+    """N players over one static level, advanced together."""
+
+    def __init__(self, count, solids, x, y, width, height, physics):
+        """`solids` are rects (anything with left/top/right/bottom), in the
+        order the scalar controller sees them; `physics` is the controller's
+        Physics, shared by the whole batch."""
+        self.count = count
+        self.width = width
+        self.height = height
+        self.physics = physics
+        rects = np.array([(r.left, r.top, r.right, r.bottom) for r in solids], np.int64).reshape(-1, 4)
+        self.solid_left, self.solid_top, self.solid_right, self.solid_bottom = rects.T.copy()
+
+        self.x = np.full(count, x, np.int64)
+        self.y = np.full(count, y, np.int64)
+        self.velocity_x = np.zeros(count)
+        self.velocity_y = np.zeros(count)
+        self.on_ground = np.zeros(count, np.bool_)
+        self.running = np.zeros(count, np.bool_)
+        self.jump_held = np.zeros(count, np.bool_)
+        self.jump_timer = np.zeros(count, np.int64)
+        self.ceiling_hit = np.full(count, -1, np.int64)  # solid index hit from below this frame
+
+    def step(self, inputs):
+        """Advance every player one frame; inputs[i] is player i's bitmask."""
+        p = self.physics
+        inputs = np.asarray(inputs)
+        left = (inputs & LEFT) != 0
+        right = (inputs & RIGHT) != 0
+        jump = (inputs & JUMP) != 0
+
+        # Jump press (the key-down event comes before the update, and uses
+        # last frame's on_ground/running)
+        start = jump & ~self.jump_held & self.on_ground
+        if start.any():
+            self.velocity_y[start] = np.where(
+                self.running[start], -p.JUMP_FORCE - p.RUNNING_JUMP_BOOST, -p.JUMP_FORCE)
+            self.jump_timer[start] = p.JUMP_TIMER_DURATION
+            self.on_ground[start] = False
+        self.jump_held = jump
+
+        # Horizontal: acceleration, friction, speed cap
+        running = self.running = (inputs & RUN) != 0
+        accel = np.where(running, p.RUN_ACCELERATION, p.ACCELERATION)
+        max_speed = np.where(running, p.MAX_RUN_SPEED, p.MAX_WALK_SPEED)
+        vx = self.velocity_x
+        vx = np.where(left, vx - accel, vx)
+        vx = np.where(right, vx + accel, vx)
+        friction = p.FRICTION
+        coasting = ~left & ~right
+        vx = np.where(coasting,
+                      np.where(vx > friction, vx - friction,
+                               np.where(vx < -friction, vx + friction, 0.0)),
+                      vx)
+        vx = np.where(vx > max_speed, max_speed, vx)
+        vx = np.where(vx < -max_speed, -max_speed, vx)
+        self.velocity_x = vx
+        self.x += np.trunc(vx).astype(np.int64)
+
+        # Vertical: gravity, fall cap, variable jump
+        vy = self.velocity_y + p.GRAVITY
+        vy = np.where(vy > p.MAX_FALL_SPEED, p.MAX_FALL_SPEED, vy)
+        boost = self.jump_held & (self.jump_timer > 0)
+        vy = np.where(boost, vy - p.VARIABLE_JUMP_BOOST, vy)
+        self.jump_timer -= boost
+        self.y += np.trunc(vy).astype(np.int64)
+        self.on_ground[:] = False
+        self.ceiling_hit[:] = -1
+
+        # Collisions against every solid (Rect.colliderect)
+        x = self.x[:, None]
+        y = self.y[:, None]
+        overlap = ((x < self.solid_right) & (x + self.width > self.solid_left)
+                   & (y < self.solid_bottom) & (y + self.height > self.solid_top))
+        touching = overlap.any(axis=1)
+        if touching.any():
+            # Falling: land on the highest top
+            down = touching & (vy > 0)
+            if down.any():
+                tops = np.where(overlap[down], self.solid_top, np.iinfo(np.int64).max).min(axis=1)
+                self.y[down] = tops - self.height
+                self.on_ground[down] = True
+                vy[down] = 0
+                self.jump_timer[down] = 0
+            # Rising: stop under the lowest bottom
+            up = touching & (vy < 0)
+            if up.any():
+                hit = np.where(overlap[up], self.solid_bottom, np.iinfo(np.int64).min).argmax(axis=1)
+                self.y[up] = self.solid_bottom[hit]
+                vy[up] = 0
+                self.jump_timer[up] = 0
+                self.ceiling_hit[up] = hit
+        self.velocity_y = vy
+
+
+def check(players, frames, seed):
+    """Run `players` random input streams through both controllers; returns
+    the first mismatch as (frame, player) or None, plus the batch's time."""
+    import collections
+
+    import pygame
+
+    controller = load_controller()
+    pygame.font.init()
+    timers = controller.TimerWheel()
+    solids, blocks = controller.create_level(timers)
+    rects = [sprite.rect for sprite in solids] + [sprite.rect for sprite in blocks]
+    # The scalar players get the blocks as plain solids too: no bounces
+    static = pygame.sprite.Group(*(controller.Solid(r.x, r.y, r.width, r.height) for r in rects))
+    physics = controller.Physics()
+    scalar = [controller.Player(100, 500, physics) for _ in range(players)]
+    width, height = scalar[0].rect.size
+    batch = PlayerBatch(players, rects, 100, 500, width, height, physics)
+
+    # Inputs change every few frames, like a player's would
+    rng = np.random.default_rng(seed)
+    inputs = rng.integers(0, 16, (frames // 8 + 1, players)).repeat(8, axis=0)[:frames]
+    elapsed = 0.0
+    for frame in range(frames):
+        started = time.perf_counter()
+        batch.step(inputs[frame])
+        elapsed += time.perf_counter() - started
+        for i, player in enumerate(scalar):
+            bits = int(inputs[frame, i])
+            keys = collections.defaultdict(bool)
+            keys[pygame.K_LEFT] = bool(bits & LEFT)
+            keys[pygame.K_RIGHT] = bool(bits & RIGHT)
+            keys[pygame.K_LSHIFT] = bool(bits & RUN)
+            if bits & JUMP and not player.jump_held:
+                player.jump()
+            player.jump_held = bool(bits & JUMP)
+            player._update_horizontal_movement(keys)
+            player._update_vertical_movement(static, pygame.sprite.Group())
+            if (player.rect.x != batch.x[i] or player.rect.y != batch.y[i]
+                    or player.velocity_x != batch.velocity_x[i]
+                    or player.velocity_y != batch.velocity_y[i]
+                    or player.on_ground != batch.on_ground[i]
+                    or player.jump_timer != batch.jump_timer[i]):
+                return (frame, i), elapsed
+    return None, elapsed
+
+
+def main(argv):
+    players = 256
+    frames = 600
+    seed = 0
+    args = iter(argv)
+    for arg in args:
+        if arg == "--players":
+            players = int(next(args))
+        elif arg == "--frames":
+            frames = int(next(args))
+        elif arg == "--seed":
+            seed = int(next(args))
+
+    mismatch, elapsed = check(players, frames, seed)
+    if mismatch is not None:
+        print("mismatch at frame {}, player {}".format(*mismatch))
+        return 1
+    print(f"{players} players x {frames} frames match the scalar controller")
+    print(f"batch: {players * frames / elapsed:,.0f} player-frames/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+# sound.py
+#
+# Preloaded sound bank.
+#
+# Every effect is decoded (or synthesized, for the built-in chiptune
+# effects) into a pygame.mixer.Sound when the bank is loaded. Each effect
+# category gets its own reserved mixer channel, so a new coin sound cuts off
+# the previous coin sound instead of stealing the channel a stomp is using,
+# and the same effect triggered several times in one frame plays once.
+#
+# play() is meant to be called from the hot update loop: it only does a dict
+# lookup and a channel play, never touches disk and never allocates.
+# If no audio device is available the bank stays silent instead of failing.
+
+from array import array
+
+import pygame
+
+# Effects: name -> (category, source). A source is either a path to a sound
+# file or a list of (start Hz, end Hz, milliseconds) square-wave sweeps.
+DEFAULT_EFFECTS = {
+    "jump": ("player", [(260, 520, 90)]),
+    "powerup": ("player", [(392, 392, 60), (523, 523, 60), (659, 659, 60), (784, 784, 120)]),
+    "1up": ("player", [(659, 659, 70), (784, 784, 70), (1319, 1319, 70), (1047, 1047, 70), (1175, 1175, 70), (1568, 1568, 140)]),
+    "die": ("player", [(494, 247, 400)]),
+    "coin": ("coin", [(988, 988, 50), (1319, 1319, 200)]),
+    "stomp": ("enemy", [(300, 120, 80)]),
+    "bump": ("block", [(180, 120, 60)]),
+    "break": ("block", [(140, 60, 120)]),
+}
+VOLUME = 0.25
+
+
+class SoundBank:
+    """Effects decoded up front and played on per-category channels."""
+
+    def __init__(self, effects=DEFAULT_EFFECTS):
+        self.effects = dict(effects)
+        self.sounds = {}  # name -> (Sound, Channel, slot)
+        self.last_frame = []  # slot -> frame the effect last played on
+        self.frame = 0
+        self.enabled = False
+
+    def load(self):
+        """Start the mixer if needed and decode every effect."""
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error:
+            # No audio device: stay silent
+            self.enabled = False
+            return self
+        categories = sorted({category for category, _ in self.effects.values()})
+        if pygame.mixer.get_num_channels() < len(categories) + 4:
+            pygame.mixer.set_num_channels(len(categories) + 4)
+        pygame.mixer.set_reserved(len(categories))
+        channels = {category: pygame.mixer.Channel(i) for i, category in enumerate(categories)}
+
+        self.sounds = {}
+        for slot, (name, (category, source)) in enumerate(sorted(self.effects.items())):
+            if isinstance(source, str):
+                effect = pygame.mixer.Sound(source)
+            else:
+                effect = pygame.mixer.Sound(buffer=synthesize(source))
+                effect.set_volume(VOLUME)
+            self.sounds[name] = (effect, channels[category], slot)
+        self.last_frame = [-1] * len(self.sounds)
+        self.enabled = True
+        return self
+
+    def next_frame(self):
+        self.frame += 1
+
+    def play(self, name):
+        if not self.enabled:
+            return
+        effect, channel, slot = self.sounds[name]
+        if self.last_frame[slot] == self.frame:
+            return  # already triggered this frame
+        self.last_frame[slot] = self.frame
+        channel.play(effect)
+
+
+def synthesize(sweeps):
+    """Render square-wave sweeps as raw samples in the mixer's format."""
+    frequency, size, channels = pygame.mixer.get_init()
+    if abs(size) == 32:
+        typecode, amplitude, offset = "f", 1.0, 0
+    else:
+        typecode = "h" if abs(size) == 16 else "b"
+        amplitude = (1 << (abs(size) - 1)) - 1
+        offset = 0
+        if size > 0:
+            # Unsigned formats are centred on half scale
+            typecode = typecode.upper()
+            offset = amplitude + 1
+    convert = float if typecode == "f" else int
+    high = array(typecode, [offset + convert(amplitude)] * channels)
+    low = array(typecode, [offset - convert(amplitude)] * channels)
+    samples = array(typecode)
+    for start_hz, end_hz, ms in sweeps:
+        count = int(frequency * ms / 1000)
+        start = len(samples)
+        # Emit the square wave one half-cycle at a time
+        done = 0
+        level = high
+        while done < count:
+            hz = start_hz + (end_hz - start_hz) * done / count
+            run = min(max(1, int(frequency / hz / 2)), count - done)
+            samples.extend(level * run)
+            done += run
+            level = low if level is high else high
+        # Short linear fade at the end of each note to avoid clicks
+        fade = min(count, int(frequency * 0.005))
+        for i in range(count - fade, count):
+            scale = (count - i) / fade
+            for c in range(channels):
+                index = start + i * channels + c
+                samples[index] = offset + convert((samples[index] - offset) * scale)
+    return samples.tobytes()
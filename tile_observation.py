@@ -0,0 +1,148 @@
+# tile_observation.py
+#
+# Symbolic tile-grid observations, built from level state without rendering.
+#
+# An observation is a stack of tile-sized grids centred on the player, one
+# channel per kind of thing (ground, brick, question block and its content,
+# pipe, coin, enemy), followed by a few player features (position within its
+# tile, velocity in tiles per frame, on ground, power-up, invincibility).
+# Everything is written into one flat preallocated array, which can be a row
+# of a vector env's observation batch or a shared memory block.
+#
+# The level's terrain (blocks and pipes) is rasterized once into a level-wide
+# map and only redrawn when a solid changes; callers pass a version number
+# that changes whenever that happens (the games' ground_contacts.version
+# does). Per step, building an observation is one slice copy out of that map
+# plus a pass over the coins and enemies, and allocates no arrays.
+
+import numpy as np
+
+import collision
+
+# Channels
+GROUND, BRICK, QUESTION, EMPTY, HOLDS_COIN, HOLDS_MUSHROOM, PIPE, COIN, ENEMY = range(9)
+CHANNELS = 9
+TERRAIN_CHANNELS = 7  # the ones kept in the level-wide map
+PLAYER_FEATURES = 7  # x and y within the tile, velocity x/y, on ground, power-up, invincible
+
+_BLOCK_CHANNELS = (
+    (collision.kind("ground"), GROUND),
+    (collision.kind("brick"), BRICK),
+    (collision.kind("question"), QUESTION),
+)
+_HOLDS_COIN = collision.kind("holds_coin")
+_HOLDS_MUSHROOM = collision.kind("holds_mushroom")
+_QUESTION = collision.kind("question")
+
+
+def observation_size(rows, cols):
+    return CHANNELS * rows * cols + PLAYER_FEATURES
+
+
+class TileObservation:
+    """Writes rows x cols tile observations around the player into `out`."""
+
+    def __init__(self, tile_size, rows=15, cols=17, out=None, dtype=np.float32):
+        self.tile_size = tile_size
+        self.rows = rows
+        self.cols = cols
+        self.size = observation_size(rows, cols)
+        self.out = np.zeros(self.size, dtype) if out is None else out
+        cells = CHANNELS * rows * cols
+        self.grid = self.out[:cells].reshape(CHANNELS, rows, cols)
+        self.player = self.out[cells:]
+        self.terrain = np.zeros((TERRAIN_CHANNELS, 0, 0), dtype)
+        self.version = None
+
+    def invalidate(self):
+        """Force the terrain to be redrawn on the next build()."""
+        self.version = None
+
+    def build(self, player, version, platforms, pipes, blocks, coins, enemies, invincible=0):
+        """Fill self.out from the level; returns it.
+
+        `version` must change whenever a block or pipe moves, appears,
+        disappears or changes type; `invincible` is the ticks left.
+        """
+        if version != self.version:
+            self._draw_terrain(platforms, pipes, blocks)
+            self.version = version
+
+        tile = self.tile_size
+        rows = self.rows
+        cols = self.cols
+        rect = player.rect
+        top = rect.centery // tile - rows // 2
+        left = rect.centerx // tile - cols // 2
+
+        grid = self.grid
+        grid.fill(0)
+        terrain = self.terrain
+        height, width = terrain.shape[1:]
+        r0 = max(top, 0)
+        r1 = min(top + rows, height)
+        c0 = max(left, 0)
+        c1 = min(left + cols, width)
+        if r0 < r1 and c0 < c1:
+            grid[:TERRAIN_CHANNELS, r0 - top:r1 - top, c0 - left:c1 - left] = terrain[:, r0:r1, c0:c1]
+
+        for coin in coins:
+            r = coin.rect.centery // tile - top
+            c = coin.rect.centerx // tile - left
+            if 0 <= r < rows and 0 <= c < cols:
+                grid[COIN, r, c] = 1
+        for enemy in enemies:
+            if enemy.dead:
+                continue
+            r = enemy.rect.centery // tile - top
+            c = enemy.rect.centerx // tile - left
+            if 0 <= r < rows and 0 <= c < cols:
+                grid[ENEMY, r, c] = 1
+
+        features = self.player
+        features[0] = rect.centerx % tile / tile
+        features[1] = rect.centery % tile / tile
+        features[2] = player.velocity_x / tile
+        features[3] = player.velocity_y / tile
+        features[4] = player.on_ground
+        features[5] = player.power_up
+        features[6] = invincible
+        return self.out
+
+    def _draw_terrain(self, platforms, pipes, blocks):
+        tile = self.tile_size
+        height = width = 0
+        for group in (platforms, pipes, blocks):
+            for sprite in group:
+                height = max(height, (sprite.rect.bottom - 1) // tile + 1)
+                width = max(width, (sprite.rect.right - 1) // tile + 1)
+        terrain = self.terrain
+        if height > terrain.shape[1] or width > terrain.shape[2]:
+            terrain = self.terrain = np.zeros(
+                (TERRAIN_CHANNELS, max(height, terrain.shape[1]), max(width, terrain.shape[2])),
+                terrain.dtype)
+        else:
+            terrain.fill(0)
+
+        for group in (platforms, blocks):
+            for block in group:
+                # Blocks are tile-aligned; the centre stays in the tile while one bounces
+                r = block.rect.centery // tile
+                c = block.rect.centerx // tile
+                if r < 0 or c < 0:
+                    continue
+                kinds = block.kinds
+                if kinds & _QUESTION and block.hit_count:
+                    terrain[EMPTY, r, c] = 1
+                    continue
+                for flag, channel in _BLOCK_CHANNELS:
+                    if kinds & flag:
+                        terrain[channel, r, c] = 1
+                if kinds & _HOLDS_COIN:
+                    terrain[HOLDS_COIN, r, c] = 1
+                elif kinds & _HOLDS_MUSHROOM:
+                    terrain[HOLDS_MUSHROOM, r, c] = 1
+        for pipe in pipes:
+            rect = pipe.rect
+            terrain[PIPE, max(rect.top // tile, 0):(rect.bottom - 1) // tile + 1,
+                    max(rect.left // tile, 0):(rect.right - 1) // tile + 1] = 1
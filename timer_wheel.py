@@ -0,0 +1,93 @@
+# timer_wheel.py
+#
+# Tick-keyed timer wheel.
+#
+# Countdowns (invincibility, death animations, block bounces, jump boosts)
+# used to be counters that every entity decremented and tested itself each
+# frame. Instead an entity schedules a Timer for the tick it expires on and
+# gives a callback; the wheel keeps one bucket per expiry tick, so advancing
+# a frame only looks at the timers that expire on that tick. An entity that
+# needs to know how long is left (e.g. to flash while invincible) asks the
+# wheel for the remaining ticks instead of keeping its own counter.
+#
+# All timer state lives in the wheel, so snapshot()/restore() capture and
+# rewind every pending countdown at once.
+
+class Timer:
+    """A pending callback; falsy once it has fired or been cancelled."""
+    __slots__ = ("deadline", "callback", "args", "active")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self):
+        self.active = False
+
+    def __bool__(self):
+        return self.active
+
+
+class TimerWheel:
+    """Timers bucketed by the simulation tick they expire on."""
+
+    def __init__(self):
+        self.tick = 0
+        self.slots = {}  # expiry tick -> [Timer]
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) `delay` ticks from now (at least one)."""
+        timer = Timer(self.tick + max(1, delay), callback, args)
+        self.slots.setdefault(timer.deadline, []).append(timer)
+        return timer
+
+    def remaining(self, timer):
+        """Ticks until `timer` fires, or 0 if it's no longer pending."""
+        if timer is None or not timer.active:
+            return 0
+        return timer.deadline - self.tick
+
+    def advance(self):
+        """Move to the next tick and fire the timers due on it."""
+        self.tick += 1
+        due = self.slots.pop(self.tick, None)
+        if due:
+            for timer in due:
+                if timer.active:
+                    timer.active = False
+                    timer.callback(*timer.args)
+        return self.tick
+
+    def clear(self):
+        for due in self.slots.values():
+            for timer in due:
+                timer.active = False
+        self.slots.clear()
+
+    def reset(self):
+        """Drop every pending timer and go back to tick 0."""
+        self.clear()
+        self.tick = 0
+
+    def __len__(self):
+        return sum(timer.active for due in self.slots.values() for timer in due)
+
+    def snapshot(self):
+        """Capture the tick and every pending timer."""
+        pending = [timer for due in self.slots.values() for timer in due if timer.active]
+        return self.tick, [(timer, timer.deadline) for timer in pending]
+
+    def restore(self, snapshot):
+        """Rewind to a snapshot(); timers fired or cancelled since come back.
+
+        Only the wheel is rewound: entities holding the timers must be
+        restored alongside it.
+        """
+        self.clear()
+        self.tick, pending = snapshot
+        for timer, deadline in pending:
+            timer.deadline = deadline
+            timer.active = True
+            self.slots.setdefault(deadline, []).append(timer)